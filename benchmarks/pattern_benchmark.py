@@ -0,0 +1,341 @@
+"""
+Pattern matching benchmarks.
+
+Runs anywhere (no target process needed) on deterministic synthetic corpora and reports the throughput of the
+remembrance.pattern APIs in MB/s (compile is reported in compiled patterns per second).
+
+    python benchmarks/pattern_benchmark.py --sizes 1M,16M --save baseline.json
+    python benchmarks/pattern_benchmark.py --sizes 1M,16M --baseline baseline.json --threshold 0.15
+
+With --baseline, the exit status is 1 if any result is slower than the baseline by more than the threshold.
+The baseline must come from the same --seed (the corpora and the patterns depend on it), another Python version
+or machine only gets a warning.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from remembrance.pattern import Pattern, PatternSet  # noqa: E402
+
+CORPORA = ('random', 'code', 'repetitive')
+PATTERN_SIZES = (4, 8, 16, 32)
+WILDCARD_DENSITIES = (0.0, 0.25, 0.5)
+SET_SIZE = 100
+SEED = 0x5EED
+
+_UNITS = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+# A few common x86-64 instruction encodings, the "code" corpus is stitched from them
+_INSTRUCTIONS = (
+    b'\x48\x89\x5c\x24', b'\x48\x83\xec', b'\x48\x8b\x05', b'\x48\x8d\x0d', b'\x48\x85\xc0', b'\x74',
+    b'\x75', b'\xe8', b'\xe9', b'\xc3', b'\x33\xc0', b'\x8b\xc8', b'\x48\x8b\xcb', b'\xff\x15', b'\x0f\x84',
+    b'\x41\x57', b'\x55', b'\x53', b'\x5b', b'\x5d', b'\x48\x83\xc4', b'\x89\x44\x24', b'\x4c\x8b\xc0',
+)
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse a size such as "512K", "16M" or "1G".
+    :param text: the size
+    :return: the size in bytes
+    """
+    text = text.strip().upper().rstrip('B')
+    if text and text[-1] in _UNITS:
+        return int(float(text[:-1]) * _UNITS[text[-1]])
+
+    return int(text)
+
+
+def format_size(size: int) -> str:
+    for unit in 'GMK':
+        if size >= _UNITS[unit] and size % _UNITS[unit] == 0:
+            return f"{size // _UNITS[unit]}{unit}"
+
+    return str(size)
+
+
+def generate_random(size: int, seed: int) -> bytes:
+    """ Uniformly random bytes: anchors are rare, the best case for skip-ahead strategies. """
+    return random.Random(seed).randbytes(size)
+
+
+def generate_code(size: int, seed: int) -> bytes:
+    """ Functions made of common instruction encodings and random operands, padded with int3 like a .text section. """
+    generator = random.Random(seed)
+    blocks, total = [], 0
+
+    while total < size:
+        function = bytearray(b'\x40\x53\x48\x83\xec\x20')
+        for _ in range(generator.randint(8, 96)):
+            function += generator.choice(_INSTRUCTIONS)
+            function += generator.randbytes(generator.choice((0, 1, 1, 4)))
+        function += b'\x48\x83\xc4\x20\x5b\xc3'
+        function += b'\xcc' * (-len(function) % 16)
+
+        blocks.append(bytes(function))
+        total += len(function)
+
+    return b''.join(blocks)[:size]
+
+
+def generate_repetitive(size: int, seed: int) -> bytes:
+    """ Zero pages and pages repeating a short record with rare changes: the worst case for anchor searches. """
+    generator = random.Random(seed)
+    pages, total = [], 0
+
+    while total < size:
+        kind = generator.random()
+        if kind < 0.5:
+            page = bytes(4096)
+        else:
+            record = generator.randbytes(generator.choice((4, 8, 16)))
+            page = bytearray(record * (4096 // len(record)))
+            for _ in range(generator.randint(0, 4)):
+                page[generator.randrange(4096)] = generator.randrange(256)
+            page = bytes(page)
+
+        pages.append(page)
+        total += len(page)
+
+    return b''.join(pages)[:size]
+
+
+GENERATORS = {'random': generate_random, 'code': generate_code, 'repetitive': generate_repetitive}
+
+
+def make_pattern_text(data: bytes, offset: int, size: int, density: float, generator: random.Random) -> str:
+    """
+    Turn some corpus bytes into a pattern, with a share of wildcard bytes (never the first or the last one).
+    :param data: the corpus
+    :param offset: where the bytes are taken from
+    :param size: the pattern size
+    :param density: the share of wildcard bytes
+    :param generator: the random generator picking the wildcards
+    :return: the pattern text
+    """
+    inner = list(range(1, size - 1))
+    wildcards = set(generator.sample(inner, min(len(inner), round(density * size))))
+    return ' '.join('??' if index in wildcards else f"{data[offset + index]:02X}" for index in range(size))
+
+
+def make_missing_pattern(data: bytes, size: int, density: float, generator: random.Random) -> Pattern:
+    """
+    Build a pattern looking like the corpus bytes, but not found anywhere in it.
+    :param data: the corpus
+    :param size: the pattern size
+    :param density: the share of wildcard bytes
+    :param generator: the random generator
+    :return: the pattern, None if short patterns with many wildcards keep matching
+    """
+    for attempt in range(32):
+        if attempt < 16:
+            text = make_pattern_text(data, generator.randrange(len(data) - size), size, density, generator)
+            text = text[:-2] + f"{generator.randrange(256):02X}"
+        else:
+            text = make_pattern_text(generator.randbytes(size), 0, size, density, generator)
+
+        pattern = Pattern.compile(text)
+        if pattern.match(data) is None:
+            return pattern
+
+    # noinspection PyTypeChecker
+    return None
+
+
+def match_walk(pattern: Pattern, data: bytes) -> int:
+    """
+    Walk a corpus with Pattern.match, restarting after each hit, like a "find next" loop.
+    :param pattern: the pattern
+    :param data: the corpus
+    :return: the hit count
+    """
+    view, position, hits = memoryview(data), 0, 0
+    while True:
+        offset = pattern.match(view[position:])
+        if offset is None:
+            return hits
+
+        hits += 1
+        position += offset + 1
+
+
+def measure(function, repeat: int) -> float:
+    """
+    Time a function, keeping the best run.
+    :param function: the function
+    :param repeat: how many runs
+    :return: the best time in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return max(best, 1e-9)
+
+
+def benchmark_corpus(name: str, data: bytes, repeat: int, full_iterations: int, seed: int = SEED) -> dict:
+    """
+    Run every benchmark on a corpus.
+    :param name: the corpus name, prefixed to the result names
+    :param data: the corpus
+    :param repeat: how many runs per benchmark
+    :param full_iterations: how many windows Pattern.match_full is called on
+    :param seed: the seed of the pattern selection
+    :return: the results, by benchmark name
+    """
+    results = {}
+    megabytes = len(data) / (1 << 20)
+    generator = random.Random(seed)
+
+    def record(benchmark: str, value: float, unit: str):
+        results[f"{name}/{format_size(len(data))}/{benchmark}"] = {'value': value, 'unit': unit}
+        print(f"  {benchmark:<32} {value:>14,.1f} {unit}", flush=True)
+
+    for size in PATTERN_SIZES:
+        for density in WILDCARD_DENSITIES:
+            suffix = f"{size}B-{int(density * 100)}%"
+            text = make_pattern_text(data, len(data) - size, size, density, generator)
+            pattern = Pattern.compile(text)
+
+            elapsed = measure(lambda: [Pattern.compile(text) for _ in range(1000)], repeat)
+            record(f"compile[{suffix}]", 1000 / elapsed, 'patterns/s')
+
+            # Pattern.match stops on the first hit, a missing pattern measures a full scan in a single call
+            missing = make_missing_pattern(data, size, density, generator) or pattern
+            elapsed = measure(lambda: match_walk(missing, data), repeat)
+            record(f"match[{suffix}]", megabytes / elapsed, 'MB/s')
+
+            windows = [data[offset:offset + size] for offset in
+                       range(0, len(data) - size, max(1, (len(data) - size) // full_iterations))][:full_iterations]
+            elapsed = measure(lambda: [pattern.match_full(window) for window in windows], repeat)
+            record(f"match_full[{suffix}]", len(windows) * size / (1 << 20) / elapsed, 'MB/s')
+
+            elapsed = measure(lambda: pattern.match_all(data), repeat)
+            record(f"match_all[{suffix}]", megabytes / elapsed, 'MB/s')
+
+            elapsed = measure(lambda: sum(1 for _ in pattern.finditer(data, overlapped=False)), repeat)
+            record(f"finditer[{suffix}]", megabytes / elapsed, 'MB/s')
+
+    # Patterns matching all over the corpus (e.g. zero pages) would measure the result list, not the scan
+    patterns = []
+    for _ in range(SET_SIZE * 16):
+        pattern = Pattern.compile(make_pattern_text(data, generator.randrange(len(data) - 16), 16, 0.25, generator))
+        if len(pattern.match_all(data, max_hits=SET_SIZE)) < SET_SIZE:
+            patterns.append(pattern)
+            if len(patterns) == SET_SIZE:
+                break
+
+    while len(patterns) < SET_SIZE:
+        patterns.append(make_missing_pattern(data, 16, 0.25, generator) or Pattern.compile(
+            make_pattern_text(generator.randbytes(16), 0, 16, 0.25, generator)))
+
+    pattern_set = PatternSet(patterns)
+    pattern_set.scan(data[:4096])
+    elapsed = measure(lambda: pattern_set.scan(data), repeat)
+    record(f"pattern_set[{SET_SIZE}x16B-25%]", megabytes / elapsed, 'MB/s')
+
+    # The same patterns scanned one by one, what the set has to beat
+    elapsed = measure(lambda: [sum(1 for _ in pattern.finditer(data)) for pattern in patterns], repeat)
+    record(f"separate_scans[{SET_SIZE}x16B-25%]", megabytes / elapsed, 'MB/s')
+
+    return results
+
+
+def run_metadata(seed: int) -> dict:
+    """
+    Describe what the results depend on besides the code: the corpora and patterns seed, and the platform.
+    :param seed: the seed
+    :return: the metadata saved along the results
+    """
+    return {'python': platform.python_version(), 'machine': platform.machine(), 'seed': seed}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Find the results slower than their baseline by more than the threshold.
+    :param results: the results, by benchmark name
+    :param baseline: the baseline results, by benchmark name
+    :param threshold: the tolerated slowdown (0.15 is 15%)
+    :return: the regressions, as (name, baseline value, value) tuples
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+
+        if result['value'] < reference['value'] * (1 - threshold):
+            regressions.append((name, reference['value'], result['value']))
+
+    return regressions
+
+
+def main(arguments: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark remembrance pattern matching on synthetic corpora.")
+    parser.add_argument('--sizes', default='1M,16M', help="comma separated corpus sizes, 1M to 1G (default: 1M,16M)")
+    parser.add_argument('--corpora', default=','.join(CORPORA), help=f"comma separated corpora among {CORPORA}")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per benchmark, the best one is kept")
+    parser.add_argument('--full-iterations', type=int, default=10000, help="windows checked with match_full")
+    parser.add_argument('--seed', type=int, default=SEED, help="the corpora and pattern selection seed")
+    parser.add_argument('--save', metavar='PATH', help="write the results as a JSON baseline")
+    parser.add_argument('--baseline', metavar='PATH', help="compare the results to a JSON baseline")
+    parser.add_argument('--threshold', type=float, default=0.15, help="tolerated slowdown (default: 0.15)")
+    options = parser.parse_args(arguments)
+
+    sizes = [parse_size(size) for size in options.sizes.split(',')]
+    corpora = options.corpora.split(',')
+    for corpus in corpora:
+        if corpus not in GENERATORS:
+            parser.error(f"unknown corpus \"{corpus}\"")
+
+    metadata = run_metadata(options.seed)
+    baseline = None
+    if options.baseline:
+        with open(options.baseline) as file:
+            baseline = json.load(file)
+
+        # Other corpora and patterns measure something else, another platform only shifts the numbers
+        if baseline.get('seed') != metadata['seed']:
+            parser.error(f"the baseline was measured with seed {baseline.get('seed')}, not {metadata['seed']}")
+
+        for key in ('python', 'machine'):
+            if baseline.get(key) != metadata[key]:
+                print(f"WARNING: the baseline was measured on {key} {baseline.get(key)}, not {metadata[key]}, "
+                      f"the comparison may be meaningless.", flush=True)
+
+    results = {}
+    for corpus in corpora:
+        for size in sizes:
+            print(f"{corpus} {format_size(size)}", flush=True)
+            data = GENERATORS[corpus](size, options.seed)
+            results.update(benchmark_corpus(corpus, data, options.repeat, options.full_iterations, options.seed))
+            del data
+
+    if options.save:
+        with open(options.save, 'w') as file:
+            json.dump(dict(metadata, results=results), file, indent=2, sort_keys=True)
+
+    if baseline is not None:
+        regressions = compare(results, baseline['results'], options.threshold)
+        for name, reference, value in regressions:
+            print(f"REGRESSION {name}: {value:,.1f} < {reference:,.1f} (-{(1 - value / reference) * 100:.1f}%)")
+
+        if regressions:
+            return 1
+
+        print(f"No regression past {options.threshold * 100:.0f}% against {options.baseline}.")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
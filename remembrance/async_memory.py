@@ -0,0 +1,243 @@
+import asyncio
+import collections
+import functools
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import AsyncIterator, List, Tuple
+
+from .memory import DEFAULT_COALESCE_GAP, DEFAULT_MAX_MERGED_SIZE, DEFAULT_SCAN_CHUNK_SIZE, Memory
+from .pattern import Pattern, PatternExpression
+
+# Calls a single AsyncMemory runs at once, the others wait without using a thread
+DEFAULT_MAX_CONCURRENCY = 8
+# Threads of the executor shared by the AsyncMemory objects without their own one
+DEFAULT_SHARED_WORKERS = 16
+# Seconds between two AsyncMemory.poll reads
+DEFAULT_POLL_INTERVAL = 0.1
+
+_shared_executor = None
+_shared_executor_lock = threading.Lock()
+
+
+def _get_shared_executor() -> Executor:
+    """
+    Get the executor shared by every AsyncMemory object, created on first use.
+    :return: the thread pool executor
+    """
+    global _shared_executor
+
+    with _shared_executor_lock:
+        if _shared_executor is None:
+            _shared_executor = ThreadPoolExecutor(max_workers=DEFAULT_SHARED_WORKERS,
+                                                  thread_name_prefix='remembrance-async')
+
+        return _shared_executor
+
+
+def _release_slot(semaphore: asyncio.Semaphore, future: asyncio.Future):
+    """
+    Give back the concurrency slot of a finished call.
+    :param semaphore: the semaphore the slot was taken from
+    :param future: the call future (its exception is retrieved, nobody may be waiting for it anymore)
+    """
+    semaphore.release()
+    if not future.cancelled():
+        future.exception()
+
+
+class AsyncMemory:
+    """
+    An asyncio facade of a Memory object: the blocking calls run on an executor, so they don't block the event loop.
+    The calls of a single object are capped (max_concurrency), the extra ones wait in the event loop and not
+    in a thread, so one loop can have thousands of outstanding calls across many processes with a bounded thread count.
+    Cancelling a call that's still waiting for its turn cancels it for good, a call already running in a thread
+    completes there and its result is dropped (it keeps counting against max_concurrency until then).
+    """
+    __memory: Memory
+    __executor: Executor
+    __max_concurrency: int
+    __semaphore: asyncio.Semaphore
+    __loop: asyncio.AbstractEventLoop
+
+    @property
+    def memory(self) -> Memory:
+        """ The wrapped Memory object. """
+        return self.__memory
+
+    @property
+    def executor(self) -> Executor:
+        """ The executor the blocking calls run on. """
+        return self.__executor
+
+    @property
+    def max_concurrency(self) -> int:
+        """ How many calls run at once at most. """
+        return self.__max_concurrency
+
+    def __init__(self, memory: Memory, max_concurrency: int = DEFAULT_MAX_CONCURRENCY, executor: Executor = None):
+        """
+        :param memory: the Memory object
+        :param max_concurrency: how many calls can run at once (the concurrency cap of the process)
+        :param executor: the executor to run the blocking calls on (a thread pool shared by every object if None)
+        """
+        if max_concurrency < 1:
+            raise ValueError("The concurrency cap must be at least 1.")
+
+        self.__memory = memory
+        self.__executor = _get_shared_executor() if executor is None else executor
+        self.__max_concurrency = max_concurrency
+        self.__semaphore = None
+        self.__loop = None
+
+    def __get_semaphore(self) -> asyncio.Semaphore:
+        """
+        Get the semaphore of the running event loop (asyncio primitives can't be shared between loops).
+        :return: the semaphore
+        """
+        loop = asyncio.get_running_loop()
+        if self.__loop is not loop:
+            self.__semaphore = asyncio.Semaphore(self.__max_concurrency)
+            self.__loop = loop
+
+        return self.__semaphore
+
+    async def __run(self, function, *args, **kwargs):
+        semaphore = self.__get_semaphore()
+        await semaphore.acquire()
+        try:
+            task = self.__executor.submit(functools.partial(function, *args, **kwargs))
+        except BaseException:
+            semaphore.release()
+            raise
+
+        # The slot is given back when the call is over, not when the caller stops waiting for it
+        future = asyncio.wrap_future(task)
+        future.add_done_callback(functools.partial(_release_slot, semaphore))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Only stops a call that hasn't started yet
+            task.cancel()
+            raise
+
+    async def read(self, address: int, size: int) -> bytes:
+        """
+        Read some data from the memory.
+        NOTE: For more details, look at Memory.read documentation.
+        """
+        return await self.__run(self.__memory.read, address, size)
+
+    async def read_into(self, address: int, buffer, offset: int = 0, size: int = None) -> int:
+        """
+        Read some data from the memory straight into a buffer.
+        NOTE: For more details, look at Memory.read_into documentation.
+        """
+        return await self.__run(self.__memory.read_into, address, buffer, offset, size)
+
+    async def read_many(self, ranges: List[Tuple[int, int]], gap: int = DEFAULT_COALESCE_GAP,
+                        max_size: int = DEFAULT_MAX_MERGED_SIZE) -> List[memoryview]:
+        """
+        Read many (usually small) ranges at once.
+        NOTE: For more details, look at Memory.read_many documentation.
+        """
+        return await self.__run(self.__memory.read_many, ranges, gap, max_size)
+
+    async def write(self, address: int, data: bytes):
+        """
+        Write some data into the memory.
+        NOTE: For more details, look at Memory.write documentation.
+        """
+        await self.__run(self.__memory.write, address, data)
+
+    async def query(self, address: int) -> tuple:
+        """
+        Get the region containing an address.
+        NOTE: For more details, look at Memory.query documentation.
+        """
+        return await self.__run(self.__memory.query, address)
+
+    async def scan_iter(self, pattern: Pattern or PatternExpression, address: int = 0, size: int = None,
+                        chunk_size: int = DEFAULT_SCAN_CHUNK_SIZE, first_only: bool = False, overlapped: bool = True,
+                        refresh: bool = True) -> AsyncIterator[int]:
+        """
+        Find every address a pattern matches at, yielding the hits as their chunk is matched.
+        The chunks are the same as Memory.scan ones: up to max_concurrency of them are read and matched ahead
+        of the consumer, and the hits are yielded in address order. Leaving the iteration early (or cancelling
+        the consumer) cancels the chunks not started yet.
+        NOTE: For more details, look at Memory.scan documentation.
+        :param pattern: the pattern
+        :param address: the address to start from
+        :param size: how many bytes to scan (up to the end of the address space if None)
+        :param chunk_size: how many bytes each call reads
+        :param first_only: if the scan must stop on the first hit
+        :param overlapped: if a hit can start inside the previous one
+        :param refresh: if the region map must be walked again first (see Memory.regions)
+        :return: an async iterator of hit addresses, in ascending order
+        """
+        overlap = max(pattern.size - 1, 0)
+        stop = None if size is None else address + size
+        next_address = 0
+
+        table = await self.__run(self.__memory.regions, refresh)
+        chunks = [(position, min(position + chunk_size + overlap, run_end) - position)
+                  for run_start, run_end in table.readable(address, stop).runs(address, stop)
+                  for position in range(run_start, run_end, chunk_size)]
+
+        tasks = collections.deque()
+        try:
+            for index in range(len(chunks)):
+                # Keep the next chunks going while the consumer handles this one
+                while len(tasks) < self.__max_concurrency and index + len(tasks) < len(chunks):
+                    position, read_size = chunks[index + len(tasks)]
+                    tasks.append(asyncio.ensure_future(self.__run(self.__memory.scan_chunk, pattern, position,
+                                                                  read_size, chunk_size, overlapped)))
+
+                position = chunks[index][0]
+                offsets, ends = await tasks.popleft()
+                for hit, offset in enumerate(offsets):
+                    if position + offset < next_address:
+                        continue
+
+                    yield position + offset
+                    if first_only:
+                        return
+
+                    if not overlapped:
+                        next_address = position + ends[hit]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def scan(self, pattern: Pattern or PatternExpression, *args, **kwargs) -> List[int]:
+        """
+        Find every address a pattern matches at.
+        NOTE: For more parameters, look at AsyncMemory.scan_iter documentation.
+        :param pattern: the pattern
+        :return: the hit addresses, in ascending order
+        """
+        return [hit async for hit in self.scan_iter(pattern, *args, **kwargs)]
+
+    async def poll(self, address: int, size: int, interval: float = DEFAULT_POLL_INTERVAL,
+                   changes_only: bool = True) -> AsyncIterator[bytes]:
+        """
+        Read some data again and again, until the iteration is left (or the consumer cancelled).
+        :param address: the address to read from
+        :param size: how many bytes to read
+        :param interval: how many seconds to wait between two reads
+        :param changes_only: if only the data different from the previous one must be yielded
+        :return: an async iterator of the read data (the first read is always yielded)
+        """
+        previous = None
+        while True:
+            data = await self.read(address, size)
+            if not changes_only or data != previous:
+                previous = data
+                yield data
+
+            await asyncio.sleep(interval)
+
+    def __str__(self) -> str:
+        return f"AsyncMemory(memory={self.__memory}, max_concurrency={self.__max_concurrency})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,227 @@
+import ctypes
+import os
+import sys
+from abc import ABC, abstractmethod
+from typing import Iterator, List, Tuple
+
+# A region, as returned by MemoryBackend.query: (base address, size, state, protection, type).
+# The values are the Windows ones (see MemoryState, MemoryProtection and MemoryType), whatever the backend is.
+Region = Tuple[int, int, int, int, int]
+
+
+def writable_view(buffer) -> memoryview:
+    """
+    View a writable buffer (bytearray, memoryview, mmap, NumPy array...) as flat bytes.
+    :param buffer: the buffer
+    :return: the byte memoryview
+    """
+    view = memoryview(buffer)
+    if view.readonly:
+        raise TypeError("The buffer isn't writable.")
+
+    if not view.c_contiguous:
+        raise TypeError("The buffer isn't contiguous.")
+
+    return view if view.format == 'B' and view.ndim == 1 else view.cast('B')
+
+
+def buffer_address(view: memoryview) -> int:
+    """
+    Get the address of a writable byte memoryview, to pass it to native functions.
+    NOTE: The address is only valid while the view (and its buffer) is alive.
+    :param view: the view, as returned by writable_view
+    :return: the address of its first byte
+    """
+    if not view.nbytes:
+        return 0
+
+    return ctypes.addressof(ctypes.c_char.from_buffer(view))
+
+
+class MemoryBackend(ABC):
+    """
+    The native memory access of a process, everything Memory is built on.
+    Failures raise an OSError (WinAPIException on Windows), the try_ methods return the error code instead.
+    """
+
+    def exception(self, code: int) -> OSError:
+        """
+        Build the exception of an error code returned by a try_ method.
+        :param code: the error code
+        :return: the exception
+        """
+        return OSError(code, os.strerror(code))
+
+    @abstractmethod
+    def read(self, address: int, size: int) -> bytes:
+        """
+        Read some data from the memory.
+        :param address: the address to read from
+        :param size: how many bytes to read
+        :return: the read data
+        """
+        ...
+
+    @abstractmethod
+    def read_into(self, address: int, view: memoryview):
+        """
+        Read some data from the memory straight into a buffer.
+        :param address: the address to read from
+        :param view: the writable byte memoryview to fill (see writable_view), its size is how many bytes to read
+        """
+        ...
+
+    def try_read_into(self, address: int, view: memoryview) -> int:
+        """
+        Read some data from the memory straight into a buffer, without raising on failure.
+        Backends override it with a call that builds no exception (read_into is then a wrapper of it).
+        :param address: the address to read from
+        :param view: the writable byte memoryview to fill (see writable_view), its size is how many bytes to read
+        :return: 0 on success, the error code otherwise
+        """
+        try:
+            self.read_into(address, view)
+        except OSError as exception:
+            return getattr(exception, 'winerror', None) or exception.errno or -1
+
+        return 0
+
+    def read_into_partial(self, address: int, view: memoryview) -> int:
+        """
+        Read some data from the memory straight into a buffer, up to the first byte that can't be read.
+        Backends able to tell how many bytes a failed read copied override it (the default is all or nothing).
+        :param address: the address to read from
+        :param view: the writable byte memoryview to fill (see writable_view), its size is how many bytes to read
+        :return: how many bytes were read, from the start of the view
+        """
+        try:
+            self.read_into(address, view)
+        except OSError:
+            return 0
+
+        return view.nbytes
+
+    def read_ranges(self, ranges: List[Tuple[int, int]]) -> list:
+        """
+        Read many ranges, a failing range doesn't fail the others.
+        Backends able to read several ranges in a single native call (vectored reads) override it.
+        :param ranges: the (address, size) ranges
+        :return: the read data of each range (a bytes-like object), None for the ranges that couldn't be read
+        """
+        results = []
+        for address, size in ranges:
+            try:
+                results.append(self.read(address, size))
+            except OSError:
+                results.append(None)
+
+        return results
+
+    @abstractmethod
+    def write(self, address: int, data: bytes):
+        """
+        Write some data into the memory.
+        :param address: the address to write to
+        :param data: the data to write
+        """
+        ...
+
+    @abstractmethod
+    def query(self, address: int) -> Region:
+        """
+        Get the region containing an address.
+        :param address: the address
+        :return: the region, None past the end of the address space
+        """
+        ...
+
+    def try_query(self, address: int) -> Region or int:
+        """
+        Get the region containing an address, without raising on failure.
+        Backends override it with a call that builds no exception (query is then a wrapper of it).
+        :param address: the address
+        :return: the region, None past the end of the address space, the error code if it can't be queried
+        """
+        try:
+            return self.query(address)
+        except OSError as exception:
+            return getattr(exception, 'winerror', None) or exception.errno or -1
+
+    @abstractmethod
+    def protect(self, address: int, size: int, protection: int) -> int:
+        """
+        Change the protection of some allocated memory.
+        :param address: the memory address
+        :param size: the memory size
+        :param protection: the new protection
+        :return: the old protection
+        """
+        ...
+
+    @abstractmethod
+    def allocate(self, size: int, protection: int, allocation_type: int) -> int:
+        """
+        Allocate some memory.
+        :param size: how many bytes to allocate
+        :param protection: the memory protection
+        :param allocation_type: the allocation type
+        :return: the address of the newly allocated memory
+        """
+        ...
+
+    @abstractmethod
+    def free(self, address: int, size: int, free_type: int):
+        """
+        Free some previously allocated memory.
+        :param address: the memory address
+        :param size: the memory size
+        :param free_type: the free type
+        """
+        ...
+
+    def regions(self, start: int = 0, stop: int = None) -> Iterator[Region]:
+        """
+        Walk the address space, one region at a time.
+        Backends knowing the whole region map at once override it to avoid a query per region.
+        :param start: the address to start from
+        :param stop: the address to stop at (end of the address space if None)
+        :return: an iterator of regions, free ones included
+        """
+        address = start
+        while stop is None or address < stop:
+            region = self.query(address)
+            if region is None or region[1] == 0:
+                break
+
+            yield region
+            address = region[0] + region[1]
+
+    def close(self):
+        """ Release the backend resources (file descriptors...), the process itself is left alone. """
+        pass
+
+
+# noinspection PyUnresolvedReferences
+def default_backend(process: "Process" or int = None) -> MemoryBackend:
+    """
+    Pick the backend of the running platform.
+    :param process: the Process object (Windows), or the process ID (Linux, the current process if None)
+    :return: the backend
+    """
+    if sys.platform == 'win32':
+        from .windows import WindowsMemoryBackend
+
+        if process is None:
+            raise ValueError("A Process object is required on Windows.")
+
+        return WindowsMemoryBackend(process)
+
+    if sys.platform.startswith('linux'):
+        from .linux import LinuxMemoryBackend
+
+        if process is None:
+            process = os.getpid()
+
+        return LinuxMemoryBackend(process if isinstance(process, int) else process.pid)
+
+    raise NotImplementedError(f"No memory backend for the {sys.platform} platform.")
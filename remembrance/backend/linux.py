@@ -0,0 +1,450 @@
+import bisect
+import ctypes
+import errno
+import mmap
+import os
+import time
+from typing import Iterator, List, Tuple
+
+from . import MemoryBackend, Region, buffer_address
+from ..memory import MemoryAllocationType, MemoryFreeType, MemoryProtection, MemoryState, MemoryType
+
+PROT_NONE = 0x0
+PROT_READ = 0x1
+PROT_WRITE = 0x2
+PROT_EXEC = 0x4
+
+MAP_PRIVATE = 0x02
+MAP_ANONYMOUS = 0x20
+MAP_NORESERVE = 0x4000
+MAP_FAILED = ctypes.c_void_p(-1).value
+
+MADV_DONTNEED = 4
+
+# Most iovecs a single process_vm_readv call accepts
+IOV_MAX = 1024
+# Seconds the parsed /proc/<pid>/maps is reused by queries (LinuxMemoryBackend.regions always reads it again)
+DEFAULT_MAPS_TTL = 0.1
+
+# Page protection flags (guard, no cache, write combine) have no Linux equivalent
+_PROTECTION_FLAGS = MemoryProtection.PAGE_GUARD | MemoryProtection.PAGE_NOCACHE | MemoryProtection.PAGE_WRITECOMBINE
+
+_PROTECTIONS = {
+    (False, False, False): MemoryProtection.PAGE_NOACCESS,
+    (True, False, False): MemoryProtection.PAGE_READONLY,
+    (True, True, False): MemoryProtection.PAGE_READWRITE,
+    (False, False, True): MemoryProtection.PAGE_EXECUTE,
+    (True, False, True): MemoryProtection.PAGE_EXECUTE_READ,
+    (True, True, True): MemoryProtection.PAGE_EXECUTE_READWRITE,
+    # Write-only pages can't be read, like Windows no access (or execute only) pages
+    (False, True, False): MemoryProtection.PAGE_NOACCESS,
+    (False, True, True): MemoryProtection.PAGE_EXECUTE,
+}
+
+_PROT_FLAGS = {
+    MemoryProtection.PAGE_NOACCESS: PROT_NONE,
+    MemoryProtection.PAGE_READONLY: PROT_READ,
+    MemoryProtection.PAGE_READWRITE: PROT_READ | PROT_WRITE,
+    MemoryProtection.PAGE_WRITECOPY: PROT_READ | PROT_WRITE,
+    MemoryProtection.PAGE_EXECUTE: PROT_EXEC,
+    MemoryProtection.PAGE_EXECUTE_READ: PROT_READ | PROT_EXEC,
+    MemoryProtection.PAGE_EXECUTE_READWRITE: PROT_READ | PROT_WRITE | PROT_EXEC,
+    MemoryProtection.PAGE_EXECUTE_WRITECOPY: PROT_READ | PROT_WRITE | PROT_EXEC,
+}
+
+
+class IOVEC(ctypes.Structure):
+    _fields_ = [('iov_base', ctypes.c_void_p),
+                ('iov_len', ctypes.c_size_t)]
+
+
+LPIOVEC = ctypes.POINTER(IOVEC)
+
+libc = ctypes.CDLL(None, use_errno=True)
+
+"""
+    ssize_t process_vm_readv(
+        pid_t pid,
+        const struct iovec *local_iov,
+        unsigned long liovcnt,
+        const struct iovec *remote_iov,
+        unsigned long riovcnt,
+        unsigned long flags
+    );
+"""
+libc.process_vm_readv.argtypes = [ctypes.c_int, LPIOVEC, ctypes.c_ulong, LPIOVEC, ctypes.c_ulong, ctypes.c_ulong]
+libc.process_vm_readv.restype = ctypes.c_ssize_t
+
+"""
+    ssize_t process_vm_writev(
+        pid_t pid,
+        const struct iovec *local_iov,
+        unsigned long liovcnt,
+        const struct iovec *remote_iov,
+        unsigned long riovcnt,
+        unsigned long flags
+    );
+"""
+libc.process_vm_writev.argtypes = [ctypes.c_int, LPIOVEC, ctypes.c_ulong, LPIOVEC, ctypes.c_ulong, ctypes.c_ulong]
+libc.process_vm_writev.restype = ctypes.c_ssize_t
+
+"""
+    void *mmap(void *addr, size_t length, int prot, int flags, int fd, off_t offset);
+"""
+libc.mmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_long]
+libc.mmap.restype = ctypes.c_void_p
+
+"""
+    int munmap(void *addr, size_t length);
+"""
+libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+libc.munmap.restype = ctypes.c_int
+
+"""
+    int mprotect(void *addr, size_t len, int prot);
+"""
+libc.mprotect.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int]
+libc.mprotect.restype = ctypes.c_int
+
+"""
+    int madvise(void *addr, size_t length, int advice);
+"""
+libc.madvise.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int]
+libc.madvise.restype = ctypes.c_int
+
+
+def _errno_exception(code: int = None) -> OSError:
+    if code is None:
+        code = ctypes.get_errno()
+
+    return OSError(code, os.strerror(code))
+
+
+def _prot_flags(protection: int) -> int:
+    """
+    Get the mmap/mprotect flags of a protection (its guard, no cache and write combine flags are ignored).
+    :param protection: the protection (see MemoryProtection)
+    :return: the PROT_* flags
+    """
+    prot_flags = _PROT_FLAGS.get(protection & ~_PROTECTION_FLAGS)
+    if prot_flags is None:
+        raise ValueError(f"Unsupported protection {protection:#x}: it has no Linux equivalent.")
+
+    return prot_flags
+
+
+def _parse_maps(content: bytes) -> List[Region]:
+    """
+    Turn a /proc/<pid>/maps file into a Windows-like region list, holes included as free regions.
+    Anonymous mappings are private memory, private file mappings are images (that's how ELF objects are loaded)
+    and shared file mappings are mapped views.
+    :param content: the file content
+    :return: the regions, by address
+    """
+    regions = []
+    previous_end = 0
+
+    for line in content.splitlines():
+        fields = line.split(None, 5)
+        if len(fields) < 5:
+            continue
+
+        start, end = (int(value, 16) for value in fields[0].split(b'-'))
+        permissions, inode = fields[1], int(fields[4])
+
+        if start > previous_end:
+            regions.append((previous_end, start - previous_end, MemoryState.MEM_FREE, MemoryProtection.PAGE_NOACCESS,
+                            0))
+
+        protection = _PROTECTIONS[permissions[0:1] == b'r', permissions[1:2] == b'w', permissions[2:3] == b'x']
+        if inode == 0 and permissions[3:4] == b'p':
+            memory_type = MemoryType.MEM_PRIVATE
+        elif permissions[3:4] == b'p':
+            memory_type = MemoryType.MEM_IMAGE
+        else:
+            memory_type = MemoryType.MEM_MAPPED
+
+        regions.append((start, end - start, MemoryState.MEM_COMMIT, protection, memory_type))
+        previous_end = end
+
+    return regions
+
+
+class LinuxMemoryBackend(MemoryBackend):
+    """
+    Memory access through process_vm_readv / process_vm_writev, falling back to /proc/<pid>/mem where they are
+    unavailable (old kernels, seccomp filters) and for writes to read-only pages.
+    Queries look up the last parsed /proc/<pid>/maps, it's parsed again by every region walk, by the allocations,
+    frees and protection changes of the backend, and once it's older than maps_ttl seconds.
+    NOTE: Allocating, freeing and changing the protection of memory is only possible in the current process.
+    """
+    __pid: int
+    __mem_fd: int
+    __mem_writable: bool
+    __use_mem: bool
+    __maps_ttl: float
+    __maps: tuple
+
+    @property
+    def pid(self) -> int:
+        """ The process ID. """
+        return self.__pid
+
+    @property
+    def maps_ttl(self) -> float:
+        """ Seconds a parsed /proc/<pid>/maps is reused by queries. """
+        return self.__maps_ttl
+
+    def __init__(self, pid: int, maps_ttl: float = DEFAULT_MAPS_TTL):
+        """
+        :param pid: the process ID
+        :param maps_ttl: seconds a parsed /proc/<pid>/maps is reused by queries (0 parses it on every query)
+        """
+        self.__pid = pid
+        self.__mem_fd = None
+        self.__mem_writable = False
+        self.__use_mem = False
+        self.__maps_ttl = maps_ttl
+        self.__maps = None
+
+    def __open_mem(self, writable: bool) -> int:
+        if self.__mem_fd is not None and (self.__mem_writable or not writable):
+            return self.__mem_fd
+
+        fd = os.open(f"/proc/{self.__pid}/mem", os.O_RDWR if writable else os.O_RDONLY)
+        if self.__mem_fd is not None:
+            os.close(self.__mem_fd)
+
+        self.__mem_fd, self.__mem_writable = fd, writable
+        return fd
+
+    def __ensure_current_process(self):
+        if self.__pid != os.getpid():
+            raise OSError(errno.EOPNOTSUPP, f"Allocating, freeing or protecting memory is unsupported on Linux for "
+                                            f"remote processes (process {self.__pid}).")
+
+    def read(self, address: int, size: int) -> bytes:
+        buffer = ctypes.create_string_buffer(size)
+
+        if not self.__use_mem:
+            local, remote = IOVEC(ctypes.addressof(buffer), size), IOVEC(address, size)
+            count = libc.process_vm_readv(self.__pid, ctypes.byref(local), 1, ctypes.byref(remote), 1, 0)
+            if count == size:
+                return buffer.raw
+
+            code = ctypes.get_errno() if count < 0 else errno.EFAULT
+            if code not in (errno.ENOSYS, errno.EPERM):
+                raise _errno_exception(code)
+
+            self.__use_mem = True
+
+        data = os.pread(self.__open_mem(False), size, address)
+        if len(data) != size:
+            raise _errno_exception(errno.EFAULT)
+
+        return data
+
+    def exception(self, code: int) -> OSError:
+        return _errno_exception(code)
+
+    def try_read_into(self, address: int, view: memoryview) -> int:
+        size = view.nbytes
+
+        if not self.__use_mem:
+            local, remote = IOVEC(buffer_address(view), size), IOVEC(address, size)
+            count = libc.process_vm_readv(self.__pid, ctypes.byref(local), 1, ctypes.byref(remote), 1, 0)
+            if count == size:
+                return 0
+
+            code = ctypes.get_errno() if count < 0 else errno.EFAULT
+            if code not in (errno.ENOSYS, errno.EPERM):
+                return code
+
+            self.__use_mem = True
+
+        try:
+            count = os.preadv(self.__open_mem(False), [view], address)
+        except OSError as exception:
+            return exception.errno
+
+        return 0 if count == size else errno.EFAULT
+
+    def read_into(self, address: int, view: memoryview):
+        code = self.try_read_into(address, view)
+        if code:
+            raise _errno_exception(code)
+
+    def read_into_partial(self, address: int, view: memoryview) -> int:
+        size = view.nbytes
+
+        if not self.__use_mem:
+            local, remote = IOVEC(buffer_address(view), size), IOVEC(address, size)
+            count = libc.process_vm_readv(self.__pid, ctypes.byref(local), 1, ctypes.byref(remote), 1, 0)
+            if count >= 0:
+                return count
+
+            code = ctypes.get_errno()
+            if code == errno.EFAULT:
+                return 0
+
+            if code not in (errno.ENOSYS, errno.EPERM):
+                raise _errno_exception(code)
+
+            self.__use_mem = True
+
+        try:
+            return os.preadv(self.__open_mem(False), [view], address)
+        except OSError as exception:
+            if exception.errno in (errno.EIO, errno.EFAULT):
+                return 0
+
+            raise
+
+    def read_ranges(self, ranges: List[Tuple[int, int]]) -> list:
+        """
+        Read many ranges with as few process_vm_readv calls as possible (up to IOV_MAX ranges per call).
+        A call stops at the first range it can't read: that range fails and the next call starts right after it.
+        :param ranges: the (address, size) ranges
+        :return: memoryview slices of a single buffer, None for the ranges that couldn't be read
+        """
+        offsets = [0]
+        for _, size in ranges:
+            offsets.append(offsets[-1] + size)
+
+        buffer = bytearray(offsets[-1])
+        view = memoryview(buffer)
+        base = ctypes.addressof((ctypes.c_char * len(buffer)).from_buffer(buffer)) if buffer else 0
+        results = [None] * len(ranges)
+
+        index = 0
+        while index < len(ranges) and not self.__use_mem:
+            batch = ranges[index:index + IOV_MAX]
+            local = IOVEC(base + offsets[index], offsets[index + len(batch)] - offsets[index])
+            remote = (IOVEC * len(batch))(*(IOVEC(address, size) for address, size in batch))
+
+            count = libc.process_vm_readv(self.__pid, ctypes.byref(local), 1, remote, len(batch), 0)
+            if count < 0:
+                code = ctypes.get_errno()
+                if code in (errno.ENOSYS, errno.EPERM):
+                    self.__use_mem = True
+                    break
+
+                # The first range of the batch failed
+                index += 1
+                continue
+
+            for address, size in batch:
+                if count < size:
+                    index += 1
+                    break
+
+                results[index] = view[offsets[index]:offsets[index + 1]]
+                count -= size
+                index += 1
+
+        for index in range(index, len(ranges)):
+            address, size = ranges[index]
+            try:
+                results[index] = self.read(address, size)
+            except OSError:
+                pass
+
+        return results
+
+    def write(self, address: int, data: bytes):
+        if not self.__use_mem:
+            buffer = ctypes.create_string_buffer(bytes(data), len(data))
+            local, remote = IOVEC(ctypes.addressof(buffer), len(data)), IOVEC(address, len(data))
+            if libc.process_vm_writev(self.__pid, ctypes.byref(local), 1, ctypes.byref(remote), 1, 0) == len(data):
+                return
+
+        # /proc/<pid>/mem writes go through read-only pages, like WriteProcessMemory does
+        if os.pwrite(self.__open_mem(True), data, address) != len(data):
+            raise _errno_exception(errno.EFAULT)
+
+    def __read_maps(self) -> tuple:
+        """
+        Parse /proc/<pid>/maps, the result is kept for the next queries.
+        A single attribute holds it, so that threads querying at the same time always see a consistent map.
+        :return: the (expiry, regions by address, region starts) tuple
+        """
+        with open(f"/proc/{self.__pid}/maps", 'rb') as file:
+            regions = _parse_maps(file.read())
+
+        self.__maps = maps = (time.monotonic() + self.__maps_ttl, regions, [region[0] for region in regions])
+        return maps
+
+    def query(self, address: int) -> Region:
+        maps = self.__maps
+        if maps is None or time.monotonic() >= maps[0]:
+            maps = self.__read_maps()
+
+        _, regions, starts = maps
+        index = bisect.bisect_right(starts, address) - 1
+        if index < 0 or address >= regions[index][0] + regions[index][1]:
+            # noinspection PyTypeChecker
+            return None
+
+        return regions[index]
+
+    def regions(self, start: int = 0, stop: int = None) -> Iterator[Region]:
+        for region in self.__read_maps()[1]:
+            if region[0] + region[1] <= start:
+                continue
+
+            if stop is not None and region[0] >= stop:
+                break
+
+            yield region
+
+    def protect(self, address: int, size: int, protection: int) -> int:
+        self.__ensure_current_process()
+        prot_flags = _prot_flags(protection)
+
+        region = self.query(address)
+        old_protection = MemoryProtection.PAGE_NOACCESS if region is None else region[3]
+
+        start = address - address % mmap.PAGESIZE
+        result = libc.mprotect(start, address + size - start, prot_flags)
+        self.__maps = None
+        if result:
+            raise _errno_exception()
+
+        return old_protection
+
+    def allocate(self, size: int, protection: int, allocation_type: int) -> int:
+        self.__ensure_current_process()
+
+        flags = MAP_PRIVATE | MAP_ANONYMOUS
+        if not allocation_type & MemoryAllocationType.MEM_COMMIT:
+            protection, flags = MemoryProtection.PAGE_NOACCESS, flags | MAP_NORESERVE
+
+        address = libc.mmap(None, size, _prot_flags(protection), flags, -1, 0)
+        self.__maps = None
+        if address is None or address == MAP_FAILED:
+            raise _errno_exception()
+
+        return address
+
+    def free(self, address: int, size: int, free_type: int):
+        self.__ensure_current_process()
+
+        if free_type & MemoryFreeType.MEM_DECOMMIT:
+            failed = libc.madvise(address, size, MADV_DONTNEED) or libc.mprotect(address, size, PROT_NONE)
+        else:
+            failed = libc.munmap(address, size)
+
+        self.__maps = None
+        if failed:
+            raise _errno_exception()
+
+    def close(self):
+        if self.__mem_fd is not None:
+            os.close(self.__mem_fd)
+            self.__mem_fd = None
+
+    def __str__(self) -> str:
+        return f"LinuxMemoryBackend(pid={self.__pid})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,105 @@
+import ctypes
+from ctypes.wintypes import DWORD
+
+from . import MemoryBackend, Region, buffer_address
+from ..native import Kernel32
+from ..native.exception import WinAPIException
+from ..native.structure import MEMORY_BASIC_INFORMATION
+from ..native.types import SIZE_T
+
+ERROR_INVALID_PARAMETER = 87
+ERROR_PARTIAL_COPY = 299
+ERROR_NOACCESS = 998
+
+
+class WindowsMemoryBackend(MemoryBackend):
+    # noinspection PyUnresolvedReferences
+    __process: "Process"
+
+    # noinspection PyUnresolvedReferences
+    @property
+    def process(self) -> "Process":
+        return self.__process
+
+    # noinspection PyUnresolvedReferences
+    def __init__(self, process: "Process"):
+        self.__process = process
+
+    def read(self, address: int, size: int) -> bytes:
+        buffer = ctypes.create_string_buffer(size)
+        if not Kernel32.ReadProcessMemory(self.__process.handle.native, address, buffer, size, None):
+            raise WinAPIException
+
+        return buffer.raw
+
+    def exception(self, code: int) -> OSError:
+        return WinAPIException(code)
+
+    def try_read_into(self, address: int, view: memoryview) -> int:
+        if not Kernel32.ReadProcessMemory(self.__process.handle.native, address, buffer_address(view), view.nbytes,
+                                          None):
+            return Kernel32.GetLastError()
+
+        return 0
+
+    def read_into(self, address: int, view: memoryview):
+        code = self.try_read_into(address, view)
+        if code:
+            raise WinAPIException(code)
+
+    def read_into_partial(self, address: int, view: memoryview) -> int:
+        count = SIZE_T()
+        if not Kernel32.ReadProcessMemory(self.__process.handle.native, address, buffer_address(view), view.nbytes,
+                                          ctypes.byref(count)):
+            code = Kernel32.GetLastError()
+            if code not in (ERROR_PARTIAL_COPY, ERROR_NOACCESS):
+                raise WinAPIException(code)
+
+        return count.value
+
+    def write(self, address: int, data: bytes):
+        if not Kernel32.WriteProcessMemory(self.__process.handle.native, address, data, len(data), None):
+            raise WinAPIException
+
+    def try_query(self, address: int) -> Region or int:
+        memory_info = MEMORY_BASIC_INFORMATION()
+        if not Kernel32.VirtualQueryEx(self.__process.handle.native, address, ctypes.pointer(memory_info),
+                                       ctypes.sizeof(MEMORY_BASIC_INFORMATION)):
+            code = Kernel32.GetLastError()
+            # noinspection PyTypeChecker
+            return None if code == ERROR_INVALID_PARAMETER else code
+
+        return (memory_info.BaseAddress or 0, memory_info.RegionSize, memory_info.State, memory_info.Protect,
+                memory_info.Type)
+
+    def query(self, address: int) -> Region:
+        region = self.try_query(address)
+        if isinstance(region, int):
+            raise WinAPIException(region)
+
+        return region
+
+    def protect(self, address: int, size: int, protection: int) -> int:
+        old_protection = DWORD()
+        if not Kernel32.VirtualProtectEx(self.__process.handle.native, address, size, protection,
+                                         ctypes.pointer(old_protection)):
+            raise WinAPIException
+
+        return old_protection.value
+
+    def allocate(self, size: int, protection: int, allocation_type: int) -> int:
+        address = Kernel32.VirtualAllocEx(self.__process.handle.native, None, size, allocation_type, protection)
+        if address is None:
+            raise WinAPIException
+
+        return address
+
+    def free(self, address: int, size: int, free_type: int):
+        if not Kernel32.VirtualFreeEx(self.__process.handle.native, address, size, free_type):
+            raise WinAPIException
+
+    def __str__(self) -> str:
+        return f"WindowsMemoryBackend(process={self.__process})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
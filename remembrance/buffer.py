@@ -0,0 +1,147 @@
+import contextlib
+import threading
+from typing import Dict, Iterator, List
+
+# Smallest size class (and size class granularity): a page
+MIN_BUFFER_SIZE = 1 << 12
+# Size classes between two powers of two, a buffer is at most 1 / SIZE_CLASS_STEPS larger than requested
+SIZE_CLASS_STEPS = 8
+# Bytes the idle buffers of a pool can keep at most
+DEFAULT_MAX_POOLED_BYTES = 256 << 20
+
+
+def _size_class(size: int) -> int:
+    """
+    Round a size up to its size class: a multiple of MIN_BUFFER_SIZE, with SIZE_CLASS_STEPS classes between two
+    powers of two (e.g. a 4MB chunk plus some overlap gets a 4.5MB buffer, not an 8MB one).
+    :param size: the requested size
+    :return: the size class
+    """
+    if size <= MIN_BUFFER_SIZE:
+        return MIN_BUFFER_SIZE
+
+    step = max(MIN_BUFFER_SIZE, (1 << (size - 1).bit_length()) // (2 * SIZE_CLASS_STEPS))
+    return (size + step - 1) // step * step
+
+
+class BufferPool:
+    """
+    Recycle the bytearrays used for native reads, instead of allocating a new one for each read.
+    Buffers are grouped in size classes (see SIZE_CLASS_STEPS), so a buffer can serve any request of its class.
+    Requests too large to ever be pooled get a buffer of their exact size.
+    It's thread safe.
+    """
+    __max_pooled_bytes: int
+    __free: Dict[int, List[bytearray]]
+    __pooled_bytes: int
+    __lock: threading.Lock
+    __allocations: int
+    __allocated_bytes: int
+    __reuses: int
+    __reused_bytes: int
+
+    @property
+    def max_pooled_bytes(self) -> int:
+        """ Bytes the idle buffers can keep at most, the released buffers past it are dropped. """
+        return self.__max_pooled_bytes
+
+    @property
+    def pooled_bytes(self) -> int:
+        """ Bytes kept by the idle buffers. """
+        return self.__pooled_bytes
+
+    @property
+    def allocations(self) -> int:
+        """ How many buffers were allocated. """
+        return self.__allocations
+
+    @property
+    def allocated_bytes(self) -> int:
+        """ How many bytes were allocated. """
+        return self.__allocated_bytes
+
+    @property
+    def reuses(self) -> int:
+        """ How many buffers were reused. """
+        return self.__reuses
+
+    @property
+    def reused_bytes(self) -> int:
+        """ How many bytes were reused instead of being allocated. """
+        return self.__reused_bytes
+
+    def __init__(self, max_pooled_bytes: int = DEFAULT_MAX_POOLED_BYTES):
+        self.__max_pooled_bytes = max_pooled_bytes
+        self.__free = {}
+        self.__pooled_bytes = 0
+        self.__lock = threading.Lock()
+        self.__allocations = self.__allocated_bytes = 0
+        self.__reuses = self.__reused_bytes = 0
+
+    def acquire(self, size: int) -> bytearray:
+        """
+        Get a buffer of at least some size, a recycled one if possible.
+        :param size: the minimum buffer size
+        :return: the buffer (its size is the size class, use a memoryview slice of it)
+        """
+        size_class = _size_class(size)
+        if size_class > self.__max_pooled_bytes:
+            size_class = size
+
+        with self.__lock:
+            buffers = self.__free.get(size_class)
+            if buffers:
+                self.__pooled_bytes -= size_class
+                self.__reuses += 1
+                self.__reused_bytes += size_class
+                return buffers.pop()
+
+            self.__allocations += 1
+            self.__allocated_bytes += size_class
+
+        return bytearray(size_class)
+
+    def release(self, buffer: bytearray):
+        """
+        Give a buffer back to the pool.
+        NOTE: The buffer (and any view of it) mustn't be used anymore, it's handed to the next acquire.
+        :param buffer: the buffer, as returned by BufferPool.acquire
+        """
+        size_class = len(buffer)
+        if size_class != _size_class(size_class):
+            return
+
+        with self.__lock:
+            if self.__pooled_bytes + size_class > self.__max_pooled_bytes:
+                return
+
+            self.__free.setdefault(size_class, []).append(buffer)
+            self.__pooled_bytes += size_class
+
+    @contextlib.contextmanager
+    def borrow(self, size: int) -> Iterator[memoryview]:
+        """
+        Borrow a buffer for the duration of a with block.
+        :param size: the buffer size
+        :return: a memoryview of exactly size bytes, released at the end of the block
+        """
+        buffer = self.acquire(size)
+        view = memoryview(buffer)
+        try:
+            yield view[:size]
+        finally:
+            view.release()
+            self.release(buffer)
+
+    def clear(self):
+        """ Drop the idle buffers. """
+        with self.__lock:
+            self.__free.clear()
+            self.__pooled_bytes = 0
+
+    def __str__(self) -> str:
+        return f"BufferPool(pooled_bytes={self.__pooled_bytes}, allocated_bytes={self.__allocated_bytes}, " \
+               f"reused_bytes={self.__reused_bytes})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,332 @@
+import bisect
+import mmap
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from .memory import Memory, MemoryFreeType, MemoryProtection
+
+DEFAULT_CACHE_SIZE = 64 << 20
+# Most pages read ahead at once, the read-ahead doubles on each sequential read up to it
+DEFAULT_MAX_READ_AHEAD = 64
+# Sequential reads in a row before reading ahead
+SEQUENTIAL_THRESHOLD = 2
+
+
+class CachedMemory:
+    """
+    A page cache in front of a Memory object, for analyses reading the same pages again and again.
+    Reads go through the cache (write-through writes keep it up to date), pages are evicted in LRU order
+    once the byte budget is reached, and sequential reads trigger an increasing read-ahead.
+    Cached data is only as fresh as the last invalidation: invalidate() bumps the generation and drops everything,
+    invalidate(address, size) drops a range. Volatile ranges are never cached.
+    It can be passed wherever a Memory object is read from, written to, freed or protected (e.g. MemoryArea): freeing
+    and protecting through it forget the cached pages of the range.
+    """
+    __memory: Memory
+    __page_size: int
+    __max_size: int
+    __max_read_ahead: int
+    __pages: OrderedDict
+    __generation: int
+    __volatile: List[Tuple[int, int]]
+    __lock: threading.RLock
+    __next_page: int
+    __sequential: int
+    __read_ahead: int
+    __hits: int
+    __misses: int
+    __evictions: int
+    __read_ahead_pages: int
+    __bypasses: int
+
+    @property
+    def memory(self) -> Memory:
+        """ The cached Memory object. """
+        return self.__memory
+
+    @property
+    def page_size(self) -> int:
+        """ The cache granularity. """
+        return self.__page_size
+
+    @property
+    def max_size(self) -> int:
+        """ The byte budget. """
+        return self.__max_size
+
+    @property
+    def size(self) -> int:
+        """ How many bytes are cached. """
+        return len(self.__pages) * self.__page_size
+
+    @property
+    def generation(self) -> int:
+        """ The cache generation, bumped by each global invalidation. """
+        return self.__generation
+
+    @property
+    def hits(self) -> int:
+        """ How many pages were read from the cache. """
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        """ How many pages were read from the memory because they weren't cached. """
+        return self.__misses
+
+    @property
+    def evictions(self) -> int:
+        """ How many pages were evicted to stay within the byte budget. """
+        return self.__evictions
+
+    @property
+    def read_ahead_pages(self) -> int:
+        """ How many pages were read ahead of sequential reads. """
+        return self.__read_ahead_pages
+
+    @property
+    def bypasses(self) -> int:
+        """ How many reads skipped the cache (volatile ranges, cache=False). """
+        return self.__bypasses
+
+    def __init__(self, memory: Memory, max_size: int = DEFAULT_CACHE_SIZE, page_size: int = mmap.PAGESIZE,
+                 max_read_ahead: int = DEFAULT_MAX_READ_AHEAD):
+        """
+        :param memory: the Memory object
+        :param max_size: the byte budget
+        :param page_size: the cache granularity (the system page size by default, reads never cross protections)
+        :param max_read_ahead: the most pages read ahead of sequential reads (0 disables the read-ahead)
+        """
+        self.__memory = memory
+        self.__max_size = max_size
+        self.__page_size = page_size
+        self.__max_read_ahead = max_read_ahead
+        self.__pages = OrderedDict()
+        self.__generation = 0
+        self.__volatile = []
+        self.__lock = threading.RLock()
+        self.__next_page = None
+        self.__sequential = 0
+        self.__read_ahead = 1
+        self.reset_statistics()
+
+    def reset_statistics(self):
+        """ Reset the hit, miss, eviction, read-ahead and bypass counters. """
+        self.__hits = self.__misses = self.__evictions = self.__read_ahead_pages = self.__bypasses = 0
+
+    def add_volatile(self, address: int, size: int):
+        """
+        Never cache a range (e.g. a frequently changing structure), reads overlapping it go to the memory.
+        :param address: the range address
+        :param size: the range size
+        """
+        with self.__lock:
+            bisect.insort(self.__volatile, (address, address + size))
+            self.__drop(address, size)
+
+    def remove_volatile(self, address: int, size: int):
+        """
+        Cache a range added with CachedMemory.add_volatile again.
+        :param address: the range address
+        :param size: the range size
+        """
+        with self.__lock:
+            self.__volatile.remove((address, address + size))
+
+    def __is_volatile(self, address: int, size: int) -> bool:
+        end = address + size
+        index = bisect.bisect_left(self.__volatile, (end,))
+        return any(start < end and address < stop for start, stop in self.__volatile[:index])
+
+    def invalidate(self, address: int = None, size: int = None):
+        """
+        Forget cached data.
+        :param address: the address of the range to forget (everything, bumping the generation, if None)
+        :param size: the size of the range to forget
+        """
+        with self.__lock:
+            if address is None:
+                self.__generation += 1
+                self.__pages.clear()
+                self.__next_page = None
+            else:
+                self.__drop(address, size)
+
+    def __drop(self, address: int, size: int):
+        first, last = address // self.__page_size, (address + size - 1) // self.__page_size
+        if last - first + 1 > len(self.__pages):
+            for page in [page for page in self.__pages if first <= page <= last]:
+                del self.__pages[page]
+        else:
+            for page in range(first, last + 1):
+                self.__pages.pop(page, None)
+
+    def __store(self, page: int, data: bytearray):
+        self.__pages[page] = data
+        self.__pages.move_to_end(page)
+
+        while len(self.__pages) * self.__page_size > self.__max_size:
+            self.__pages.popitem(last=False)
+            self.__evictions += 1
+
+    def __fetch(self, first: int, count: int, sequential: bool) -> List[bytearray]:
+        """
+        Read a run of missing pages (and the pages ahead of it, on sequential reads) into the cache.
+        The read-ahead doubles after each successful one. If the pages ahead can't be read (e.g. the end of a region),
+        only the requested pages are read and the read-ahead starts over.
+        :return: the requested pages
+        """
+        page_size = self.__page_size
+
+        read_ahead = 0
+        if sequential:
+            # Pages read ahead mustn't evict the pages being read
+            read_ahead = min(self.__read_ahead, max(0, self.__max_size // page_size - count) // 2)
+
+        for extra in ((read_ahead, 0) if read_ahead else (0,)):
+            buffer = bytearray((count + extra) * page_size)
+            code = self.__memory.try_read_into(first * page_size, buffer)
+            if code:
+                if extra:
+                    self.__read_ahead = 1
+                    continue
+                raise self.__memory.backend.exception(code)
+
+            pages = [buffer[index * page_size:(index + 1) * page_size] for index in range(count + extra)]
+            if extra:
+                self.__read_ahead_pages += extra
+                self.__read_ahead = min(self.__read_ahead * 2, self.__max_read_ahead)
+            for index, data in enumerate(pages):
+                if index < count or first + index not in self.__pages:
+                    self.__store(first + index, data)
+
+            return pages[:count]
+
+    def __update_sequential(self, first: int, last: int) -> bool:
+        """
+        Track sequential reads (each one starting where the previous one ended).
+        :return: if the pages ahead should be read too
+        """
+        if self.__next_page is not None and self.__next_page - 1 <= first <= self.__next_page:
+            self.__sequential += 1
+        else:
+            self.__sequential, self.__read_ahead = 0, 1
+
+        self.__next_page = last + 1
+        return self.__max_read_ahead > 0 and self.__sequential >= SEQUENTIAL_THRESHOLD
+
+    def read(self, address: int, size: int, cache: bool = True) -> bytes:
+        """
+        Read some data, from the cache when possible.
+        :param address: the address to read from
+        :param size: how many bytes to read
+        :param cache: if the cache can be used (False reads straight from the memory)
+        :return: the read data
+        """
+        if not cache or not size or self.__is_volatile(address, size):
+            with self.__lock:
+                self.__bypasses += 1
+            return self.__memory.read(address, size)
+
+        page_size = self.__page_size
+        first, last = address // page_size, (address + size - 1) // page_size
+
+        with self.__lock:
+            sequential = self.__update_sequential(first, last)
+
+            # The pages are kept aside as they are found, a large read may evict its own first pages
+            pages, page = [], first
+            while page <= last:
+                cached = self.__pages.get(page)
+                if cached is not None:
+                    self.__pages.move_to_end(page)
+                    self.__hits += 1
+                    pages.append(cached)
+                    page += 1
+                    continue
+
+                run = page
+                while page <= last and page not in self.__pages:
+                    page += 1
+
+                self.__misses += page - run
+                pages.extend(self.__fetch(run, page - run, sequential and page > last))
+
+        start = address - first * page_size
+        if len(pages) == 1:
+            return bytes(pages[0][start:start + size])
+
+        return b''.join(pages)[start:start + size]
+
+    def read_into(self, address: int, buffer, offset: int = 0, size: int = None, cache: bool = True) -> int:
+        """
+        Read some data into a buffer, from the cache when possible.
+        NOTE: For more details, look at Memory.read_into documentation.
+        :param address: the address to read from
+        :param buffer: the writable buffer
+        :param offset: the buffer offset to write at, in bytes
+        :param size: how many bytes to read (up to the end of the buffer if None)
+        :param cache: if the cache can be used (False reads straight from the memory)
+        :return: how many bytes were read
+        """
+        view = memoryview(buffer).cast('B')
+        if size is None:
+            size = view.nbytes - offset
+
+        if not cache or self.__is_volatile(address, size):
+            with self.__lock:
+                self.__bypasses += 1
+            return self.__memory.read_into(address, buffer, offset, size)
+
+        view[offset:offset + size] = self.read(address, size)
+        return size
+
+    def write(self, address: int, data: bytes):
+        """
+        Write some data into the memory, updating the cached pages it overlaps.
+        :param address: the address to write to
+        :param data: the data to write
+        """
+        self.__memory.write(address, data)
+
+        page_size, size = self.__page_size, len(data)
+        with self.__lock:
+            for page in range(address // page_size, (address + size - 1) // page_size + 1):
+                cached = self.__pages.get(page)
+                if cached is None:
+                    continue
+
+                start, stop = max(address, page * page_size), min(address + size, (page + 1) * page_size)
+                cached[start - page * page_size:stop - page * page_size] = data[start - address:stop - address]
+
+    def free(self, address: int, size: int, free_type: MemoryFreeType):
+        """
+        Free some previously allocated memory, forgetting its cached pages.
+        :param address: the memory address
+        :param size: the memory size
+        :param free_type: the free type
+        """
+        with self.__lock:
+            self.__memory.free(address, size, free_type)
+            self.__drop(address, size)
+
+    def protect(self, address: int, size: int, protection: MemoryProtection) -> MemoryProtection:
+        """
+        Change the protection of some allocated memory, forgetting its cached pages (they may not be readable anymore).
+        :param address: the memory address
+        :param size: the memory size
+        :param protection: the new protection
+        :return: the old protection
+        """
+        with self.__lock:
+            old_protection = self.__memory.protect(address, size, protection)
+            self.__drop(address, size)
+            return old_protection
+
+    def __str__(self) -> str:
+        return f"CachedMemory(memory={self.__memory}, size={self.size}, max_size={self.__max_size}, " \
+               f"hits={self.__hits}, misses={self.__misses}, evictions={self.__evictions})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -20,3 +20,11 @@ class ModuleException(Exception):
 
 class ModuleNotFoundException(ModuleException):
     ...
+
+
+class SignatureException(Exception):
+    ...
+
+
+class PatternException(Exception):
+    ...
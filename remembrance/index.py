@@ -0,0 +1,310 @@
+import math
+import struct
+import zlib
+from typing import Iterable
+
+from .pattern import Pattern, PatternExpression, _as_buffer
+from .vector import MaskedMatcher, as_array, load_numpy
+
+INDEX_MAGIC = b'RMBRSFX\0'
+INDEX_VERSION = 1
+DEFAULT_MAX_LCP = 256
+
+# magic, version, buffer size, buffer CRC32, base address, maximum LCP
+_HEADER = struct.Struct('<8sIQIQI')
+# Largest buffer whose (rank, following rank) pairs fit in a single int64 sort key (about 3GB),
+# larger ones are sorted on both keys
+_MAX_PACKED_SIZE = math.isqrt(1 << 63) - 1
+
+
+def _build_suffix_array(array):
+    """
+    Sort the suffixes of a buffer by prefix doubling: ranks of prefixes of size k give ranks of prefixes of size 2k.
+    :param array: the uint8 array
+    :return: the suffix array, as an int64 array
+    """
+    numpy = load_numpy()
+
+    size = len(array)
+    if size == 0:
+        return numpy.empty(0, dtype=numpy.int64)
+
+    # Start from the first 3 bytes of each suffix: 9 bits per byte, 0 meaning "past the end"
+    key = numpy.zeros(size, dtype=numpy.int64)
+    for index in range(3):
+        column = numpy.zeros(size, dtype=numpy.int64)
+        column[:size - index] = array[index:].astype(numpy.int64) + 1
+        key = (key << 9) | column
+
+    prefix = 3
+    keys = (key,)
+    while True:
+        # numpy.lexsort sorts on its last key first
+        suffixes = numpy.argsort(keys[0], kind='stable') if len(keys) == 1 else numpy.lexsort(keys[::-1])
+
+        changes = numpy.zeros(size - 1, dtype=bool)
+        for key in keys:
+            sorted_key = key[suffixes]
+            changes |= sorted_key[1:] != sorted_key[:-1]
+
+        rank = numpy.empty(size, dtype=numpy.int64)
+        rank[suffixes] = numpy.concatenate(([0], numpy.cumsum(changes)))
+        if rank[suffixes[-1]] == size - 1 or prefix >= size:
+            return suffixes
+
+        following = numpy.zeros(size, dtype=numpy.int64)
+        following[:size - prefix] = rank[prefix:] + 1
+        keys = (rank * (size + 1) + following,) if size <= _MAX_PACKED_SIZE else (rank, following)
+        prefix *= 2
+
+
+def _build_lcp(array, suffixes, max_lcp: int):
+    """
+    Compute the longest common prefix of each suffix and the previous one in the suffix array, up to max_lcp.
+    All the neighbour pairs are compared one byte column at a time, dropping the pairs that already differ.
+    :param array: the uint8 array
+    :param suffixes: the suffix array
+    :param max_lcp: the longest prefix worth measuring
+    :return: the LCP array (lcp[0] is 0), as an uint32 array
+    """
+    numpy = load_numpy()
+
+    size = len(array)
+    lcp = numpy.zeros(size, dtype=numpy.uint32)
+    if size < 2:
+        return lcp
+
+    pairs = numpy.arange(1, size)
+    left, right = suffixes[:-1].copy(), suffixes[1:].copy()
+    for column in range(max_lcp):
+        valid = (left + column < size) & (right + column < size)
+        pairs, left, right = pairs[valid], left[valid], right[valid]
+
+        equal = array[left + column] == array[right + column]
+        pairs, left, right = pairs[equal], left[equal], right[equal]
+        if not len(pairs):
+            break
+
+        lcp[pairs] += 1
+
+    return lcp
+
+
+class SuffixIndex:
+    __data: bytes
+    __base_address: int
+    __suffixes: object
+    __lcp: object
+    __max_lcp: int
+    __ranks: object
+
+    @property
+    def data(self) -> bytes:
+        """ The indexed buffer. """
+        return self.__data
+
+    @property
+    def base_address(self) -> int:
+        """ The address the buffer was read from. """
+        return self.__base_address
+
+    @property
+    def suffixes(self):
+        """ The suffix array (the buffer offsets, by suffix order). """
+        return self.__suffixes
+
+    @property
+    def lcp(self):
+        """ The longest common prefix of each suffix and the previous one, capped to max_lcp. """
+        return self.__lcp
+
+    @property
+    def max_lcp(self) -> int:
+        """ The cap of the LCP array. """
+        return self.__max_lcp
+
+    def __init__(self, data: bytes, suffixes, lcp, max_lcp: int, base_address: int = 0):
+        self.__data = data
+        self.__suffixes = suffixes
+        self.__lcp = lcp
+        self.__max_lcp = max_lcp
+        self.__base_address = base_address
+        self.__ranks = None
+
+    @staticmethod
+    def build(data, base_address: int = 0, max_lcp: int = DEFAULT_MAX_LCP) -> "SuffixIndex":
+        """
+        Index a buffer (e.g. a module image or a memory snapshot).
+        :param data: the buffer
+        :param base_address: the address the buffer was read from
+        :param max_lcp: the LCP array cap (signatures longer than that are never needed)
+        :return: the index
+        """
+        data = bytes(_as_buffer(data))
+        array = as_array(data)
+
+        suffixes = _build_suffix_array(array)
+        lcp = _build_lcp(array, suffixes, max_lcp)
+
+        return SuffixIndex(data, suffixes, lcp, max_lcp, base_address)
+
+    def save(self, path: str):
+        """
+        Write the suffix and LCP arrays to a file (the buffer itself isn't written).
+        :param path: the index file path
+        """
+        numpy = load_numpy()
+
+        with open(path, 'wb') as file:
+            file.write(_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(self.__data), zlib.crc32(self.__data),
+                                    self.__base_address, self.__max_lcp))
+            file.write(numpy.ascontiguousarray(self.__suffixes, dtype='<i8').tobytes())
+            file.write(numpy.ascontiguousarray(self.__lcp, dtype='<u4').tobytes())
+
+    @staticmethod
+    def load(path: str, data) -> "SuffixIndex":
+        """
+        Load an index written by SuffixIndex.save, memory mapping its arrays.
+        :param path: the index file path
+        :param data: the indexed buffer, it must be the same one the index was built from
+        :return: the index
+        """
+        numpy = load_numpy()
+
+        data = bytes(_as_buffer(data))
+        with open(path, 'rb') as file:
+            header = file.read(_HEADER.size)
+
+        if len(header) != _HEADER.size:
+            raise ValueError(f"\"{path}\" is not a suffix index.")
+
+        magic, version, size, crc, base_address, max_lcp = _HEADER.unpack(header)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"\"{path}\" is not a version {INDEX_VERSION} suffix index.")
+
+        if size != len(data) or crc != zlib.crc32(data):
+            raise ValueError(f"\"{path}\" wasn't built from this buffer.")
+
+        suffixes = numpy.memmap(path, dtype='<i8', mode='r', offset=_HEADER.size, shape=(size,))
+        lcp = numpy.memmap(path, dtype='<u4', mode='r', offset=_HEADER.size + 8 * size, shape=(size,))
+        return SuffixIndex(data, suffixes, lcp, max_lcp, base_address)
+
+    def __bounds(self, needle: bytes) -> (int, int):
+        """
+        Binary search the suffixes starting with some bytes.
+        :param needle: the bytes
+        :return: the [start, stop) range of the suffix array
+        """
+        data, suffixes, size = self.__data, self.__suffixes, len(needle)
+
+        low, high = 0, len(suffixes)
+        while low < high:
+            middle = (low + high) // 2
+            suffix = int(suffixes[middle])
+            if data[suffix:suffix + size] < needle:
+                low = middle + 1
+            else:
+                high = middle
+
+        start, high = low, len(suffixes)
+        while low < high:
+            middle = (low + high) // 2
+            suffix = int(suffixes[middle])
+            if data[suffix:suffix + size] <= needle:
+                low = middle + 1
+            else:
+                high = middle
+
+        return start, low
+
+    def locate(self, pattern: Pattern or PatternExpression or bytes):
+        """
+        Find every offset a pattern matches at.
+        The pattern anchor (or the bytes) is binary searched in the suffix array, then the candidates are verified
+        all at once. Patterns without any fully known byte, and expressions, fall back to a linear scan.
+        :param pattern: the pattern, or some literal bytes
+        :return: the sorted matching offsets, as an int64 array
+        """
+        numpy = load_numpy()
+
+        if isinstance(pattern, (bytes, bytearray)):
+            start, stop = self.__bounds(bytes(pattern))
+            return numpy.sort(numpy.asarray(self.__suffixes[start:stop], dtype=numpy.int64))
+
+        if isinstance(pattern, PatternExpression) or pattern.anchor is None:
+            return numpy.asarray(pattern.match_all(self.__data), dtype=numpy.int64)
+
+        start, stop = self.__bounds(pattern.anchor)
+        offsets = numpy.asarray(self.__suffixes[start:stop], dtype=numpy.int64) - pattern.anchor_offset
+        offsets = offsets[(offsets >= 0) & (offsets <= len(self.__data) - pattern.size)]
+
+        matcher = MaskedMatcher(pattern.pattern.to_bytes(pattern.size, pattern.byteorder),
+                                pattern.mask.to_bytes(pattern.size, pattern.byteorder))
+        return numpy.sort(matcher.verify(as_array(self.__data), offsets))
+
+    def count(self, pattern: Pattern or PatternExpression or bytes) -> int:
+        """
+        Count the offsets a pattern matches at.
+        NOTE: Literal bytes are counted straight from the suffix array bounds.
+        :param pattern: the pattern, or some literal bytes
+        :return: the match count
+        """
+        if isinstance(pattern, (bytes, bytearray)):
+            start, stop = self.__bounds(bytes(pattern))
+            return stop - start
+
+        return len(self.locate(pattern))
+
+    def unique_signature(self, address: int, volatile: Iterable[int] = (), max_size: int = 64) -> str:
+        """
+        Build the shortest signature matching only at some address.
+        The bytes that may change between builds (displacements, absolute addresses...) can be turned into
+        wildcards. Without any, the size is read straight from the LCP array.
+        :param address: the address the signature must match at
+        :param volatile: the offsets (relative to the address) of the bytes to turn into wildcards
+        :param max_size: the longest acceptable signature
+        :return: the signature (e.g. "48 8B 05 ?? ?? ?? ?? 48 85 C0"), None if no unique one fits in max_size bytes
+        """
+        numpy = load_numpy()
+
+        offset = address - self.__base_address
+        if not 0 <= offset < len(self.__data):
+            raise ValueError(f"{address:#x} isn't inside the indexed buffer.")
+
+        if self.__ranks is None:
+            self.__ranks = numpy.empty(len(self.__suffixes), dtype=numpy.int64)
+            self.__ranks[self.__suffixes] = numpy.arange(len(self.__suffixes))
+
+        # Without wildcards, the suffix is told apart from its neighbours one byte after their common prefix
+        rank = int(self.__ranks[offset])
+        shared = int(self.__lcp[rank])
+        if rank + 1 < len(self.__lcp):
+            shared = max(shared, int(self.__lcp[rank + 1]))
+
+        if shared >= self.__max_lcp:
+            return None
+
+        volatile = set(volatile)
+        maximum = min(max_size, len(self.__data) - offset)
+        for size in range(shared + 1, maximum + 1):
+            if size - 1 in volatile:
+                continue
+
+            text = ' '.join('??' if index in volatile else f"{self.__data[offset + index]:02X}"
+                            for index in range(size))
+            pattern = Pattern.compile(text)
+            if pattern.anchor is not None and self.count(pattern) == 1:
+                return text
+
+        # noinspection PyTypeChecker
+        return None
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def __str__(self) -> str:
+        return f"SuffixIndex(base_address={self.__base_address:#x}, size={len(self.__data)}, " \
+               f"max_lcp={self.__max_lcp})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
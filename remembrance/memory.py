@@ -1,11 +1,37 @@
-import ctypes
+import bisect
+import collections
 import enum
-from ctypes.wintypes import DWORD
-
-from .native import Kernel32
-from .native.exception import WinAPIException
-from .native.structure import MEMORY_BASIC_INFORMATION
-from .pattern import Pattern
+import errno
+import functools
+import itertools
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from array import array
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+from .backend import MemoryBackend, default_backend, writable_view
+from .buffer import BufferPool
+from .pattern import Pattern, PatternExpression
+from .strings import DEFAULT_MAX_STRING_LENGTH, RemoteString, find_terminator, unit_size
+from .vector import load_numpy
+
+# Bytes read for nothing between two ranges of Memory.read_many before it stops merging them
+DEFAULT_COALESCE_GAP = 1024
+# Largest merged read of Memory.read_many
+DEFAULT_MAX_MERGED_SIZE = 1 << 20
+# Bytes Memory.scan reads at once (plus the pattern size - 1 bytes of overlap with the next chunk)
+DEFAULT_SCAN_CHUNK_SIZE = 4 << 20
+# Bytes Memory.scan_parallel keeps in its chunk buffers at most
+DEFAULT_MAX_IN_FLIGHT = 64 << 20
+# Seconds a range found unreadable is skipped without trying to read it again
+DEFAULT_UNREADABLE_TTL = 5.0
+# Struct formats Memory.read_struct keeps compiled
+STRUCT_CACHE_SIZE = 256
 
 
 class MemoryAllocationType(enum.IntEnum):
@@ -19,6 +45,103 @@ class MemoryAllocationType(enum.IntEnum):
     MEM_TOP_DOWN = 0x00100000
 
 
+def _coalesce(ranges: List[Tuple[int, int]], gap: int, max_size: int) -> List[Tuple[int, int, list]]:
+    """
+    Merge the ranges closer than some gap.
+    :param ranges: the (address, size) ranges
+    :param gap: the largest gap between two merged ranges
+    :param max_size: the largest merged range size (single ranges larger than it are left as they are)
+    :return: the (address, size, range indexes) merged ranges
+    """
+    merged = []
+    for index in sorted(range(len(ranges)), key=lambda position: ranges[position][0]):
+        address, size = ranges[index]
+        if merged:
+            start, merged_size, indexes = merged[-1]
+            end = max(start + merged_size, address + size)
+            if address <= start + merged_size + gap and end - start <= max_size:
+                merged[-1] = (start, end - start, indexes)
+                indexes.append(index)
+                continue
+
+        merged.append((address, size, [index]))
+
+    return merged
+
+
+def _match_chunk(pattern: Pattern or PatternExpression, data, limit: int,
+                 overlapped: bool = True) -> (array, array):
+    """
+    Find the hits of a chunk, the ones starting in its overlap with the next chunk excluded.
+    It's a module-level function so that it can run in a process pool.
+    :param pattern: the pattern
+    :param data: the chunk data
+    :param limit: the chunk size without its overlap
+    :param overlapped: if a hit can start inside the previous one (if not, the hit ends are needed)
+    :return: the hit offsets, and the hit ends (see Pattern.match_end) if not overlapped
+    """
+    offsets = pattern.match_all(data)
+    del offsets[bisect.bisect_left(offsets, limit):]
+
+    ends = array('Q')
+    if not overlapped:
+        ends.extend(pattern.match_end(data, offset) for offset in offsets)
+
+    return offsets, ends
+
+
+@functools.lru_cache(maxsize=STRUCT_CACHE_SIZE)
+def _compile_struct(fmt: str) -> struct.Struct:
+    """
+    Compile a struct format once.
+    :param fmt: the struct format
+    :return: the Struct object
+    """
+    return struct.Struct(fmt)
+
+
+def _buffer_slice(buffer, offset: int, size: int) -> memoryview:
+    """
+    View the part of a writable buffer a read must fill.
+    :param buffer: the writable buffer
+    :param offset: the buffer offset to write at, in bytes
+    :param size: how many bytes to read (up to the end of the buffer if None)
+    :return: the byte memoryview
+    """
+    view = writable_view(buffer)
+    if size is None:
+        size = view.nbytes - offset
+
+    if offset < 0 or size < 0 or offset + size > view.nbytes:
+        raise ValueError(f"{size} bytes don't fit at offset {offset} of a {view.nbytes} bytes buffer.")
+
+    return view[offset:offset + size]
+
+
+def _overlaps(holes: List[Tuple[int, int]], start: int, end: int) -> bool:
+    """
+    Tell if a range overlaps a hole.
+    :param holes: the (start, end) holes, sorted and not overlapping
+    :param start: the range start
+    :param end: the range end
+    :return: if the range overlaps any hole
+    """
+    index = bisect.bisect_left(holes, (end,))
+    return index > 0 and holes[index - 1][1] > start
+
+
+class MemoryState(enum.IntEnum):
+    MEM_COMMIT = 0x00001000
+    MEM_RESERVE = 0x00002000
+    MEM_FREE = 0x00010000
+
+
+class MemoryType(enum.IntEnum):
+    MEM_PRIVATE = 0x00020000
+    MEM_MAPPED = 0x00040000
+    MEM_IMAGE = 0x01000000
+
+
 class MemoryProtection(enum.IntEnum):
     PAGE_EXECUTE = 0x10
     PAGE_EXECUTE_READ = 0x20
@@ -111,15 +234,57 @@ class MemoryArea:
 class Memory:
     # noinspection PyUnresolvedReferences
     __process: "Process"
+    __backend: MemoryBackend
+    __buffer_pool: BufferPool
+    # noinspection PyUnresolvedReferences
+    __regions: "RegionTable"
+    __unreadable_ttl: float
+    __unreadable: List[Tuple[int, int, float]]
+    __unreadable_lock: threading.Lock
 
     # noinspection PyUnresolvedReferences
     @property
     def process(self) -> "Process":
         return self.__process
 
+    @property
+    def backend(self) -> MemoryBackend:
+        """ The native memory access implementation. """
+        return self.__backend
+
+    @property
+    def buffer_pool(self) -> BufferPool:
+        """ The pool of the buffers used by reads and scans (see its allocation and reuse counters). """
+        return self.__buffer_pool
+
+    @property
+    def unreadable_ttl(self) -> float:
+        """ Seconds a range found unreadable is skipped without trying to read it again. """
+        return self.__unreadable_ttl
+
+    @property
+    def unreadable(self) -> List[Tuple[int, int]]:
+        """ The (start, end) ranges currently known to be unreadable, by address. """
+        now = time.monotonic()
+        with self.__unreadable_lock:
+            return [(start, end) for start, end, expiry in self.__unreadable if expiry > now]
+
     # noinspection PyUnresolvedReferences
-    def __init__(self, process: "Process"):
+    def __init__(self, process: "Process" or int = None, backend: MemoryBackend = None,
+                 buffer_pool: BufferPool = None, unreadable_ttl: float = DEFAULT_UNREADABLE_TTL):
+        """
+        :param process: the Process object (Windows) or the process ID (Linux, the current process if None)
+        :param backend: the memory backend (the running platform one, see backend.default_backend, if None)
+        :param buffer_pool: the buffer pool (a new one if None), it can be shared between Memory objects
+        :param unreadable_ttl: seconds a range found unreadable is skipped by partial reads and scans (0 disables it)
+        """
         self.__process = process
+        self.__backend = default_backend(process) if backend is None else backend
+        self.__buffer_pool = BufferPool() if buffer_pool is None else buffer_pool
+        self.__regions = None
+        self.__unreadable_ttl = unreadable_ttl
+        self.__unreadable = []
+        self.__unreadable_lock = threading.Lock()
 
     def write(self, address: int, data: bytes):
         """
@@ -127,21 +292,397 @@ class Memory:
         :param address: the address to write to
         :param data: the data to write
         """
-        if not Kernel32.WriteProcessMemory(self.__process.handle.native, address, data, len(data), None):
-            raise WinAPIException
+        self.__backend.write(address, data)
 
-    def read(self, address: int, size: int) -> bytes:
+    def read(self, address: int, size: int, partial: bool = False) -> bytes or Tuple[bytes, List[Tuple[int, int]]]:
         """
         Read some data from the memory.
+        By default, the read fails if any byte can't be read. A partial read reads whatever it can instead:
+        it's split where the reads stop (region boundaries, guard pages...), the bytes that can't be read are zeroed
+        and reported as holes. The holes are remembered for unreadable_ttl seconds, later partial reads and scans
+        skip them without any native call.
         :param address: the address to read from
         :param size: how many bytes to read
-        :return: the read data
+        :param partial: if the bytes that can be read must be returned even if others can't
+        :return: the read data, or a (read data, (start, end) holes by address) tuple for partial reads
         """
-        buffer = ctypes.create_string_buffer(size)
-        if not Kernel32.ReadProcessMemory(self.__process.handle.native, address, buffer, size, None):
-            raise WinAPIException
+        with self.__buffer_pool.borrow(size) as view:
+            if not partial:
+                code = self.__backend.try_read_into(address, view)
+                if code:
+                    raise self.__backend.exception(code)
 
-        return buffer.raw
+                return bytes(view)
+
+            holes = self.__read_tolerant(address, view)
+            return bytes(view), holes
+
+    def try_read(self, address: int, size: int) -> bytes:
+        """
+        Read some data from the memory, without raising on failure (no exception is built at all).
+        :param address: the address to read from
+        :param size: how many bytes to read
+        :return: the read data, None if it can't be read
+        """
+        with self.__buffer_pool.borrow(size) as view:
+            if self.__backend.try_read_into(address, view):
+                # noinspection PyTypeChecker
+                return None
+
+            return bytes(view)
+
+    def __known_unreadable(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """
+        Get the known unreadable ranges within a range (dropping the expired ones on the way).
+        :return: the (start, end) holes, clipped to the range
+        """
+        if not self.__unreadable:
+            return []
+
+        now, holes = time.monotonic(), []
+        with self.__unreadable_lock:
+            index = max(bisect.bisect_left(self.__unreadable, (start,)) - 1, 0)
+            while index < len(self.__unreadable) and self.__unreadable[index][0] < end:
+                hole_start, hole_end, expiry = self.__unreadable[index]
+                if expiry <= now:
+                    del self.__unreadable[index]
+                    continue
+
+                if hole_end > start:
+                    holes.append((max(hole_start, start), min(hole_end, end)))
+                index += 1
+
+        return holes
+
+    def __add_unreadable(self, start: int, end: int):
+        """ Remember an unreadable range, merging it with the known ranges it overlaps. """
+        if self.__unreadable_ttl <= 0:
+            return
+
+        expiry = time.monotonic() + self.__unreadable_ttl
+        with self.__unreadable_lock:
+            first = last = bisect.bisect_left(self.__unreadable, (start,))
+            if first > 0 and self.__unreadable[first - 1][1] >= start:
+                first -= 1
+            while last < len(self.__unreadable) and self.__unreadable[last][0] <= end:
+                last += 1
+
+            if first < last:
+                start, end = min(start, self.__unreadable[first][0]), max(end, self.__unreadable[last - 1][1])
+            self.__unreadable[first:last] = [(start, end, expiry)]
+
+    def forget_unreadable(self):
+        """ Forget the ranges found unreadable, the next reads try them again. """
+        with self.__unreadable_lock:
+            self.__unreadable.clear()
+
+    def __failure_end(self, address: int) -> int:
+        """
+        Find where the unreadable range starting at an address ends: the end of its region if it can't be read,
+        None if the region can be read (e.g. a read stopped in the middle of it).
+        """
+        from .region import is_readable
+
+        region = self.__backend.try_query(address)
+        if not isinstance(region, tuple) or not region[1]:
+            return (address // mmap.PAGESIZE + 1) * mmap.PAGESIZE
+
+        # noinspection PyTypeChecker
+        return None if is_readable(region) else region[0] + region[1]
+
+    def __read_partial(self, address: int, view: memoryview) -> List[Tuple[int, int]]:
+        """
+        Read whatever can be read of a range, splitting it where the reads stop.
+        :return: the (start, end) holes, by address (their bytes are zeroed)
+        """
+        end = address + view.nbytes
+        holes, position = [], address
+
+        for hole_start, hole_end in self.__known_unreadable(address, end) + [(end, end)]:
+            while position < hole_start:
+                position += self.__backend.read_into_partial(position, view[position - address:hole_start - address])
+                if position >= hole_start:
+                    break
+
+                failure_end = self.__failure_end(position)
+                if failure_end is None:
+                    # The region is readable, only the page the read stopped at may not be: retry it alone
+                    failure_end = (position // mmap.PAGESIZE + 1) * mmap.PAGESIZE
+                    page_end = min(failure_end, hole_start)
+                    count = self.__backend.read_into_partial(position, view[position - address:page_end - address])
+                    if position + count == page_end:
+                        position = page_end
+                        continue
+
+                    position += count
+
+                self.__add_unreadable(position, failure_end)
+                failure_end = min(failure_end, hole_start)
+                holes.append((position, failure_end))
+                position = failure_end
+
+            if hole_start < hole_end:
+                holes.append((hole_start, hole_end))
+                position = hole_end
+
+        merged = []
+        for hole_start, hole_end in holes:
+            view[hole_start - address:hole_end - address] = bytes(hole_end - hole_start)
+            if merged and merged[-1][1] == hole_start:
+                merged[-1] = (merged[-1][0], hole_end)
+            else:
+                merged.append((hole_start, hole_end))
+
+        return merged
+
+    def __read_tolerant(self, address: int, view: memoryview) -> List[Tuple[int, int]]:
+        """
+        Read a range, as a single read if it isn't known to have holes, as a partial read otherwise.
+        :return: the (start, end) holes, by address (their bytes are zeroed)
+        """
+        if not self.__known_unreadable(address, address + view.nbytes) and \
+                not self.__backend.try_read_into(address, view):
+            return []
+
+        return self.__read_partial(address, view)
+
+    def read_into(self, address: int, buffer, offset: int = 0, size: int = None) -> int:
+        """
+        Read some data from the memory straight into a buffer, without any intermediate copy.
+        :param address: the address to read from
+        :param buffer: the writable buffer (bytearray, memoryview, mmap, NumPy array...)
+        :param offset: the buffer offset to write at, in bytes
+        :param size: how many bytes to read (up to the end of the buffer if None)
+        :return: how many bytes were read
+        """
+        view = _buffer_slice(buffer, offset, size)
+        code = self.__backend.try_read_into(address, view)
+        if code:
+            raise self.__backend.exception(code)
+
+        return view.nbytes
+
+    def try_read_into(self, address: int, buffer, offset: int = 0, size: int = None) -> int:
+        """
+        Read some data from the memory straight into a buffer, without raising on failure.
+        NOTE: For more details, look at Memory.read_into documentation.
+        :param address: the address to read from
+        :param buffer: the writable buffer (bytearray, memoryview, mmap, NumPy array...)
+        :param offset: the buffer offset to write at, in bytes
+        :param size: how many bytes to read (up to the end of the buffer if None)
+        :return: 0 on success, the error code otherwise (see MemoryBackend.exception)
+        """
+        return self.__backend.try_read_into(address, _buffer_slice(buffer, offset, size))
+
+    def read_many(self, ranges: List[Tuple[int, int]], gap: int = DEFAULT_COALESCE_GAP,
+                  max_size: int = DEFAULT_MAX_MERGED_SIZE) -> List[memoryview]:
+        """
+        Read many (usually small) ranges at once.
+        Ranges closer than the gap are merged into a single read, and the merged reads are issued together
+        (as vectored reads when the backend supports them). A merged read that fails is split back into its ranges,
+        so that only the unreadable ranges fail.
+        :param ranges: the (address, size) ranges
+        :param gap: the largest gap between two merged ranges (the gap bytes are read for nothing)
+        :param max_size: the largest merged read size
+        :return: the read data of each range, as memoryview slices of the merged reads (None if it couldn't be read)
+        """
+        merged = _coalesce(ranges, gap, max_size)
+        results = [None] * len(ranges)
+
+        retries = []
+        for (start, _, indexes), data in zip(merged, self.__backend.read_ranges([(start, size)
+                                                                                 for start, size, _ in merged])):
+            if data is None:
+                retries.extend(indexes if len(indexes) > 1 else ())
+                continue
+
+            view = memoryview(data)
+            for index in indexes:
+                address, size = ranges[index]
+                results[index] = view[address - start:address - start + size]
+
+        if retries:
+            for index, data in zip(retries, self.__backend.read_ranges([ranges[index] for index in retries])):
+                results[index] = None if data is None else memoryview(data)
+
+        return results
+
+    def read_array(self, address: int, dtype, count: int or Tuple[int, ...]):
+        """
+        Read an array of values straight into a new NumPy array (no intermediate bytes object).
+        :param address: the address of the first value
+        :param dtype: the NumPy value type (e.g. numpy.float32, '<u8', a structured dtype...)
+        :param count: how many values to read (or the array shape)
+        :return: the NumPy array
+        """
+        numpy = load_numpy()
+
+        values = numpy.empty(count, dtype=dtype)
+        if values.nbytes:
+            self.read_into(address, values)
+
+        return values
+
+    def read_struct(self, address: int, fmt: str or struct.Struct) -> tuple:
+        """
+        Read and unpack a structure, the formats are compiled once (see STRUCT_CACHE_SIZE).
+        :param address: the structure address
+        :param fmt: the struct format (or a Struct object)
+        :return: the unpacked values
+        """
+        if not isinstance(fmt, struct.Struct):
+            fmt = _compile_struct(fmt)
+
+        with self.__buffer_pool.borrow(fmt.size) as view:
+            self.read_into(address, view)
+            return fmt.unpack(view)
+
+    def read_scalars(self, addresses, dtype, default=None, gap: int = DEFAULT_COALESCE_GAP):
+        """
+        Read many scattered values of a single type, with as few native calls as possible (see Memory.read_many).
+        :param addresses: the value addresses
+        :param dtype: the NumPy value type
+        :param default: the value of the addresses that can't be read (they raise if None)
+        :param gap: the largest gap between two values read together
+        :return: the NumPy array of the values, in the addresses order
+        """
+        numpy = load_numpy()
+
+        dtype = numpy.dtype(dtype)
+        ranges = [(int(address), dtype.itemsize) for address in addresses]
+        views = self.read_many(ranges, gap, max(DEFAULT_MAX_MERGED_SIZE, dtype.itemsize))
+
+        filler = None
+        if default is not None:
+            filler = numpy.array(default, dtype=dtype).tobytes()
+        else:
+            for (address, size), view in zip(ranges, views):
+                if view is None:
+                    self.__raise_read_error(address, size)
+
+        data = b''.join(filler if view is None else view for view in views)
+        return numpy.frombuffer(data, dtype=dtype).copy() if data else numpy.empty(0, dtype=dtype)
+
+    def __raise_read_error(self, address: int, size: int):
+        """ Read a range that couldn't be read again, alone, to raise its own error. """
+        with self.__buffer_pool.borrow(size) as buffer:
+            code = self.__backend.try_read_into(address, buffer)
+
+        raise self.__backend.exception(code or errno.EFAULT)
+
+    def read_strings(self, pointers: Iterable[int], encoding: str = 'utf-8',
+                     max_len: int = DEFAULT_MAX_STRING_LENGTH) -> List[RemoteString]:
+        """
+        Read many NUL terminated strings at once.
+        The strings are read page by page: the pages are shared by the strings they hold (each page is read once)
+        and read together (see Memory.read_many), then each string goes on to its next page only if its terminator
+        wasn't found yet. The strings are decoded only when their text is used.
+        :param pointers: the string addresses (null pointers are allowed)
+        :param encoding: the string encoding (UTF-16 and UTF-32 strings end with a 2 or 4 bytes terminator)
+        :param max_len: how many characters to read at most (code units, for multi-byte encodings)
+        :return: the strings without their terminator, None for null pointers and strings that can't be read
+                 (a string stopping at an unreadable page ends there)
+        """
+        unit, page_size = unit_size(encoding), mmap.PAGESIZE
+        pointers = [int(pointer) for pointer in pointers]
+        results = [None] * len(pointers)
+
+        # Each string goes on with the next page, and the code unit it left unfinished on the previous one
+        # (a string isn't always aligned on its code unit size, so its terminator may straddle two pages)
+        pages = {}
+        pending = [(index, pointer, pointer // page_size, [], b'') for index, pointer in enumerate(pointers)
+                   if pointer]
+        while pending:
+            missing = sorted({page for _, _, page, _, _ in pending}.difference(pages))
+            for page, view in zip(missing, self.read_many([(page * page_size, page_size) for page in missing])):
+                pages[page] = None if view is None else bytes(view)
+
+            next_pending = []
+            for index, address, page, pieces, carry in pending:
+                data = pages[page]
+                if data is None:
+                    if pieces or carry:
+                        results[index] = RemoteString(b''.join(pieces) + carry, address, encoding)
+                    continue
+
+                base = page * page_size - len(carry)
+                data = carry + data if carry else data
+                start, limit = max(address - base, 0), address + max_len * unit - base
+                end = find_terminator(data, start, min(limit, len(data)), unit, address - base)
+                if end == -1 and limit > len(data):
+                    unfinished = (base + len(data) - address) % unit
+                    pieces.append(data[start:len(data) - unfinished])
+                    next_pending.append((index, address, page + 1, pieces, data[len(data) - unfinished:]))
+                    continue
+
+                pieces.append(data[start:limit if end == -1 else end])
+                results[index] = RemoteString(b''.join(pieces), address, encoding)
+
+            pending = next_pending
+
+        return results
+
+    def read_cstring(self, address: int, max_len: int = DEFAULT_MAX_STRING_LENGTH,
+                     encoding: str = 'utf-8') -> RemoteString:
+        """
+        Read a NUL terminated string, page by page until its terminator (or max_len characters).
+        NOTE: For more details, look at Memory.read_strings documentation.
+        :param address: the string address
+        :param max_len: how many characters to read at most
+        :param encoding: the string encoding
+        :return: the string without its terminator
+        """
+        string = self.read_strings((address,), encoding, max_len)[0]
+        if string is None:
+            self.__raise_read_error(address, 1)
+
+        return string
+
+    def read_wstring(self, address: int, max_len: int = DEFAULT_MAX_STRING_LENGTH,
+                     encoding: str = 'utf-16-le') -> RemoteString:
+        """
+        Read a wide (UTF-16 by default) string, page by page until its 2 bytes terminator (or max_len characters).
+        NOTE: For more details, look at Memory.read_strings documentation.
+        :param address: the string address
+        :param max_len: how many characters to read at most
+        :param encoding: the string encoding
+        :return: the string without its terminator
+        """
+        return self.read_cstring(address, max_len, encoding)
+
+    def write_array(self, address: int, values):
+        """
+        Write an array of values.
+        :param address: the address of the first value
+        :param values: the NumPy array (or anything numpy.ascontiguousarray accepts)
+        """
+        numpy = load_numpy()
+
+        self.write(address, numpy.ascontiguousarray(values).tobytes())
+
+    def write_scalars(self, addresses, values, dtype):
+        """
+        Write many scattered values of a single type, the values at consecutive addresses in a single write.
+        :param addresses: the value addresses
+        :param values: the values (a single value is written at every address)
+        :param dtype: the NumPy value type
+        """
+        numpy = load_numpy()
+
+        dtype = numpy.dtype(dtype)
+        addresses = numpy.asarray(addresses, dtype=numpy.uint64)
+        values = numpy.broadcast_to(numpy.asarray(values, dtype=dtype), addresses.shape)
+
+        order = numpy.argsort(addresses, kind='stable')
+        addresses, data = addresses[order].tolist(), numpy.ascontiguousarray(values[order]).tobytes()
+
+        size, start = dtype.itemsize, 0
+        for index in range(1, len(addresses) + 1):
+            if index < len(addresses) and addresses[index] == addresses[index - 1] + size:
+                continue
+
+            self.write(addresses[start], data[start * size:index * size])
+            start = index
 
     def allocate(self, size: int, protection: MemoryProtection,
                  allocation_type: MemoryAllocationType = MemoryAllocationType.MEM_COMMIT) -> int:
@@ -152,10 +693,9 @@ class Memory:
         :param allocation_type: the allocation type
         :return: the address of the newly allocated memory
         """
-        address = Kernel32.VirtualAllocEx(self.__process.handle.native, None, size, allocation_type, protection)
-        if address is None:
-            raise WinAPIException
-
+        address = self.__backend.allocate(size, protection, allocation_type)
+        self.__regions = None
+        self.forget_unreadable()
         return address
 
     def allocate_area(self, size: int, protection: MemoryProtection, *args, **kwargs) -> MemoryArea:
@@ -175,8 +715,9 @@ class Memory:
         :param size: the memory size
         :param free_type: the free type
         """
-        if not Kernel32.VirtualFreeEx(self.__process.handle.native, address, size, free_type):
-            raise WinAPIException
+        self.__backend.free(address, size, free_type)
+        self.__regions = None
+        self.forget_unreadable()
 
     def protect(self, address: int, size: int, protection: MemoryProtection) -> MemoryProtection:
         """
@@ -186,44 +727,294 @@ class Memory:
         :param protection: the new protection
         :return: the old protection
         """
-        old_protection = DWORD()
-        if not Kernel32.VirtualProtectEx(self.__process.handle.native, address, size, protection,
-                                         ctypes.pointer(old_protection)):
-            raise WinAPIException
+        old_protection = self.__backend.protect(address, size, protection)
+        self.__regions = None
+        self.forget_unreadable()
+        return MemoryProtection(old_protection)
 
-        return MemoryProtection(old_protection.value)
+    def query(self, address: int) -> tuple:
+        """
+        Get the region containing an address.
+        :param address: the address
+        :return: the (base address, size, state, protection, type) tuple, None past the end of the address space
+        """
+        region = self.__backend.try_query(address)
+        if isinstance(region, int):
+            raise self.__backend.exception(region)
 
-    def scan(self, pattern: Pattern, address: int, size: int) -> int:
-        memory_info = MEMORY_BASIC_INFORMATION()
+        return region
 
-        if not Kernel32.VirtualQueryEx(self.process.handle.native, address, ctypes.pointer(memory_info),
-                                       ctypes.sizeof(MEMORY_BASIC_INFORMATION)):
-            raise WinAPIException
+    def try_query(self, address: int) -> tuple or int:
+        """
+        Get the region containing an address, without raising on failure.
+        :param address: the address
+        :return: the (base address, size, state, protection, type) tuple, None past the end of the address space,
+                 the error code if it can't be queried (see MemoryBackend.exception)
+        """
+        return self.__backend.try_query(address)
 
-        current = address
-        while current < address + size:
-            if not Kernel32.VirtualQueryEx(self.process.handle.native, current,
-                                           ctypes.pointer(memory_info), ctypes.sizeof(MEMORY_BASIC_INFORMATION)):
-                continue
+    # noinspection PyUnresolvedReferences
+    def regions(self, refresh: bool = False) -> "RegionTable":
+        """
+        Get the region map of the address space, walked once and cached.
+        The cached map is dropped by Memory.allocate, Memory.free and Memory.protect. Changes made by the process
+        itself (or by other Memory objects) are only seen after a refresh.
+        :param refresh: if the address space must be walked again
+        :return: the RegionTable object
+        """
+        from .region import RegionTable
 
-            if memory_info.State != MemoryAllocationType.MEM_COMMIT or (memory_info.Protect ==
-                                                                        MemoryProtection.PAGE_NOACCESS):
-                continue
+        if refresh or self.__regions is None:
+            self.__regions = RegionTable.build(self.__backend.regions())
 
-            old_protection = self.protect(memory_info.BaseAddress, memory_info.RegionSize,
-                                          MemoryProtection.PAGE_EXECUTE_READWRITE)
+        return self.__regions
 
-            buffer = self.read(memory_info.BaseAddress, memory_info.RegionSize)
-            self.protect(memory_info.BaseAddress, memory_info.RegionSize, old_protection)
+    def __read_chunks(self, chunks: List[Tuple[int, int]], buffers: queue.Queue, ready: queue.Queue,
+                      stopped: threading.Event):
+        """
+        Read chunks one after the other into the free buffers (the prefetch thread of Memory.iter_chunks).
+        Each read chunk is handed over as a (buffer, address, size) tuple, followed by a None end marker
+        (or by the exception that stopped the reads).
+        """
+        try:
+            for position, read_size in chunks:
+                buffer = buffers.get()
+                if stopped.is_set():
+                    return
 
-            offset = pattern.match(buffer)
-            if offset is not None:
-                return offset
+                if self.__backend.try_read_into(position, memoryview(buffer)[:read_size]):
+                    buffers.put(buffer)
+                    continue
 
-            current += memory_info.RegionSize
+                ready.put((buffer, position, read_size))
+
+            ready.put(None)
+        except BaseException as exception:
+            ready.put(exception)
+
+    def iter_chunks(self, filter: Callable[[tuple], bool] = None, address: int = 0, size: int = None,
+                    chunk_size: int = DEFAULT_SCAN_CHUNK_SIZE, overlap: int = 0, prefetch: bool = True,
+                    refresh: bool = True) -> Iterator[Tuple[int, memoryview]]:
+        """
+        Read the committed readable memory chunk by chunk.
+        Adjacent regions are read as a single range, in chunks of chunk_size bytes followed by the overlap first bytes
+        of the next chunk (clipped at the end of the range). Chunks that can't be read anymore are skipped.
+        With prefetch, a background thread reads the next chunk into a second buffer while the current one is
+        processed: the two buffers are recycled for the whole iteration.
+        NOTE: A chunk view is only valid until the next one is requested, copy the data to keep it.
+        :param filter: a function telling if a (base address, size, state, protection, type) region must be read
+        :param address: the address to start from
+        :param size: how many bytes to read (up to the end of the address space if None)
+        :param chunk_size: how many bytes each chunk has (without its overlap)
+        :param overlap: how many bytes of the next chunk each chunk ends with
+        :param prefetch: if the next chunk must be read in the background (only the current one is read otherwise)
+        :param refresh: if the region map must be walked again first (see Memory.regions)
+        :return: an iterator of (chunk address, chunk view) tuples, in ascending order
+        """
+        from .region import RegionTable
+
+        stop = None if size is None else address + size
+        table = self.regions(refresh).readable(address, stop)
+        if filter is not None:
+            table = RegionTable.build(region for region in table if filter(region))
+
+        chunks = [(position, min(position + chunk_size + overlap, run_end) - position)
+                  for run_start, run_end in table.runs(address, stop)
+                  for position in range(run_start, run_end, chunk_size)]
+        if not chunks:
+            return
+
+        buffer_size = max(read_size for _, read_size in chunks)
+        if not prefetch:
+            with self.__buffer_pool.borrow(buffer_size) as buffer:
+                for position, read_size in chunks:
+                    view = buffer[:read_size]
+                    if not self.__backend.try_read_into(position, view):
+                        yield position, view
+
+            return
+
+        buffers, ready, stopped = queue.Queue(), queue.Queue(), threading.Event()
+        owned = [self.__buffer_pool.acquire(buffer_size) for _ in range(2)]
+        for buffer in owned:
+            buffers.put(buffer)
+
+        reader = threading.Thread(target=self.__read_chunks, args=(chunks, buffers, ready, stopped), daemon=True)
+        reader.start()
+        try:
+            while True:
+                item = ready.get()
+                if item is None:
+                    break
+
+                if isinstance(item, BaseException):
+                    raise item
+
+                buffer, position, read_size = item
+                yield position, memoryview(buffer)[:read_size]
+                buffers.put(buffer)
+        finally:
+            stopped.set()
+            buffers.put(None)
+            reader.join()
+            for buffer in owned:
+                self.__buffer_pool.release(buffer)
+
+    def scan(self, pattern: Pattern or PatternExpression, address: int = 0, size: int = None,
+             chunk_size: int = DEFAULT_SCAN_CHUNK_SIZE, first_only: bool = False, overlapped: bool = True,
+             refresh: bool = True) -> Iterator[int]:
+        """
+        Find every address a pattern matches at.
+        Only the committed readable regions are read (their protection is never changed), adjacent ones as a single
+        range, in chunks of chunk_size bytes overlapping by the pattern size - 1 bytes: hits crossing a chunk (or
+        region) boundary are found, and the memory used stays the same whatever the regions size is.
+        Chunks that can't be fully read anymore (e.g. freed in the meantime) are read partially (see Memory.read),
+        the hits overlapping their holes are dropped.
+        :param pattern: the pattern
+        :param address: the address to start from
+        :param size: how many bytes to scan (up to the end of the address space if None)
+        :param chunk_size: how many bytes to read at once
+        :param first_only: if the scan must stop on the first hit
+        :param overlapped: if a hit can start inside the previous one
+        :param refresh: if the region map must be walked again first (see Memory.regions)
+        :return: an iterator of hit addresses, in ascending order
+        """
+        overlap = max(pattern.size - 1, 0)
+        stop = None if size is None else address + size
+        next_address = 0
+
+        for run_start, run_end in self.regions(refresh).readable(address, stop).runs(address, stop):
+            with self.__buffer_pool.borrow(min(chunk_size + overlap, run_end - run_start)) as buffer:
+                for position in range(run_start, run_end, chunk_size):
+                    view = buffer[:min(position + chunk_size + overlap, run_end) - position]
+                    holes = self.__read_tolerant(position, view)
+                    if holes == [(position, position + view.nbytes)]:
+                        continue
+
+                    # Hits starting in the overlap belong to the next chunk
+                    for offset in pattern.finditer(view):
+                        if offset >= chunk_size:
+                            break
+
+                        if position + offset < next_address:
+                            continue
+
+                        if holes and _overlaps(holes, position + offset, position + offset + max(pattern.size, 1)):
+                            continue
+
+                        yield position + offset
+                        if first_only:
+                            return
+
+                        if not overlapped:
+                            next_address = position + pattern.match_end(view, offset)
+
+    def scan_chunk(self, pattern: Pattern or PatternExpression, position: int, size: int, limit: int = None,
+                   overlapped: bool = True, match_executor: Executor = None) -> (array, array):
+        """
+        Read and match a single scan chunk, the building block of the concurrent scans.
+        The chunk is read partially (see Memory.read), the hits overlapping its holes are dropped.
+        :param pattern: the pattern
+        :param position: the chunk address
+        :param size: the chunk size, its overlap with the next chunk included
+        :param limit: the chunk size without its overlap (hits starting past it are left to the next chunk)
+        :param overlapped: if a hit can start inside the previous one (if not, the hit ends are needed)
+        :param match_executor: the executor matching the chunk (e.g. a ProcessPoolExecutor), this thread if None
+        :return: the hit offsets (relative to the chunk address), and the hit ends if not overlapped
+        """
+        if limit is None:
+            limit = size
+
+        with self.__buffer_pool.borrow(size) as view:
+            holes = self.__read_tolerant(position, view)
+            if holes == [(position, position + size)]:
+                return array('Q'), array('Q')
+
+            if match_executor is None:
+                offsets, ends = _match_chunk(pattern, view, limit, overlapped)
+            else:
+                data = bytes(view)
+
+        if match_executor is not None:
+            offsets, ends = match_executor.submit(_match_chunk, pattern, data, limit, overlapped).result()
+
+        if holes:
+            hit_size = max(pattern.size, 1)
+            kept = [index for index, offset in enumerate(offsets)
+                    if not _overlaps(holes, position + offset, position + offset + hit_size)]
+            offsets = array('Q', (offsets[index] for index in kept))
+            if not overlapped:
+                ends = array('Q', (ends[index] for index in kept))
+
+        return offsets, ends
+
+    def scan_parallel(self, pattern: Pattern or PatternExpression, address: int = 0, size: int = None,
+                      workers: int = None, chunk_size: int = DEFAULT_SCAN_CHUNK_SIZE,
+                      max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, first_only: bool = False, overlapped: bool = True,
+                      refresh: bool = True, match_executor: Executor = None) -> Iterator[int]:
+        """
+        Find every address a pattern matches at, reading and matching chunks on a thread pool.
+        Native reads release the GIL, so they overlap with each other and with the matching. The matching itself
+        runs in parallel as far as the matcher releases the GIL (NumPy based matchers do, the regex engine doesn't):
+        pure Python matchers can be sent to a process pool instead (the chunks are then copied to it).
+        The chunks are the same as Memory.scan ones, and the hits are yielded in address order.
+        NOTE: For more details, look at Memory.scan documentation.
+        :param pattern: the pattern
+        :param address: the address to start from
+        :param size: how many bytes to scan (up to the end of the address space if None)
+        :param workers: how many threads read and match chunks (os.cpu_count() if None)
+        :param chunk_size: how many bytes each task reads
+        :param max_in_flight: how many bytes the chunks being read or matched can take at most
+        :param first_only: if the scan must stop on the first hit
+        :param overlapped: if a hit can start inside the previous one
+        :param refresh: if the region map must be walked again first (see Memory.regions)
+        :param match_executor: the executor matching the chunks (e.g. a ProcessPoolExecutor), the threads if None
+        :return: an iterator of hit addresses, in ascending order
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        overlap = max(pattern.size - 1, 0)
+        stop = None if size is None else address + size
+        max_tasks = max(1, max_in_flight // (chunk_size + overlap))
+        next_address = 0
+
+        chunks = ((position, min(position + chunk_size + overlap, run_end) - position)
+                  for run_start, run_end in self.regions(refresh).readable(address, stop).runs(address, stop)
+                  for position in range(run_start, run_end, chunk_size))
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            # The tasks are consumed in submission (address) order, so the outstanding ones are at most max_tasks
+            tasks = collections.deque()
+            for position, read_size in itertools.chain(chunks, ((None, 0),) * max_tasks):
+                if position is not None:
+                    tasks.append((position, executor.submit(self.scan_chunk, pattern, position, read_size,
+                                                            chunk_size, overlapped, match_executor)))
+                if not tasks or (len(tasks) < max_tasks and position is not None):
+                    continue
+
+                task_position, task = tasks.popleft()
+                offsets, ends = task.result()
+                for index, offset in enumerate(offsets):
+                    if task_position + offset < next_address:
+                        continue
+
+                    yield task_position + offset
+                    if first_only:
+                        return
+
+                    if not overlapped:
+                        next_address = task_position + ends[index]
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def close(self):
+        """ Close the memory backend (the process is left open). """
+        self.__backend.close()
 
     def __str__(self) -> str:
-        return f"Memory(process={self.__process})"
+        return f"Memory(process={self.__process}, backend={self.__backend})"
 
     def __repr__(self) -> str:
         return self.__str__()
@@ -13,26 +13,75 @@ class NativeException(Exception):
 
 
 class WinAPIException(NativeException, OSError):
+    """
+    A failed Windows API call.
+    The message is only formatted when it's read (str, strerror...), so building the exception stays cheap
+    for callers that only check the code.
+    """
+    __code: int
+    __message: str
+
     def __init__(self, code: int = None, message: str = None):
         if code is None:
             code = Kernel32.GetLastError()
 
-        if message is None:
-            message = ctypes.FormatError(code).strip()  # Yoinked from ctypes WinError
+        super().__init__(None, None, None, code)  # Yoinked from ctypes WinError
+        self.__code = code
+        self.__message = message
+
+    @property
+    def code(self) -> int:
+        """ The Windows error code. """
+        return self.__code
+
+    @property
+    def strerror(self) -> str:
+        """ The error message, formatted on first use. """
+        if self.__message is None:
+            self.__message = ctypes.FormatError(self.__code).strip()  # Yoinked from ctypes WinError
+
+        return self.__message
 
-        super().__init__(None, message, None, code)  # Yoinked from ctypes as well
+    @strerror.setter
+    def strerror(self, message: str):
+        self.__message = message
+
+    def __str__(self) -> str:
+        return f"[WinError {self.__code}] {self.strerror}"
 
 
 class NTSTATUSException(NativeException):
+    """
+    A failed native API call.
+    The message is only looked up when it's read (str, message...).
+    """
     STATUS_CODES = defaultdict(list)
+    __code: int
+    __message: str
 
     def __init__(self, code: int, message: str = None):
         code = ctypes.c_ulong(code).value
 
-        if message is None:
-            message = self.STATUS_CODES[code][DEFAULT_NTSTATUS_CHOICE]
+        super().__init__(code)
+        self.__code = code
+        self.__message = message
+
+    @property
+    def code(self) -> int:
+        """ The NTSTATUS code. """
+        return self.__code
+
+    @property
+    def message(self) -> str:
+        """ The status description, looked up on first use. """
+        if self.__message is None:
+            descriptions = self.STATUS_CODES.get(self.__code)
+            self.__message = descriptions[DEFAULT_NTSTATUS_CHOICE] if descriptions else "Unknown status"
+
+        return self.__message
 
-        super().__init__(f"[NTSTATUS {code:#x}] {message}.")
+    def __str__(self) -> str:
+        return f"[NTSTATUS {self.__code:#x}] {self.message}."
 
     @classmethod
     def register(cls, code: int, _name: str, description: str):
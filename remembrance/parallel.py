@@ -0,0 +1,134 @@
+import bisect
+import multiprocessing
+import os
+from array import array
+from multiprocessing.shared_memory import SharedMemory
+
+from .pattern import Pattern, PatternExpression
+
+DEFAULT_CHUNK_SIZE = 16 << 20
+
+# Buffer inherited by forked workers (set only while a forked pool is being created)
+_inherited_buffer = None
+# Buffer of the current worker process: the inherited one or an attached SharedMemory
+_worker_buffer = None
+_worker_shared_memory = None
+
+
+def _attach(name: str) -> SharedMemory:
+    """
+    Attach to a shared memory block created by the parent process.
+    NOTE: Workers share the parent resource tracker, registering the block again there is harmless.
+    :param name: the shared memory block name
+    :return: the shared memory block
+    """
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        return SharedMemory(name=name)
+
+
+def _initialize_worker(shared_memory_name: str, size: int):
+    global _worker_buffer, _worker_shared_memory
+
+    if shared_memory_name is None:
+        _worker_buffer = _inherited_buffer
+    else:
+        _worker_shared_memory = _attach(shared_memory_name)
+        _worker_buffer = _worker_shared_memory.buf[:size]
+
+
+def _match_chunk(arguments: tuple) -> (array, array):
+    pattern, start, stop, overlap, overlapped = arguments
+
+    view = memoryview(_worker_buffer)
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+
+    # The chunk is extended by size - 1 bytes so that matches crossing the seam are found,
+    # only the ones starting before the seam are kept (the next chunk reports the others)
+    chunk = view[start:min(stop + overlap, len(view))]
+    offsets = pattern.match_all(chunk)
+    del offsets[bisect.bisect_left(offsets, stop - start):]
+
+    # Without overlap, the parent process needs where each hit ends to know where the next one may start
+    chunk_ends = array('Q')
+    if not overlapped:
+        chunk_ends.extend(start + pattern.match_end(chunk, offset) for offset in offsets)
+
+    chunk_offsets = array('Q')
+    chunk_offsets.extend(start + offset for offset in offsets)
+    return chunk_offsets, chunk_ends
+
+
+def match_all_parallel(pattern: Pattern or PatternExpression, data, workers: int = None,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE, overlapped: bool = True, max_hits: int = None,
+                       start_method: str = None) -> array:
+    """
+    Find every offset a pattern matches at, splitting the buffer across a pool of processes.
+    The buffer isn't pickled: forked workers inherit it (bytes, bytearray, mmap...), a SharedMemory block is used
+    as is, and anything else is copied once into a SharedMemory block.
+    Buffers too small to be split into two chunks are matched in this process.
+    :param pattern: the pattern
+    :param data: the data to check (any buffer object, or a SharedMemory block)
+    :param workers: how many processes to use (os.cpu_count() if None)
+    :param chunk_size: how many candidate offsets each task covers
+    :param overlapped: if a match can start inside the previous one
+    :param max_hits: how many offsets to return at most (all of them if None)
+    :param start_method: the multiprocessing start method ("fork" where available, "spawn" otherwise, if None)
+    :return: the matching offsets in ascending order, without duplicates at the chunk seams
+    """
+    global _inherited_buffer
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    shared_memory = data if isinstance(data, SharedMemory) else None
+    buffer = shared_memory.buf if shared_memory is not None else data
+    size = shared_memory.size if shared_memory is not None else memoryview(data).nbytes
+
+    if workers <= 1 or size < 2 * chunk_size:
+        view = memoryview(buffer)
+        return pattern.match_all(view[:size] if view.format == 'B' and view.ndim == 1 else view.cast('B')[:size],
+                                 overlapped, max_hits)
+
+    if start_method is None:
+        start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+    context = multiprocessing.get_context(start_method)
+
+    created_shared_memory = None
+    if shared_memory is None and start_method != 'fork':
+        created_shared_memory = shared_memory = SharedMemory(create=True, size=size)
+        shared_memory.buf[:size] = memoryview(data).cast('B')
+
+    tasks = [(pattern, start, min(start + chunk_size, size), max(pattern.size - 1, 0), overlapped)
+             for start in range(0, size, chunk_size)]
+
+    offsets = array('Q')
+    try:
+        _inherited_buffer = buffer if shared_memory is None else None
+        pool = context.Pool(min(workers, len(tasks)), initializer=_initialize_worker,
+                            initargs=(None if shared_memory is None else shared_memory.name, size))
+        _inherited_buffer = None
+
+        with pool:
+            next_offset = 0
+            for chunk_offsets, chunk_ends in pool.imap(_match_chunk, tasks):
+                if overlapped:
+                    offsets.extend(chunk_offsets)
+                else:
+                    for offset, end in zip(chunk_offsets, chunk_ends):
+                        if offset >= next_offset:
+                            offsets.append(offset)
+                            next_offset = end
+
+                if max_hits is not None and len(offsets) >= max_hits:
+                    del offsets[max_hits:]
+                    break
+    finally:
+        _inherited_buffer = None
+        if created_shared_memory is not None:
+            created_shared_memory.close()
+            created_shared_memory.unlink()
+
+    return offsets
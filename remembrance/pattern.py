@@ -1,10 +1,144 @@
+import enum
+import mmap
 import re
+from array import array
+from typing import Dict, Iterator, List, Tuple
+
+from .exception import PatternException
+from .vector import DEFAULT_BLOCK_SIZE, GramFilter, MaskedMatcher, as_array, as_offsets, gather_fields, load_numpy, \
+    numpy_available
+
+# Bytes that show up everywhere in x86 code and data (padding, prefixes, common opcodes).
+# They make poor anchors because bytes.find stops on them all the time.
+_COMMON_BYTES = frozenset(b'\x00\xff\xcc\x90\x0f\x48\x49\x4c\x8b\x89\x8d\x83\x85\xc0\xe8\x24\x01\x20')
+_MAX_ANCHOR_SIZE = 16
+
+# Slices of the data sampled to find the rarest q-gram of each PatternSet pattern, and their size
+_GRAM_SAMPLES = 16
+_GRAM_SAMPLE_SIZE = 4096
+# PatternSet patterns whose q-gram is at more than 1/64 of the offsets of a block are matched on their own there
+_MAX_CANDIDATE_SHARE = 64
+
+# Characters that switch Pattern.compile to the extended syntax (jumps, alternations and byte ranges)
+_EXTENDED_CHARACTERS = frozenset('[](){}|')
+# How many ways an expression may match from a single position (product of the jump widths and alternations)
+# for it to be matched by the regex engine: its backtracking then takes a few steps per byte at most.
+# More complex expressions are matched by the linear matcher (see _linear_starts) instead.
+MAX_EXPRESSION_COMPLEXITY = 64
+
+
+class PatternStrategy(enum.Enum):
+    LITERAL = 'literal'
+    REGEX = 'regex'
+    ANCHOR = 'anchor'
+    VECTOR = 'vector'
+    REFERENCE = 'reference'
+
+
+def _byte_score(byte: int) -> int:
+    return 1 if byte in _COMMON_BYTES else 3
+
+
+def _find(data, needle: bytes, regex: re.Pattern, start: int) -> int:
+    """
+    Find a literal inside a buffer, using its own find method if it has one.
+    :param data: the buffer to search
+    :param needle: the literal to find
+    :param regex: the compiled literal, used for buffers without a find method (e.g. memoryview)
+    :param start: the offset to start from
+    :return: the literal offset or -1
+    """
+    find = getattr(data, 'find', None)
+    if find is not None:
+        return find(needle, start)
+
+    match = regex.search(data, start)
+    return -1 if match is None else match.start()
+
+
+def _as_buffer(data):
+    """
+    Make sure the data can be sliced and searched as a flat sequence of bytes, without copying it.
+    :param data: any object exposing the buffer protocol
+    :return: the data itself or a byte memoryview over it
+    """
+    if isinstance(data, (bytes, bytearray, mmap.mmap)):
+        return data
+
+    view = memoryview(data)
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+
+    return view
+
+
+def _extract_captures(text: str) -> (str, Dict[str, Tuple[int, int]]):
+    """
+    Replace the capture slots of a plain pattern ("<name:size>") with wildcard bytes.
+    :param text: the pattern
+    :return: the pattern without capture slots and the captures, as (offset, size) tuples by name
+    """
+    captures = {}
+    parts = []
+    digits = 0
+
+    position = 0
+    for slot in re.finditer(r'<\s*([A-Za-z_]\w*)\s*:\s*(\d+)\s*>', text):
+        before = text[position:slot.start()]
+        digits += len(re.sub(r'[^0-9A-F?]', '', before.upper()))
+        if digits % 2:
+            raise PatternException(f"Capture \"{slot.group(1)}\" doesn't start on a byte boundary in \"{text}\".")
+
+        name, size = slot.group(1), int(slot.group(2))
+        if name in captures or size == 0:
+            raise PatternException(f"Invalid or duplicate capture \"{name}\" in \"{text}\".")
+
+        captures[name] = (digits // 2, size)
+        parts.append(before + ' ' + '?? ' * size)
+        digits += 2 * size
+        position = slot.end()
+
+    parts.append(text[position:])
+    text = ''.join(parts)
+    if '<' in text or '>' in text:
+        raise PatternException(f"Invalid capture slot in \"{text}\".")
+
+    return text, captures
+
+
+def _extract(data, offsets, capture: Tuple[int, int], signed: bool, byteorder: str):
+    offset, size = capture
+    return gather_fields(_as_buffer(data), offsets, offset, size, signed, byteorder)
+
+
+def _resolve_relative(data, offsets, capture: Tuple[int, int], base_address: int, instruction_end: int):
+    numpy = load_numpy()
+
+    offset, size = capture
+    if instruction_end is None:
+        instruction_end = offset + size
+
+    displacements = gather_fields(_as_buffer(data), offsets, offset, size, True, 'little')
+    targets = as_offsets(offsets) + displacements + (base_address + instruction_end)
+    return targets.view(numpy.uint64)
 
 
 class Pattern:
     __pattern: int
     __mask: int
     __byteorder: str
+    __size: int
+
+    __value_bytes: bytes
+    __mask_bytes: bytes
+    __strategy: PatternStrategy
+    __regex: re.Pattern
+    __lead: int
+    __anchor: bytes
+    __anchor_offset: int
+    __vector: MaskedMatcher
+    __captures: Dict[str, Tuple[int, int]]
+    __mismatch_tables: List[Tuple[int, bytes]]
 
     @property
     def pattern(self) -> int:
@@ -24,33 +158,141 @@ class Pattern:
     @property
     def size(self) -> int:
         """ The pattern size in bytes. """
-        return self.__mask.bit_length() // 8
+        return self.__size
 
-    def __init__(self, pattern: int, mask: int, little_endian: bool):
+    @property
+    def strategy(self) -> PatternStrategy:
+        """ The strategy used by Pattern.match. """
+        return self.__strategy
+
+    @property
+    def anchor(self) -> bytes:
+        """ The literal bytes searched first by the anchor strategy (None if there aren't any). """
+        return self.__anchor
+
+    @property
+    def anchor_offset(self) -> int:
+        """ The offset of the anchor inside the pattern. """
+        return self.__anchor_offset
+
+    @property
+    def captures(self) -> Dict[str, Tuple[int, int]]:
+        """ The capture slots, as (offset, size) tuples by name. """
+        return dict(self.__captures)
+
+    def __init__(self, pattern: int, mask: int, little_endian: bool, size: int = None,
+                 captures: Dict[str, Tuple[int, int]] = None):
+        self.__captures = dict(captures or {})
         self.__pattern = pattern
         self.__mask = mask
         self.__byteorder = 'little' if little_endian else 'big'
+        self.__size = (mask.bit_length() + 7) // 8 if size is None else size
+
+        # Byte-wise view of the pattern, in the same order as the data it's matched against
+        self.__value_bytes = pattern.to_bytes(self.__size, byteorder=self.__byteorder)
+        self.__mask_bytes = mask.to_bytes(self.__size, byteorder=self.__byteorder)
+
+        self.__regex = None
+        self.__lead = 0
+        self.__vector = None
+        self.__mismatch_tables = None
+        self.__anchor, self.__anchor_offset = self.__find_anchor()
+        self.__strategy = self.__select_strategy()
+
+    def __find_anchor(self) -> (bytes, int):
+        """
+        Find the best run of fully known bytes to search for with bytes.find.
+        Longer runs and runs made of rarer bytes are preferred.
+        :return: the anchor bytes and their offset inside the pattern
+        """
+        best_anchor, best_offset, best_score = None, 0, 0
+
+        offset = 0
+        while offset < self.__size:
+            if self.__mask_bytes[offset] != 0xFF:
+                offset += 1
+                continue
+
+            end = offset
+            while end < self.__size and self.__mask_bytes[end] == 0xFF:
+                end += 1
+
+            for start in range(offset, max(offset + 1, end - _MAX_ANCHOR_SIZE + 1)):
+                window = self.__value_bytes[start:min(end, start + _MAX_ANCHOR_SIZE)]
+                score = sum(_byte_score(byte) for byte in window)
+                if score > best_score:
+                    best_anchor, best_offset, best_score = window, start, score
+
+            offset = end
+
+        return best_anchor, best_offset
+
+    def __select_strategy(self) -> PatternStrategy:
+        """
+        Pick the cheapest way to match this pattern.
+        :return: the selected strategy
+        """
+        if self.__size == 0 or self.__mask == 0 or self.__pattern & ~self.__mask:
+            return PatternStrategy.REFERENCE
+
+        if all(byte == 0xFF for byte in self.__mask_bytes):
+            self.__regex = re.compile(re.escape(self.__value_bytes))
+            return PatternStrategy.LITERAL
+
+        if all(byte in (0x00, 0xFF) for byte in self.__mask_bytes):
+            # Leading wildcards are stripped so that the regex engine can use its literal prefix search
+            self.__lead = next(index for index, byte in enumerate(self.__mask_bytes) if byte)
+            self.__regex = re.compile(b''.join(
+                    re.escape(self.__value_bytes[index:index + 1]) if self.__mask_bytes[index] else b'.'
+                    for index in range(self.__lead, self.__size)), re.DOTALL)
+            return PatternStrategy.REGEX
+
+        # Nibble wildcards: a single anchor byte stops bytes.find too often to beat the vectorized matcher
+        if self.__anchor is not None and (len(self.__anchor) > 1 or not numpy_available()):
+            self.__regex = re.compile(re.escape(self.__anchor))
+            return PatternStrategy.ANCHOR
+
+        if numpy_available():
+            self.__vector = MaskedMatcher(self.__value_bytes, self.__mask_bytes)
+            return PatternStrategy.VECTOR
+
+        return PatternStrategy.REFERENCE
 
     @staticmethod
     def compile(pattern: str, little_endian: bool = False) -> "Pattern":
         """
         Compile the pattern into a Pattern object.
+        Wildcard bytes can be named with capture slots: "E8 <target:4>" is "E8 ?? ?? ?? ??", with the last four
+        bytes available as the "target" capture (see Pattern.extract and Pattern.resolve_relative).
+        NOTE: Patterns using jumps, alternations or byte ranges compile to a PatternExpression instead,
+              look at PatternExpression.compile documentation.
         :param pattern: the pattern
         :param little_endian: if it's little endian or not
         :return: the compiled pattern
         """
+        if not _EXTENDED_CHARACTERS.isdisjoint(pattern):
+            return PatternExpression.compile(pattern, little_endian)
+
+        captures = {}
+        if '<' in pattern or '>' in pattern:
+            pattern, captures = _extract_captures(pattern)
+
         pattern = pattern.upper()
         pattern = re.sub(r'[^0-9A-F?]', '', pattern)
         pattern = ''.join(a + b for a, b in zip(pattern[::2], pattern[1::2]))
+        size = len(pattern) // 2
 
         mask = re.sub(r'[0-9A-F]', '1111', pattern)
         mask = re.sub(r'\?', '0000', mask)
-        mask = int(mask, base=2)
+        mask = int(mask or '0', base=2)
 
         pattern = re.sub(r'\?', '0', pattern)
-        pattern = int(pattern, base=16)
+        pattern = int(pattern or '0', base=16)
 
-        return Pattern(pattern, mask, little_endian)
+        if little_endian:
+            captures = {name: (size - offset - length, length) for name, (offset, length) in captures.items()}
+
+        return Pattern(pattern, mask, little_endian, size, captures)
 
     def match_full(self, data: bytes) -> bool:
         """
@@ -62,22 +304,1013 @@ class Pattern:
         masked_data = int.from_bytes(data, byteorder=self.__byteorder) & self.__mask
         return masked_data == self.__pattern
 
-    def match(self, data: bytes) -> int:
+    def match_reference(self, data: bytes) -> int:
         """
-        Check if the provided data matches the pattern.
-        It traverses the full buffer to match it.
+        Check if the provided data matches the pattern, trying every offset with Pattern.match_full.
+        It's slow, it's the behaviour every other strategy must agree with.
         :param data: the data to check
         :return: the data offset
         """
-        for offset in range(len(data) - self.size):
-            if self.match_full(data[offset:offset + self.size]):
+        for offset in range(len(data) - self.__size + 1):
+            if self.match_full(data[offset:offset + self.__size]):
                 return offset
 
         # noinspection PyTypeChecker
         return None
 
+    def match_end(self, data, offset: int) -> int:
+        """
+        Get where the match found at some offset ends, which is where a non-overlapped search resumes.
+        :param data: the data the match was found in
+        :param offset: the match offset
+        :return: the offset right after the match
+        """
+        return offset + max(self.__size, 1)
+
+    def match(self, data: bytes, max_mismatches: int = 0) -> int:
+        """
+        Check if the provided data matches the pattern.
+        It traverses the full buffer to match it, using the strategy picked at compile time.
+        :param data: the data to check
+        :param max_mismatches: how many bytes may differ from the pattern (see Pattern.finditer_approximate)
+        :return: the data offset
+        """
+        if max_mismatches:
+            return next((offset for offset, _ in self.finditer_approximate(data, max_mismatches, max_hits=1)), None)
+
+        return next(self.finditer(data, max_hits=1), None)
+
+    def finditer(self, data, overlapped: bool = True, max_hits: int = None) -> Iterator[int]:
+        """
+        Find every offset the pattern matches at.
+        The data isn't copied: bytes, bytearray, mmap, memoryview and other buffer objects are searched in place.
+        :param data: the data to check
+        :param overlapped: if a match can start inside the previous one
+        :param max_hits: how many offsets to yield at most (all of them if None)
+        :return: an iterator of the matching offsets, in ascending order
+        """
+        if max_hits is not None and max_hits <= 0:
+            return
+
+        data = _as_buffer(data)
+        step = 1 if overlapped else max(self.__size, 1)
+
+        if self.__strategy is PatternStrategy.LITERAL:
+            offsets = self.__iter_literal(data, step)
+        elif self.__strategy is PatternStrategy.REGEX:
+            offsets = self.__iter_regex(data, step)
+        elif self.__strategy is PatternStrategy.ANCHOR:
+            offsets = self.__iter_anchor(data, step)
+        elif self.__strategy is PatternStrategy.VECTOR:
+            offsets = self.__iter_vector(data, step)
+        else:
+            offsets = self.__iter_reference(data, step)
+
+        if max_hits is None:
+            yield from offsets
+            return
+
+        for hits, offset in enumerate(offsets, start=1):
+            yield offset
+
+            if hits >= max_hits:
+                return
+
+    def finditer_approximate(self, data, max_mismatches: int, overlapped: bool = True,
+                             max_hits: int = None) -> Iterator[Tuple[int, int]]:
+        """
+        Find every offset the pattern matches at with at most some mismatching bytes (Hamming distance).
+        Wildcards keep their meaning: a byte only counts as a mismatch if it differs on the known bits.
+        With NumPy, the mismatches are counted one pattern column at a time over a block of offsets, the offsets
+        already over the limit are dropped once they're the majority. Without it, it's the Shift-Add algorithm
+        on 8-bit counters packed into a big integer.
+        :param data: the data to check
+        :param max_mismatches: how many bytes may differ from the pattern
+        :param overlapped: if a match can start inside the previous one
+        :param max_hits: how many matches to yield at most (all of them if None)
+        :return: an iterator of (offset, mismatching bytes) tuples, in ascending offset order
+        """
+        if max_hits is not None and max_hits <= 0:
+            return
+
+        if not 0 <= max_mismatches < 254:
+            raise ValueError("The maximum mismatch count must be between 0 and 253.")
+
+        if self.__mismatch_tables is None:
+            self.__mismatch_tables = [(index, bytes(0 if byte & mask == self.__value_bytes[index] & mask else 1
+                                                    for byte in range(256)))
+                                      for index, mask in enumerate(self.__mask_bytes) if mask]
+
+        data = _as_buffer(data)
+        if numpy_available():
+            matches = self.__iter_approximate_vector(data, max_mismatches)
+        else:
+            matches = self.__iter_approximate_shift_add(data, max_mismatches)
+
+        hits = 0
+        next_offset = 0
+        for offset, mismatches in matches:
+            if offset < next_offset:
+                continue
+
+            yield offset, mismatches
+
+            hits += 1
+            if max_hits is not None and hits >= max_hits:
+                return
+
+            next_offset = offset + (1 if overlapped else max(self.__size, 1))
+
+    def __iter_approximate_vector(self, data, max_mismatches: int) -> Iterator[Tuple[int, int]]:
+        numpy = load_numpy()
+
+        array = as_array(data)
+        size = self.__size
+        columns = [(index, mask, self.__value_bytes[index] & mask) for index, mask in enumerate(self.__mask_bytes)
+                   if mask]
+        saturated = numpy.uint8(max_mismatches + 1)
+        # Counters are clamped every 255 - (max_mismatches + 1) columns, so that no 8-bit counter ever wraps around
+        group_size = 255 - int(saturated)
+        stop = len(array) - size + 1
+
+        for block_start in range(0, stop, DEFAULT_BLOCK_SIZE):
+            count = min(DEFAULT_BLOCK_SIZE, stop - block_start)
+            counters = numpy.zeros(count, dtype=numpy.uint8)
+            offsets = None
+
+            for position, (index, mask, value) in enumerate(columns, start=1):
+                if offsets is None:
+                    column = array[block_start + index:block_start + index + count]
+                    mismatches = (column != value) if mask == 0xFF else ((column & mask) != value)
+                    counters += mismatches.view(numpy.uint8)
+                    if position % group_size == 0:
+                        numpy.minimum(counters, saturated, out=counters)
+
+                    # Once most offsets are over the limit, only the others are checked
+                    if position <= max_mismatches:
+                        continue
+
+                    alive = counters < saturated
+                    if numpy.count_nonzero(alive) * 4 < count:
+                        offsets = numpy.flatnonzero(alive)
+                        counters = counters[offsets]
+                        offsets += block_start
+                else:
+                    column = array[offsets + index]
+                    counters += ((column != value) if mask == 0xFF else ((column & mask) != value)).view(numpy.uint8)
+                    alive = counters < saturated
+                    offsets, counters = offsets[alive], counters[alive]
+
+                    if not len(offsets):
+                        break
+
+            if offsets is None:
+                offsets = numpy.flatnonzero(counters < saturated)
+                counters = counters[offsets]
+                offsets += block_start
+
+            yield from zip(offsets.tolist(), counters.tolist())
+
+    def __iter_approximate_shift_add(self, data, max_mismatches: int) -> Iterator[Tuple[int, int]]:
+        size = self.__size
+        saturated = max_mismatches + 1
+
+        # Counters are summed 255 - (max_mismatches + 1) columns at a time then clamped,
+        # so that no 8-bit counter ever overflows into its neighbour
+        group_size = 255 - saturated
+        saturate = bytes(min(count, saturated) for count in range(256))
+        hit_regex = re.compile(b'[\\x00-%s]' % re.escape(bytes([max_mismatches])))
+
+        for block_start in range(0, len(data) - size + 1, DEFAULT_BLOCK_SIZE):
+            count = min(DEFAULT_BLOCK_SIZE, len(data) - size + 1 - block_start)
+            block = bytes(data[block_start:block_start + count + size - 1])
+
+            counters = 0
+            for group_start in range(0, len(self.__mismatch_tables), group_size):
+                for index, table in self.__mismatch_tables[group_start:group_start + group_size]:
+                    counters += int.from_bytes(block.translate(table), 'little') >> (8 * index)
+
+                if group_start + group_size < len(self.__mismatch_tables):
+                    counters = int.from_bytes(counters.to_bytes(len(block), 'little').translate(saturate), 'little')
+
+            counts = counters.to_bytes(len(block), 'little')[:count]
+            for found in hit_regex.finditer(counts):
+                yield block_start + found.start(), counts[found.start()]
+
+    def match_all(self, data, overlapped: bool = True, max_hits: int = None) -> array:
+        """
+        Find every offset the pattern matches at.
+        NOTE: It's the bulk version of Pattern.finditer, the offsets are packed in an array('Q').
+        :param data: the data to check
+        :param overlapped: if a match can start inside the previous one
+        :param max_hits: how many offsets to return at most (all of them if None)
+        :return: the matching offsets, in ascending order
+        """
+        offsets = array('Q')
+
+        if self.__strategy is PatternStrategy.VECTOR and overlapped:
+            numpy = load_numpy()
+            for block in self.__vector.find_blocks(_as_buffer(data)):
+                if max_hits is not None:
+                    block = block[:max_hits - len(offsets)]
+
+                offsets.frombytes(block.astype(numpy.uint64).tobytes())
+                if max_hits is not None and len(offsets) >= max_hits:
+                    break
+
+            return offsets
+
+        offsets.extend(self.finditer(data, overlapped, max_hits))
+        return offsets
+
+    def extract(self, data, offsets, name: str, signed: bool = True, byteorder: str = 'little'):
+        """
+        Decode a capture of many matches at once.
+        :param data: the data the matches were found in
+        :param offsets: the match offsets (e.g. from match_all)
+        :param name: the capture name
+        :param signed: if the captured integer is signed
+        :param byteorder: the captured integer byte order
+        :return: the captured integers, as an int64 (signed) or uint64 (unsigned) NumPy array
+        """
+        return _extract(data, offsets, self.__captures[name], signed, byteorder)
+
+    def resolve_relative(self, data, offsets, name: str, base_address: int = 0, instruction_end: int = None):
+        """
+        Resolve a captured relative displacement (rel32 call/jmp targets, RIP-relative operands) for many matches at
+        once: target = base_address + match offset + instruction_end + displacement.
+        :param data: the data the matches were found in
+        :param offsets: the match offsets (e.g. from match_all)
+        :param name: the capture name
+        :param base_address: the address the data was read from
+        :param instruction_end: where the instruction ends, relative to the match (the end of the capture if None)
+        :return: the target addresses, as an uint64 NumPy array
+        """
+        return _resolve_relative(data, offsets, self.__captures[name], base_address, instruction_end)
+
+    def __iter_literal(self, data, step: int) -> Iterator[int]:
+        offset = _find(data, self.__value_bytes, self.__regex, 0)
+        while offset >= 0:
+            yield offset
+            offset = _find(data, self.__value_bytes, self.__regex, offset + step)
+
+    def __iter_regex(self, data, step: int) -> Iterator[int]:
+        found = self.__regex.search(data, self.__lead)
+        while found is not None:
+            offset = found.start() - self.__lead
+            yield offset
+            found = self.__regex.search(data, offset + step + self.__lead)
+
+    def __iter_anchor(self, data, step: int) -> Iterator[int]:
+        last = len(data) - self.__size
+        position = self.__anchor_offset
+        while True:
+            position = _find(data, self.__anchor, self.__regex, position)
+            offset = position - self.__anchor_offset
+            if position < 0 or offset > last:
+                return
+
+            if self.match_full(data[offset:offset + self.__size]):
+                yield offset
+                position += step
+            else:
+                position += 1
+
+    def __iter_vector(self, data, step: int) -> Iterator[int]:
+        next_offset = 0
+        for block in self.__vector.find_blocks(data):
+            for offset in block.tolist():
+                if offset >= next_offset:
+                    yield offset
+                    next_offset = offset + step
+
+    def __iter_reference(self, data, step: int) -> Iterator[int]:
+        offset = 0
+        while offset <= len(data) - self.__size:
+            if self.match_full(data[offset:offset + self.__size]):
+                yield offset
+                offset += step
+            else:
+                offset += 1
+
     def __str__(self) -> str:
         return f"Pattern(pattern={self.__pattern:#x}, mask={self.__mask:#x}, byteorder={self.__byteorder})"
 
     def __repr__(self) -> str:
         return self.__str__()
+
+
+def _parse_expression(text: str) -> list:
+    """
+    Parse an extended pattern into a list of elements:
+    ('byte', value, mask), ('range', low, high), ('jump', minimum, maximum), ('alternation', [elements, ...]) and
+    ('capture', name, size).
+    :param text: the extended pattern
+    :return: the elements
+    """
+    if not text.isascii():
+        raise PatternException(f"\"{text}\" contains non ASCII characters.")
+
+    # Capture names keep their case, everything else is read upper-cased
+    source, text = text, text.upper()
+    position = 0
+
+    def error(message: str):
+        return PatternException(f"{message} at position {position} of \"{text}\".")
+
+    def skip_spaces():
+        nonlocal position
+        while position < len(text) and text[position].isspace():
+            position += 1
+
+    def read_until(terminator: str) -> str:
+        nonlocal position
+        end = text.find(terminator, position)
+        if end < 0:
+            raise error(f"Missing \"{terminator}\"")
+
+        content, position = source[position:end], end + 1
+        return content
+
+    def parse_sequence(nested: bool) -> list:
+        nonlocal position
+        elements = []
+        while True:
+            skip_spaces()
+            if position >= len(text):
+                if nested:
+                    raise error("Missing \")\"")
+                return elements
+
+            character = text[position]
+            if character in '|)':
+                if not nested:
+                    raise error(f"Unexpected \"{character}\"")
+                return elements
+
+            if character == '(':
+                position += 1
+                alternatives = [parse_sequence(True)]
+                while text[position] == '|':
+                    position += 1
+                    alternatives.append(parse_sequence(True))
+
+                position += 1
+                elements.append(('alternation', alternatives))
+            elif character == '[':
+                position += 1
+                bounds = read_until(']').upper().replace(' ', '').split('-')
+                if len(bounds) > 2 or not all(bound.isdigit() for bound in bounds):
+                    raise error("Invalid jump")
+
+                minimum, maximum = int(bounds[0]), int(bounds[-1])
+                if minimum > maximum:
+                    raise error("Invalid jump bounds")
+                elements.append(('jump', minimum, maximum))
+            elif character == '{':
+                position += 1
+                bounds = read_until('}').upper().replace(' ', '').split('-')
+                if len(bounds) != 2 or not all(re.fullmatch(r'[0-9A-F]{2}', bound) for bound in bounds):
+                    raise error("Invalid byte range")
+
+                low, high = int(bounds[0], 16), int(bounds[1], 16)
+                if low > high:
+                    raise error("Invalid byte range bounds")
+                elements.append(('range', low, high))
+            elif character == '<':
+                position += 1
+                capture = re.fullmatch(r'\s*([A-Za-z_]\w*)\s*:\s*(\d+)\s*', read_until('>'))
+                if capture is None or int(capture.group(2)) == 0:
+                    raise error("Invalid capture slot")
+
+                elements.append(('capture', capture.group(1), int(capture.group(2))))
+            elif re.fullmatch(r'[0-9A-F?]{2}', text[position:position + 2]):
+                digits = text[position:position + 2]
+                position += 2
+                elements.append(('byte', int(digits.replace('?', '0'), 16),
+                                  int(re.sub(r'[0-9A-F]', 'F', digits).replace('?', '0'), 16)))
+            else:
+                raise error("Unexpected character")
+
+    return parse_sequence(False)
+
+
+def _reverse_elements(elements: list) -> list:
+    """ Reverse the elements order (alternatives included), for little endian expressions. """
+    return [('alternation', [_reverse_elements(alternative) for alternative in element[1]])
+            if element[0] == 'alternation' else element for element in reversed(elements)]
+
+
+def _expression_bounds(elements: list) -> (int, int, int):
+    """
+    Measure an expression.
+    :param elements: the expression elements
+    :return: the minimum and maximum match sizes, and how many ways it may match from a single position
+    """
+    minimum, maximum, complexity = 0, 0, 1
+    for element in elements:
+        if element[0] == 'jump':
+            minimum, maximum = minimum + element[1], maximum + element[2]
+            complexity *= element[2] - element[1] + 1
+        elif element[0] == 'alternation':
+            bounds = [_expression_bounds(alternative) for alternative in element[1]]
+            minimum += min(bound[0] for bound in bounds)
+            maximum += max(bound[1] for bound in bounds)
+            complexity *= sum(bound[2] for bound in bounds)
+        elif element[0] == 'capture':
+            minimum, maximum = minimum + element[2], maximum + element[2]
+        else:
+            minimum, maximum = minimum + 1, maximum + 1
+
+        complexity = min(complexity, MAX_EXPRESSION_COMPLEXITY + 1)
+
+    return minimum, maximum, complexity
+
+
+def _expression_captures(elements: list, text: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Locate the capture slots of an expression.
+    Their offset must be fixed: they can't follow a variable-size element nor be part of an alternation.
+    :param elements: the expression elements
+    :param text: the expression source, for error messages
+    :return: the captures, as (offset, size) tuples by name
+    """
+    captures = {}
+    offset = 0
+    for element in elements:
+        if element[0] == 'capture':
+            if offset is None:
+                raise PatternException(f"Capture \"{element[1]}\" doesn't have a fixed offset in \"{text}\".")
+
+            if element[1] in captures:
+                raise PatternException(f"Duplicate capture \"{element[1]}\" in \"{text}\".")
+
+            captures[element[1]] = (offset, element[2])
+            offset += element[2]
+        elif element[0] == 'alternation':
+            if any(_expression_captures(alternative, text) for alternative in element[1]):
+                raise PatternException(f"Captures can't be part of an alternation in \"{text}\".")
+
+            bounds = {_expression_bounds(alternative)[:2] for alternative in element[1]}
+            minimum, maximum = bounds.pop() if len(bounds) == 1 else (0, None)
+            offset = offset + minimum if offset is not None and minimum == maximum else None
+        elif element[0] == 'jump':
+            offset = offset + element[1] if offset is not None and element[1] == element[2] else None
+        elif offset is not None:
+            offset += 1
+
+    return captures
+
+
+def _byte_class(values: List[int]) -> bytes:
+    """
+    Build a regex matching any of some byte values.
+    :param values: the sorted byte values
+    :return: the regex source
+    """
+    if len(values) == 256:
+        return b'.'
+
+    if len(values) == 1:
+        return re.escape(bytes(values))
+
+    ranges = []
+    for value in values:
+        if ranges and ranges[-1][1] == value - 1:
+            ranges[-1][1] = value
+        else:
+            ranges.append([value, value])
+
+    return b'[' + b''.join(re.escape(bytes([low])) if low == high else
+                           re.escape(bytes([low])) + b'-' + re.escape(bytes([high])) for low, high in ranges) + b']'
+
+
+def _expression_regex(elements: list) -> bytes:
+    """
+    Translate expression elements into a regex.
+    :param elements: the expression elements
+    :return: the regex source
+    """
+    source = b''
+    for element in elements:
+        if element[0] == 'byte':
+            _, value, mask = element
+            source += _byte_class([byte for byte in range(256) if byte & mask == value & mask])
+        elif element[0] == 'range':
+            source += _byte_class(list(range(element[1], element[2] + 1)))
+        elif element[0] == 'capture':
+            source += b'.{%d}' % element[2]
+        elif element[0] == 'jump':
+            source += b'.{%d,%d}' % (element[1], element[2]) if element[1] != element[2] else b'.{%d}' % element[1]
+        else:
+            source += b'(?:' + b'|'.join(_expression_regex(alternative) for alternative in element[1]) + b')'
+
+    return source
+
+
+def _linear_steps(elements: list) -> list:
+    """
+    Translate expression elements into linear matcher steps: bytes and byte ranges become translation tables
+    (1 for the matching byte values, 0 for the others), captures become fixed jumps.
+    :param elements: the expression elements
+    :return: the steps
+    """
+    steps = []
+    for element in elements:
+        if element[0] == 'byte':
+            _, value, mask = element
+            steps.append(('table', bytes(int(byte & mask == value & mask) for byte in range(256))))
+        elif element[0] == 'range':
+            steps.append(('table', bytes(int(element[1] <= byte <= element[2]) for byte in range(256))))
+        elif element[0] == 'capture':
+            steps.append(('jump', element[2], element[2]))
+        elif element[0] == 'jump':
+            steps.append(element)
+        else:
+            steps.append(('alternation', [_linear_steps(alternative) for alternative in element[1]]))
+
+    return steps
+
+
+def _linear_starts(steps: list, block: bytes, ends: int) -> List[int]:
+    """
+    Find the positions each step may start at, for the whole sequence to end at one of some positions.
+    The steps are walked backward, each one with a few operations on the whole block, whatever its jump widths
+    and alternations are: the matching time is linear in the block size. Position sets are big integers holding
+    one byte per position (1 if the position is in the set), up to len(block) included.
+    :param steps: the linear matcher steps (see _linear_steps)
+    :param block: the data
+    :param ends: the positions the sequence may end at
+    :return: the position sets of each step, followed by ends (the first set is where the sequence may start)
+    """
+    sets = [ends]
+    for step in reversed(steps):
+        positions = sets[-1]
+        if step[0] == 'table':
+            positions = int.from_bytes(block.translate(step[1]), 'little') & (positions >> 8)
+        elif step[0] == 'jump':
+            # Windows of 1, 2, 4... positions, then two overlapping ones cover the jump width
+            _, minimum, maximum = step
+            width, covered = maximum - minimum + 1, 1
+            while covered * 2 <= width:
+                positions |= positions >> (8 * covered)
+                covered *= 2
+
+            if covered < width:
+                positions |= positions >> (8 * (width - covered))
+            positions >>= 8 * minimum
+        else:
+            starts = 0
+            for alternative in step[1]:
+                starts |= _linear_starts(alternative, block, positions)[0]
+            positions = starts
+
+        sets.append(positions)
+
+    sets.reverse()
+    return sets
+
+
+def _linear_end(steps: list, block: bytes, position: int, ends: int) -> int:
+    """
+    Follow the match the regex engine finds at a position (longest jumps and first alternatives first),
+    knowing which choices can still lead to a match instead of backtracking.
+    :param steps: the linear matcher steps (see _linear_steps)
+    :param block: the data
+    :param position: the match position
+    :param ends: the positions the match may end at
+    :return: the match end, -1 if there's no match at this position
+    """
+    sets = _linear_starts(steps, block, ends)
+    if not sets[0] >> (8 * position) & 1:
+        return -1
+
+    for index, step in enumerate(steps):
+        following = sets[index + 1]
+        if step[0] == 'table':
+            position += 1
+        elif step[0] == 'jump':
+            position += next(size for size in range(step[2], step[1] - 1, -1)
+                             if following >> (8 * (position + size)) & 1)
+        else:
+            position = next(end for end in (_linear_end(alternative, block, position, following)
+                                             for alternative in step[1]) if end != -1)
+
+    return position
+
+
+class PatternExpression:
+    __text: str
+    __byteorder: str
+    __min_size: int
+    __size: int
+    __regex: re.Pattern
+    __steps: list
+    __captures: Dict[str, Tuple[int, int]]
+
+    @property
+    def text(self) -> str:
+        """ The expression source. """
+        return self.__text
+
+    @property
+    def byteorder(self) -> str:
+        """ The expression byte order. """
+        return self.__byteorder
+
+    @property
+    def min_size(self) -> int:
+        """ The size of the shortest possible match in bytes. """
+        return self.__min_size
+
+    @property
+    def size(self) -> int:
+        """ The size of the longest possible match in bytes. """
+        return self.__size
+
+    @property
+    def regex(self) -> re.Pattern:
+        """ The compiled regex the expression is matched with. """
+        return self.__regex
+
+    @property
+    def anchor(self) -> bytes:
+        """ Expressions are never anchored (see Pattern.anchor). """
+        return None
+
+    @property
+    def captures(self) -> Dict[str, Tuple[int, int]]:
+        """ The capture slots, as (offset, size) tuples by name. """
+        return dict(self.__captures)
+
+    @property
+    def linear(self) -> bool:
+        """ If the expression is matched by the linear matcher (too complex for the regex engine). """
+        return self.__steps is not None
+
+    def __init__(self, text: str, regex: re.Pattern, min_size: int, size: int, little_endian: bool,
+                 captures: Dict[str, Tuple[int, int]] = None, steps: list = None):
+        self.__captures = dict(captures or {})
+        self.__text = text
+        self.__regex = regex
+        self.__steps = steps
+        self.__min_size = min_size
+        self.__size = size
+        self.__byteorder = 'little' if little_endian else 'big'
+
+    @staticmethod
+    def compile(text: str, little_endian: bool = False) -> "PatternExpression":
+        """
+        Compile an extended pattern.
+        On top of bytes and nibble wildcards ("48 8B ?5 ??"), it understands:
+        - jumps: "[2-6]" is any 2 to 6 bytes, "[4]" is any 4 bytes
+        - alternations: "(E8|E9)", each alternative being a whole expression
+        - byte ranges: "{70-7F}" is any byte from 0x70 to 0x7F
+        - capture slots: "<name:4>" is any 4 bytes, available as the "name" capture (see Pattern.compile), as long
+          as everything before it has a fixed size
+        It compiles to a regex. If it may match in more than MAX_EXPRESSION_COMPLEXITY ways from a single position,
+        the regex engine could backtrack through every one of them at every byte: it's matched by a linear matcher
+        instead (a few big integer operations per element over a whole block, whatever the jump widths are).
+        :param text: the extended pattern
+        :param little_endian: if it's little endian or not (the element order is reversed)
+        :return: the compiled expression
+        """
+        elements = _parse_expression(text)
+        if little_endian:
+            elements = _reverse_elements(elements)
+
+        min_size, size, complexity = _expression_bounds(elements)
+        if size == 0:
+            raise PatternException(f"\"{text}\" is empty.")
+
+        steps = _linear_steps(elements) if complexity > MAX_EXPRESSION_COMPLEXITY else None
+        return PatternExpression(text, re.compile(_expression_regex(elements), re.DOTALL), min_size, size,
+                                 little_endian, _expression_captures(elements, text), steps)
+
+    def match_full(self, data: bytes) -> bool:
+        """
+        Check if the provided data matches the expression.
+        :param data: the data to check
+        :return: if the expression matches the whole data
+        """
+        if self.__steps is None:
+            return self.__regex.fullmatch(_as_buffer(data)) is not None
+
+        data = bytes(data)
+        return _linear_starts(self.__steps, data, 1 << (8 * len(data)))[0] & 1 == 1
+
+    def match_end(self, data, offset: int) -> int:
+        """
+        Get where the match found at some offset ends, which is where a non-overlapped search resumes.
+        The match is as long as the regex engine makes it, as in PatternExpression.finditer.
+        :param data: the data the match was found in
+        :param offset: the match offset
+        :return: the offset right after the match
+        """
+        if self.__steps is not None:
+            block = bytes(_as_buffer(data)[offset:offset + self.__size])
+            end = _linear_end(self.__steps, block, 0, int.from_bytes(b'\x01' * (len(block) + 1), 'little'))
+            return offset + max(end, 1)
+
+        found = self.__regex.match(_as_buffer(data), offset)
+        return offset + 1 if found is None else max(found.end(), offset + 1)
+
+    def match(self, data: bytes) -> int:
+        """
+        Check if the provided data matches the expression.
+        :param data: the data to check
+        :return: the data offset
+        """
+        return next(self.finditer(data, max_hits=1), None)
+
+    def finditer(self, data, overlapped: bool = True, max_hits: int = None) -> Iterator[int]:
+        """
+        Find every offset the expression matches at.
+        NOTE: Without overlap, the next match is searched from the end of the previous one, which is as long as
+              the regex engine could make it.
+        :param data: the data to check
+        :param overlapped: if a match can start inside the previous one
+        :param max_hits: how many offsets to yield at most (all of them if None)
+        :return: an iterator of the matching offsets, in ascending order
+        """
+        data = _as_buffer(data)
+        if self.__steps is not None:
+            hits = 0
+            next_offset = 0
+            for offset in self.__iter_linear(data):
+                if max_hits is not None and hits >= max_hits:
+                    return
+
+                if offset < next_offset:
+                    continue
+
+                yield offset
+                hits += 1
+                if not overlapped:
+                    next_offset = self.match_end(data, offset)
+            return
+
+        hits = 0
+        found = self.__regex.search(data)
+        while found is not None and (max_hits is None or hits < max_hits):
+            yield found.start()
+            hits += 1
+
+            found = self.__regex.search(data, found.start() + 1 if overlapped else max(found.end(), found.start() + 1))
+
+    def __iter_linear(self, data) -> Iterator[int]:
+        stop = len(data) - self.__min_size + 1
+        for block_start in range(0, stop, DEFAULT_BLOCK_SIZE):
+            count = min(DEFAULT_BLOCK_SIZE, stop - block_start)
+            block = bytes(data[block_start:block_start + count + self.__size - 1])
+            starts = _linear_starts(self.__steps, block, int.from_bytes(b'\x01' * (len(block) + 1), 'little'))[0]
+            starts = starts.to_bytes(len(block) + 1, 'little')[:count]
+
+            offset = starts.find(1)
+            while offset != -1:
+                yield block_start + offset
+                offset = starts.find(1, offset + 1)
+
+    def match_all(self, data, overlapped: bool = True, max_hits: int = None) -> array:
+        """
+        Find every offset the expression matches at.
+        NOTE: It's the bulk version of PatternExpression.finditer, the offsets are packed in an array('Q').
+        :param data: the data to check
+        :param overlapped: if a match can start inside the previous one
+        :param max_hits: how many offsets to return at most (all of them if None)
+        :return: the matching offsets, in ascending order
+        """
+        return array('Q', self.finditer(data, overlapped, max_hits))
+
+    def extract(self, data, offsets, name: str, signed: bool = True, byteorder: str = 'little'):
+        """
+        Decode a capture of many matches at once.
+        NOTE: For more details, look at Pattern.extract documentation.
+        """
+        return _extract(data, offsets, self.__captures[name], signed, byteorder)
+
+    def resolve_relative(self, data, offsets, name: str, base_address: int = 0, instruction_end: int = None):
+        """
+        Resolve a captured relative displacement for many matches at once.
+        NOTE: For more details, look at Pattern.resolve_relative documentation.
+        """
+        return _resolve_relative(data, offsets, self.__captures[name], base_address, instruction_end)
+
+    def __str__(self) -> str:
+        return f"PatternExpression(text=\"{self.__text}\", size={self.__min_size}..{self.__size}, " \
+               f"byteorder={self.__byteorder})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class PatternSet:
+    __patterns: dict
+    __order: dict
+    __anchors: dict
+    __grams: dict
+    __matchers: dict
+    __unanchored: list
+
+    @property
+    def patterns(self) -> dict:
+        """ The patterns in the set, by pattern ID. """
+        return dict(self.__patterns)
+
+    def __init__(self, patterns=None):
+        """
+        :param patterns: an iterable of patterns (their IDs are their positions) or a dict of patterns by ID
+        """
+        self.__patterns = {}
+        self.__order = {}
+        self.__anchors = {}
+        self.__grams = {}
+        self.__matchers = {}
+        self.__unanchored = []
+
+        if patterns is None:
+            return
+
+        items = patterns.items() if isinstance(patterns, dict) else enumerate(patterns)
+        for pattern_id, pattern in items:
+            self.add(pattern, pattern_id)
+
+    def add(self, pattern: Pattern, pattern_id=None):
+        """
+        Add a pattern to the set.
+        :param pattern: the pattern
+        :param pattern_id: the ID reported with its matches (its position in the set if None)
+        :return: the pattern ID
+        """
+        if pattern_id is None:
+            pattern_id = len(self.__patterns)
+
+        if pattern_id in self.__patterns:
+            raise ValueError(f"Pattern ID {pattern_id!r} is already in the set.")
+
+        self.__order[pattern_id] = len(self.__patterns)
+        self.__patterns[pattern_id] = pattern
+
+        if pattern.anchor is None or pattern.pattern & ~pattern.mask:
+            self.__unanchored.append((pattern_id, pattern))
+        else:
+            self.__anchors.setdefault(pattern.anchor, []).append((pattern_id, pattern))
+            value_bytes = pattern.pattern.to_bytes(pattern.size, pattern.byteorder)
+            mask_bytes = pattern.mask.to_bytes(pattern.size, pattern.byteorder)
+            self.__matchers[pattern_id] = MaskedMatcher(value_bytes, mask_bytes)
+
+            # Every window of fully known bytes is a q-gram candidate, as long as the longest one (up to 4 bytes)
+            runs = re.findall(b'\xff+', mask_bytes)
+            size = min(4, max(len(run) for run in runs))
+            self.__grams[pattern_id] = (size, [(int.from_bytes(value_bytes[offset:offset + size], 'little'), offset)
+                                               for offset in range(pattern.size - size + 1)
+                                               if mask_bytes[offset:offset + size] == b'\xff' * size])
+
+        return pattern_id
+
+    def __compile(self, array) -> (list, list):
+        """
+        Pick the q-gram of every anchored pattern, the rarest of its candidates in a few slices of the data,
+        and build one q-gram filter per gram size. Patterns whose q-gram is everywhere in the slices anyway
+        are left out, to be matched on their own.
+        :param array: the data, as an uint8 array
+        :return: the list of (filter, (pattern ID, pattern, q-gram offset) tuples by q-gram key) tuples,
+                 and the list of (pattern ID, pattern) tuples left out
+        """
+        numpy = load_numpy()
+
+        step = max(len(array) // _GRAM_SAMPLES, _GRAM_SAMPLE_SIZE)
+        samples = [array[start:start + _GRAM_SAMPLE_SIZE] for start in range(0, len(array), step)]
+
+        groups = {}
+        for patterns in self.__anchors.values():
+            for pattern_id, pattern in patterns:
+                size, candidates = self.__grams[pattern_id]
+                groups.setdefault(size, []).append((pattern_id, pattern, candidates))
+
+        filters, separate = [], []
+        sampled = sum(len(sample) for sample in samples)
+        for size, patterns in sorted(groups.items()):
+            keys = numpy.unique(numpy.array([key for _, _, candidates in patterns for key, _ in candidates],
+                                            dtype=numpy.uint32))
+            counts = numpy.zeros(len(keys), dtype=numpy.int64)
+            for sample in samples:
+                if len(sample) < size:
+                    continue
+
+                sample_keys = sample[:len(sample) - size + 1].astype(numpy.uint32)
+                for index in range(1, size):
+                    sample_keys |= sample[index:len(sample) - size + 1 + index].astype(numpy.uint32) << \
+                        numpy.uint32(8 * index)
+
+                indexes = numpy.minimum(numpy.searchsorted(keys, sample_keys), len(keys) - 1)
+                counts += numpy.bincount(indexes[keys[indexes] == sample_keys], minlength=len(keys))
+
+            frequencies = dict(zip(keys.tolist(), counts.tolist()))
+            grams = {}
+            for pattern_id, pattern, candidates in patterns:
+                key, offset = min(candidates, key=lambda candidate: frequencies[candidate[0]])
+                if frequencies[key] * _MAX_CANDIDATE_SHARE > sampled:
+                    separate.append((pattern_id, pattern))
+                else:
+                    grams.setdefault(key, []).append((pattern_id, pattern, offset))
+
+            if grams:
+                filters.append((GramFilter(key.to_bytes(size, 'little') for key in grams), grams))
+
+        return filters, separate
+
+    def __iter_vector(self, data) -> Iterator[tuple]:
+        numpy = load_numpy()
+
+        array = as_array(data)
+        filters, separate = self.__compile(array)
+        for pattern_id, pattern in separate:
+            for offset in pattern.finditer(data):
+                yield pattern_id, offset
+
+        for block_start in range(0, len(array), DEFAULT_BLOCK_SIZE):
+            block_stop = block_start + DEFAULT_BLOCK_SIZE
+            dense = (min(block_stop, len(array)) - block_start) // _MAX_CANDIDATE_SHARE
+
+            for gram_filter, grams in filters:
+                positions = gram_filter.find_block(array, block_start, block_stop)
+                if not len(positions):
+                    continue
+
+                # Group the candidate positions by q-gram, then verify every pattern of a group at once
+                keys = gram_filter.keys_at(array, positions)
+                order = numpy.argsort(keys, kind='stable')
+                keys, positions = keys[order], positions[order]
+                unique_keys, bounds = numpy.unique(keys, return_index=True)
+                bounds = bounds.tolist() + [len(keys)]
+
+                for group, key in enumerate(unique_keys.tolist()):
+                    patterns = grams.get(key)
+                    if patterns is None:
+                        continue
+
+                    group_positions = positions[bounds[group]:bounds[group + 1]]
+                    for pattern_id, pattern, gram_offset in patterns:
+                        if len(group_positions) > dense:
+                            # Too common (e.g. zeros), the pattern's own strategy beats verifying every candidate
+                            block = array[block_start:block_stop + pattern.size - 1]
+                            for offset in pattern.finditer(block):
+                                yield pattern_id, block_start + offset
+                            continue
+
+                        offsets = group_positions - gram_offset
+                        offsets = offsets[(offsets >= 0) & (offsets <= len(array) - pattern.size)]
+                        for offset in self.__matchers[pattern_id].verify(array, offsets).tolist():
+                            yield pattern_id, offset
+
+    def finditer(self, data) -> Iterator[tuple]:
+        """
+        Find every match of every pattern in the set.
+        With NumPy, the buffer is walked once for all the anchored patterns: a q-gram of every pattern (the rarest
+        of its fully known windows, in a few slices of the data) is hashed into q-gram filters, and only the patterns
+        whose q-gram is really there get verified. Patterns whose q-gram is still everywhere (e.g. zero pages)
+        are matched on their own, over the whole data or over the blocks where it's the case.
+        Without it, every pattern is matched on its own: its strategy verifies the anchor hits in C, which beats
+        both verifying them in Python and a regex alternation of the anchors (the re module tries every
+        alternative at every offset).
+        Patterns without any fully known byte can't be anchored and are always matched on their own.
+        :param data: the data to check
+        :return: an iterator of (pattern ID, offset) tuples, in no particular order
+        """
+        data = _as_buffer(data)
+
+        separate = self.__unanchored
+        if numpy_available():
+            if self.__anchors:
+                yield from self.__iter_vector(data)
+        else:
+            separate = [item for patterns in self.__anchors.values() for item in patterns] + separate
+
+        for pattern_id, pattern in separate:
+            for offset in pattern.finditer(data):
+                yield pattern_id, offset
+
+    def scan(self, data) -> list:
+        """
+        Find every match of every pattern in the set.
+        :param data: the data to check
+        :return: the list of (pattern ID, offset) tuples, sorted by offset (then by the pattern position in the set)
+        """
+        return sorted(self.finditer(data), key=lambda hit: (hit[1], self.__order[hit[0]]))
+
+    def __len__(self) -> int:
+        return len(self.__patterns)
+
+    def __contains__(self, pattern_id) -> bool:
+        return pattern_id in self.__patterns
+
+    def __getitem__(self, pattern_id) -> Pattern:
+        return self.__patterns[pattern_id]
+
+    def __str__(self) -> str:
+        return f"PatternSet(patterns={len(self.__patterns)}, anchors={len(self.__anchors)}, " \
+               f"unanchored={len(self.__unanchored)})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
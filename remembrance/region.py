@@ -0,0 +1,214 @@
+import bisect
+from array import array
+from itertools import compress
+from typing import Iterable, Iterator, List, Tuple
+
+from .memory import MemoryProtection, MemoryState
+
+# Protections (without their flags) the pages can be read with
+READABLE_PROTECTIONS = frozenset((MemoryProtection.PAGE_READONLY, MemoryProtection.PAGE_READWRITE,
+                                  MemoryProtection.PAGE_WRITECOPY, MemoryProtection.PAGE_EXECUTE_READ,
+                                  MemoryProtection.PAGE_EXECUTE_READWRITE, MemoryProtection.PAGE_EXECUTE_WRITECOPY))
+WRITABLE_PROTECTIONS = frozenset((MemoryProtection.PAGE_READWRITE, MemoryProtection.PAGE_WRITECOPY,
+                                  MemoryProtection.PAGE_EXECUTE_READWRITE, MemoryProtection.PAGE_EXECUTE_WRITECOPY))
+EXECUTABLE_PROTECTIONS = frozenset((MemoryProtection.PAGE_EXECUTE, MemoryProtection.PAGE_EXECUTE_READ,
+                                    MemoryProtection.PAGE_EXECUTE_READWRITE, MemoryProtection.PAGE_EXECUTE_WRITECOPY))
+
+_PROTECTION_FLAGS = MemoryProtection.PAGE_GUARD | MemoryProtection.PAGE_NOCACHE | MemoryProtection.PAGE_WRITECOMBINE
+
+
+def is_readable(region: Tuple[int, int, int, int, int]) -> bool:
+    """
+    Tell if a region can be read: committed, with a readable protection and without guard pages.
+    :param region: the (base address, size, state, protection, type) region
+    :return: if the region can be read
+    """
+    protection = region[3]
+    return region[2] == MemoryState.MEM_COMMIT and not protection & MemoryProtection.PAGE_GUARD and \
+        protection & ~_PROTECTION_FLAGS in READABLE_PROTECTIONS
+
+
+def _as_set(values) -> frozenset:
+    return frozenset((values,)) if isinstance(values, int) else frozenset(values)
+
+
+class RegionTable:
+    """
+    A snapshot of the regions of an address space, as parallel integer arrays sorted by base address.
+    Lookups are binary searches and filters only build new arrays, no per-region object is created.
+    """
+    __bases: array
+    __sizes: array
+    __states: array
+    __protections: array
+    __types: array
+
+    @property
+    def bases(self) -> array:
+        """ The region base addresses, in ascending order. """
+        return self.__bases
+
+    @property
+    def sizes(self) -> array:
+        """ The region sizes. """
+        return self.__sizes
+
+    @property
+    def states(self) -> array:
+        """ The region states (see MemoryState). """
+        return self.__states
+
+    @property
+    def protections(self) -> array:
+        """ The region protections (see MemoryProtection). """
+        return self.__protections
+
+    @property
+    def types(self) -> array:
+        """ The region types (see MemoryType, 0 for free regions). """
+        return self.__types
+
+    @property
+    def total_size(self) -> int:
+        """ The size of all the regions. """
+        return sum(self.__sizes)
+
+    def __init__(self, bases: array = None, sizes: array = None, states: array = None, protections: array = None,
+                 types: array = None):
+        self.__bases = array('Q') if bases is None else bases
+        self.__sizes = array('Q') if sizes is None else sizes
+        self.__states = array('I') if states is None else states
+        self.__protections = array('I') if protections is None else protections
+        self.__types = array('I') if types is None else types
+
+    @staticmethod
+    def build(regions: Iterable[Tuple[int, int, int, int, int]]) -> "RegionTable":
+        """
+        Build a table from a region walk (see MemoryBackend.regions).
+        :param regions: the (base address, size, state, protection, type) regions, by address
+        :return: the table
+        """
+        table = RegionTable()
+        for base_address, size, state, protection, region_type in regions:
+            table.__bases.append(base_address)
+            table.__sizes.append(size)
+            table.__states.append(state)
+            table.__protections.append(protection)
+            table.__types.append(region_type)
+
+        return table
+
+    def find(self, address: int) -> int:
+        """
+        Find the region containing an address.
+        :param address: the address
+        :return: the region index, -1 if no region contains it
+        """
+        index = bisect.bisect_right(self.__bases, address) - 1
+        if index < 0 or address >= self.__bases[index] + self.__sizes[index]:
+            return -1
+
+        return index
+
+    def region(self, address: int) -> Tuple[int, int, int, int, int]:
+        """
+        Get the region containing an address.
+        :param address: the address
+        :return: the (base address, size, state, protection, type) region, None if no region contains it
+        """
+        index = self.find(address)
+        # noinspection PyTypeChecker
+        return None if index < 0 else self[index]
+
+    def __select(self, selectors) -> "RegionTable":
+        selectors = list(selectors)
+        return RegionTable(array('Q', compress(self.__bases, selectors)), array('Q', compress(self.__sizes, selectors)),
+                           array('I', compress(self.__states, selectors)),
+                           array('I', compress(self.__protections, selectors)),
+                           array('I', compress(self.__types, selectors)))
+
+    def filter(self, state: int or Iterable[int] = None, protection: int or Iterable[int] = None,
+               region_type: int or Iterable[int] = None, start: int = None, stop: int = None) -> "RegionTable":
+        """
+        Keep the regions matching some criteria.
+        :param state: the accepted state(s)
+        :param protection: the accepted protection(s), compared without their flags (guard, no cache...)
+        :param region_type: the accepted type(s)
+        :param start: the address the regions must end after
+        :param stop: the address the regions must start before
+        :return: the filtered table
+        """
+        table = self
+        if start is not None or stop is not None:
+            first = 0 if start is None else max(0, bisect.bisect_right(self.__bases, start) - 1)
+            last = len(self.__bases) if stop is None else bisect.bisect_left(self.__bases, stop)
+            if first < last and start is not None and self.__bases[first] + self.__sizes[first] <= start:
+                first += 1
+
+            table = RegionTable(self.__bases[first:last], self.__sizes[first:last], self.__states[first:last],
+                                self.__protections[first:last], self.__types[first:last])
+
+        if state is not None:
+            states = _as_set(state)
+            table = table.__select(value in states for value in table.__states)
+
+        if protection is not None:
+            protections = _as_set(protection)
+            table = table.__select(value & ~_PROTECTION_FLAGS in protections for value in table.__protections)
+
+        if region_type is not None:
+            region_types = _as_set(region_type)
+            table = table.__select(value in region_types for value in table.__types)
+
+        return table
+
+    def readable(self, start: int = None, stop: int = None) -> "RegionTable":
+        """
+        Keep the committed regions that can be read (guard pages excluded).
+        :param start: the address the regions must end after
+        :param stop: the address the regions must start before
+        :return: the filtered table
+        """
+        table = self.filter(MemoryState.MEM_COMMIT, READABLE_PROTECTIONS, start=start, stop=stop)
+        return table.__select(not value & MemoryProtection.PAGE_GUARD for value in table.__protections)
+
+    def runs(self, start: int = None, stop: int = None) -> List[Tuple[int, int]]:
+        """
+        Merge the adjacent regions of the table into contiguous ranges (e.g. to read across region boundaries).
+        :param start: the address to clip the ranges to
+        :param stop: the address to clip the ranges to
+        :return: the (start, end) ranges, by address
+        """
+        runs = []
+        for base_address, size in zip(self.__bases, self.__sizes):
+            run_start, run_end = base_address, base_address + size
+            if start is not None:
+                run_start = max(run_start, start)
+            if stop is not None:
+                run_end = min(run_end, stop)
+
+            if run_start >= run_end:
+                continue
+
+            if runs and runs[-1][1] == run_start:
+                runs[-1] = (runs[-1][0], run_end)
+            else:
+                runs.append((run_start, run_end))
+
+        return runs
+
+    def __len__(self) -> int:
+        return len(self.__bases)
+
+    def __getitem__(self, index: int) -> Tuple[int, int, int, int, int]:
+        return (self.__bases[index], self.__sizes[index], self.__states[index], self.__protections[index],
+                self.__types[index])
+
+    def __iter__(self) -> Iterator[Tuple[int, int, int, int, int]]:
+        return zip(self.__bases, self.__sizes, self.__states, self.__protections, self.__types)
+
+    def __str__(self) -> str:
+        return f"RegionTable(regions={len(self.__bases)}, total_size={self.total_size})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,312 @@
+import enum
+import mmap
+from typing import Iterator, Tuple
+
+from .memory import DEFAULT_SCAN_CHUNK_SIZE, Memory
+from .vector import as_array, load_numpy
+
+
+class ScanCondition(enum.IntEnum):
+    # First and next scans
+    EXACT = 0
+    RANGE = 1
+    # First scans only
+    UNKNOWN = 2
+    # Next scans only (compared with the previous values)
+    CHANGED = 3
+    UNCHANGED = 4
+    INCREASED = 5
+    DECREASED = 6
+    INCREASED_BY = 7
+    DECREASED_BY = 8
+
+
+_FIRST_CONDITIONS = frozenset((ScanCondition.EXACT, ScanCondition.RANGE, ScanCondition.UNKNOWN))
+# Conditions compared with the value operand
+_VALUE_CONDITIONS = frozenset((ScanCondition.EXACT, ScanCondition.RANGE, ScanCondition.INCREASED_BY,
+                               ScanCondition.DECREASED_BY))
+
+
+def _check_operands(condition: ScanCondition, value, maximum):
+    """
+    Make sure the operands a condition is compared with are given (None would silently match nothing).
+    :param condition: the scan condition
+    :param value: the value operand
+    :param maximum: the maximum operand
+    """
+    if condition in _VALUE_CONDITIONS and value is None:
+        raise ValueError(f"{condition!r} needs a value.")
+
+    if condition == ScanCondition.RANGE and maximum is None:
+        raise ValueError(f"{condition!r} needs a maximum.")
+
+
+def _gather(data, offsets, dtype, aligned: bool):
+    """
+    Decode the values at many offsets of a buffer at once.
+    :param data: the buffer
+    :param offsets: the value offsets (an int64 NumPy array)
+    :param dtype: the value type
+    :param aligned: if every offset is a multiple of the value size (the buffer is then viewed as values)
+    :return: the values
+    """
+    numpy = load_numpy()
+
+    array = as_array(data)
+    if aligned:
+        return array[:len(array) - len(array) % dtype.itemsize].view(dtype)[offsets // dtype.itemsize]
+
+    indexes = offsets[:, None] + numpy.arange(dtype.itemsize)
+    return numpy.ascontiguousarray(array[indexes]).view(dtype).reshape(-1)
+
+
+class ValueScanner:
+    """
+    Find the addresses holding a value, then narrow them down as the value changes ("first scan" / "next scan").
+    The candidates are kept as a sorted uint64 address array and the array of their last values (12 bytes per
+    4 bytes candidate), every comparison is vectorized with NumPy. Next scans only read the pages still holding
+    candidates, in pieces of chunk_size bytes.
+    """
+    __memory: Memory
+    __dtype: object
+    __alignment: int
+    __chunk_size: int
+    __addresses: object
+    __values: object
+
+    @property
+    def memory(self) -> Memory:
+        """ The scanned Memory object. """
+        return self.__memory
+
+    @property
+    def dtype(self):
+        """ The value type (a NumPy dtype). """
+        return self.__dtype
+
+    @property
+    def alignment(self) -> int:
+        """ The candidate address alignment. """
+        return self.__alignment
+
+    @property
+    def addresses(self):
+        """ The candidate addresses (a sorted uint64 NumPy array), None before the first scan. """
+        return self.__addresses
+
+    @property
+    def values(self):
+        """ The candidate values, as of the last scan (a NumPy array), None before the first scan. """
+        return self.__values
+
+    def __init__(self, memory: Memory, dtype, alignment: int = None, chunk_size: int = DEFAULT_SCAN_CHUNK_SIZE):
+        """
+        :param memory: the Memory object
+        :param dtype: the value type (e.g. numpy.int32, '<f4'...)
+        :param alignment: the candidate address alignment (the value size if None, 1 finds unaligned values too)
+        :param chunk_size: how many bytes to read at once
+        """
+        numpy = load_numpy()
+
+        self.__memory = memory
+        self.__dtype = numpy.dtype(dtype)
+        self.__alignment = self.__dtype.itemsize if alignment is None else alignment
+        self.__chunk_size = max(chunk_size - chunk_size % self.__alignment, self.__alignment)
+        self.__addresses = self.__values = None
+
+    def __match(self, condition: ScanCondition, current, previous, value, maximum, tolerance):
+        """
+        Compare candidate values with a condition.
+        :return: the boolean mask of the candidates matching it
+        """
+        numpy = load_numpy()
+
+        floating = self.__dtype.kind in 'fc'
+        if value is not None:
+            value = numpy.array(value, dtype=self.__dtype)
+        if maximum is not None:
+            maximum = numpy.array(maximum, dtype=self.__dtype)
+
+        if condition == ScanCondition.EXACT:
+            return numpy.abs(current - value) <= tolerance if floating and tolerance else current == value
+
+        if condition == ScanCondition.RANGE:
+            return (current >= value) & (current <= maximum)
+
+        if condition == ScanCondition.UNKNOWN:
+            return numpy.ones(len(current), dtype=bool)
+
+        if condition in (ScanCondition.CHANGED, ScanCondition.UNCHANGED):
+            if floating:
+                unchanged = numpy.abs(current - previous) <= tolerance if tolerance else current == previous
+            else:
+                unchanged = current == previous
+
+            return ~unchanged if condition == ScanCondition.CHANGED else unchanged
+
+        if condition == ScanCondition.INCREASED:
+            return current > previous
+
+        if condition == ScanCondition.DECREASED:
+            return current < previous
+
+        # The integer differences wrap around like the values themselves
+        expected = previous + value if condition == ScanCondition.INCREASED_BY else previous - value
+        return numpy.abs(current - expected) <= tolerance if floating and tolerance else current == expected
+
+    def first_scan(self, condition: ScanCondition = ScanCondition.EXACT, value=None, maximum=None,
+                   tolerance: float = 0, address: int = 0, size: int = None, refresh: bool = True) -> int:
+        """
+        Find the candidates in the committed readable memory, forgetting the previous ones.
+        :param condition: EXACT (value, within tolerance for floats), RANGE (value to maximum, both included)
+                          or UNKNOWN (every aligned address, for an unknown initial value)
+        :param value: the value (the minimum for RANGE)
+        :param maximum: the maximum (RANGE)
+        :param tolerance: the largest difference a float value can have with the searched one
+        :param address: the address to start from
+        :param size: how many bytes to scan (up to the end of the address space if None)
+        :param refresh: if the region map must be walked again first (see Memory.regions)
+        :return: how many candidates were found
+        """
+        numpy = load_numpy()
+
+        if condition not in _FIRST_CONDITIONS:
+            raise ValueError(f"{condition!r} needs previous values, it can't be used by a first scan.")
+
+        _check_operands(condition, value, maximum)
+
+        dtype, alignment, chunk_size = self.__dtype, self.__alignment, self.__chunk_size
+        overlap = max(dtype.itemsize - alignment, 0)
+
+        addresses, values = [], []
+        for position, view in self.__memory.iter_chunks(address=address, size=size, chunk_size=chunk_size,
+                                                        overlap=overlap, refresh=refresh):
+            first = -position % alignment
+            count = max(0, (min(chunk_size, view.nbytes - dtype.itemsize + 1) - first + alignment - 1) // alignment)
+            if not count:
+                continue
+
+            current = numpy.ndarray((count,), dtype=dtype, buffer=view, offset=first, strides=(alignment,))
+            offsets = numpy.flatnonzero(self.__match(condition, current, None, value, maximum, tolerance))
+            if not len(offsets):
+                continue
+
+            # The values are copied, the chunk buffer is recycled by the next chunk
+            values.append(current[offsets])
+            addresses.append(offsets.astype(numpy.uint64) * numpy.uint64(alignment) + numpy.uint64(position + first))
+
+        self.__addresses = numpy.concatenate(addresses) if addresses else numpy.empty(0, dtype=numpy.uint64)
+        self.__values = numpy.concatenate(values) if values else numpy.empty(0, dtype=dtype)
+        return len(self.__addresses)
+
+    def __page_runs(self) -> Iterator[Tuple[int, int]]:
+        """
+        Find the runs of adjacent pages holding candidates.
+        :return: an iterator of (start, end) address ranges, by address
+        """
+        numpy = load_numpy()
+
+        page_size = numpy.uint64(mmap.PAGESIZE)
+        pages = numpy.union1d(self.__addresses // page_size,
+                              (self.__addresses + numpy.uint64(self.__dtype.itemsize - 1)) // page_size)
+        breaks = numpy.flatnonzero(numpy.diff(pages) != 1)
+        firsts = pages[numpy.concatenate(([0], breaks + 1))].tolist()
+        lasts = pages[numpy.concatenate((breaks, [len(pages) - 1]))].tolist()
+        for first, last in zip(firsts, lasts):
+            yield first * mmap.PAGESIZE, (last + 1) * mmap.PAGESIZE
+
+    def next_scan(self, condition: ScanCondition, value=None, maximum=None, tolerance: float = 0) -> int:
+        """
+        Keep the candidates matching a condition, their values are updated to the current ones.
+        Only the pages holding candidates are read again, candidates that can't be read anymore are dropped
+        (a piece that can't be fully read is read partially, see Memory.read).
+        :param condition: EXACT, RANGE (see ValueScanner.first_scan), CHANGED, UNCHANGED, INCREASED, DECREASED
+                          (compared with the previous values), INCREASED_BY or DECREASED_BY (value)
+        :param value: the value (the minimum for RANGE, the difference for INCREASED_BY and DECREASED_BY)
+        :param maximum: the maximum (RANGE)
+        :param tolerance: the largest difference a float value can have with the expected one
+        :return: how many candidates are left
+        """
+        numpy = load_numpy()
+
+        if self.__addresses is None:
+            raise ValueError("A first scan is needed before a next scan.")
+
+        if condition == ScanCondition.UNKNOWN:
+            raise ValueError(f"{condition!r} can only be used by a first scan.")
+
+        _check_operands(condition, value, maximum)
+
+        dtype, chunk_size = self.__dtype, self.__chunk_size
+        aligned = self.__alignment % dtype.itemsize == 0
+        piece_size = chunk_size + dtype.itemsize - 1
+
+        # The runs are split into chunk_size pieces, each one holding the candidates starting in it (it's read
+        # up to their last byte), and the pieces are read in batches of about chunk_size bytes
+        batches, batch, batch_size = [], [], 0
+        for start, end in self.__page_runs():
+            for position in range(start, end, chunk_size):
+                batch.append((position, min(position + piece_size, end) - position, min(position + chunk_size, end)))
+                batch_size += batch[-1][1]
+                if batch_size >= chunk_size:
+                    batches.append(batch)
+                    batch, batch_size = [], 0
+        if batch:
+            batches.append(batch)
+
+        keep, values = [], []
+        for batch in batches:
+            ranges = [(position, size) for position, size, _ in batch]
+            for (position, size, end), data in zip(batch, self.__memory.read_many(ranges, gap=0, max_size=piece_size)):
+                first, last = numpy.searchsorted(self.__addresses, numpy.array([position, end], dtype=numpy.uint64))
+                if first == last:
+                    continue
+
+                candidates = numpy.arange(first, last)
+                if data is None:
+                    # Only the candidates overlapping the holes of the piece are dropped
+                    data, holes = self.__memory.read(position, size, partial=True)
+                    addresses = self.__addresses[first:last]
+                    readable = numpy.ones(len(candidates), dtype=bool)
+                    for hole_start, hole_end in holes:
+                        readable &= (addresses >= hole_end) | (addresses + numpy.uint64(dtype.itemsize) <= hole_start)
+                    candidates = candidates[readable]
+
+                offsets = (self.__addresses[candidates] - numpy.uint64(position)).astype(numpy.int64)
+                current = _gather(data, offsets, dtype, aligned)
+                matches = numpy.flatnonzero(self.__match(condition, current, self.__values[candidates], value,
+                                                         maximum, tolerance))
+                keep.append(candidates[matches])
+                values.append(current[matches])
+
+        keep = numpy.concatenate(keep) if keep else numpy.empty(0, dtype=numpy.int64)
+        self.__addresses = self.__addresses[keep]
+        self.__values = numpy.concatenate(values) if values else numpy.empty(0, dtype=dtype)
+        return len(self.__addresses)
+
+    def results(self, max_count: int = None) -> Iterator[Tuple[int, object]]:
+        """
+        Iterate the candidates.
+        :param max_count: how many candidates to iterate at most (all of them if None)
+        :return: an iterator of (address, last value) tuples, by address
+        """
+        if self.__addresses is None:
+            return
+
+        count = len(self.__addresses) if max_count is None else min(max_count, len(self.__addresses))
+        for index in range(count):
+            yield int(self.__addresses[index]), self.__values[index].item()
+
+    def reset(self):
+        """ Forget the candidates. """
+        self.__addresses = self.__values = None
+
+    def __len__(self) -> int:
+        return 0 if self.__addresses is None else len(self.__addresses)
+
+    def __str__(self) -> str:
+        return f"ValueScanner(memory={self.__memory}, dtype={self.__dtype}, alignment={self.__alignment}, " \
+               f"candidates={len(self)})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
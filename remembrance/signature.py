@@ -0,0 +1,384 @@
+import mmap
+import os
+import struct
+import zlib
+from typing import Dict, Iterator, List
+
+from .exception import SignatureException
+from .pattern import Pattern, PatternExpression, PatternSet
+
+COMPILED_MAGIC = b'RMBRSIG\0'
+COMPILED_VERSION = 2
+COMPILED_SUFFIX = '.compiled'
+
+# magic, version, signature count, source size, source mtime (ns), source CRC32, payload CRC32
+_HEADER = struct.Struct('<8sIIQqII')
+# name, text, module and section (offset and size in the string table), pattern size, pattern offset,
+# expected hits (-1 if unknown), flags
+_ENTRY = struct.Struct('<IIIIIIIIIIiI')
+
+_FLAG_LITTLE_ENDIAN = 0x1
+# Extended patterns and patterns with capture slots are stored as text and compiled when used
+_FLAG_TEXT = 0x2
+
+
+class Signature:
+    __name: str
+    __text: str
+    __little_endian: bool
+    __module: str
+    __section: str
+    __expected_hits: int
+    __pattern: Pattern or PatternExpression
+    __raw: tuple
+
+    @property
+    def name(self) -> str:
+        """ The signature name. """
+        return self.__name
+
+    @property
+    def text(self) -> str:
+        """ The pattern, as written in the source file. """
+        return self.__text
+
+    @property
+    def little_endian(self) -> bool:
+        """ If the pattern is little endian. """
+        return self.__little_endian
+
+    @property
+    def module(self) -> str:
+        """ The module the signature belongs to (None if any). """
+        return self.__module
+
+    @property
+    def section(self) -> str:
+        """ The section the signature belongs to (None if any). """
+        return self.__section
+
+    @property
+    def expected_hits(self) -> int:
+        """ How many times the signature is expected to match (None if unknown). """
+        return self.__expected_hits
+
+    @property
+    def pattern(self) -> Pattern or PatternExpression:
+        """ The compiled pattern (built on first access). """
+        if self.__pattern is None:
+            if self.__raw is not None:
+                buffer, offset, size = self.__raw
+                self.__pattern = Pattern(int.from_bytes(buffer[offset:offset + size], 'big'),
+                                         int.from_bytes(buffer[offset + size:offset + 2 * size], 'big'),
+                                         self.__little_endian, size)
+            else:
+                self.__pattern = Pattern.compile(self.__text, self.__little_endian)
+
+        return self.__pattern
+
+    def __init__(self, name: str, text: str, little_endian: bool = False, module: str = None, section: str = None,
+                 expected_hits: int = None, raw: tuple = None):
+        """
+        :param raw: the compiled pattern as a (buffer, offset, size) tuple, the pattern bytes followed by the mask
+                    bytes (both big endian); the text is compiled if None
+        """
+        self.__name = name
+        self.__text = text
+        self.__little_endian = little_endian
+        self.__module = module
+        self.__section = section
+        self.__expected_hits = expected_hits
+        self.__pattern = None
+        self.__raw = raw
+
+    def __str__(self) -> str:
+        return f"Signature(name=\"{self.__name}\", text=\"{self.__text}\", module={self.__module}, " \
+               f"section={self.__section}, expected_hits={self.__expected_hits})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class SignatureDatabase:
+    __signatures: Dict[str, Signature]
+    __pattern_set: PatternSet
+    __mapping: mmap.mmap
+
+    @property
+    def signatures(self) -> Dict[str, Signature]:
+        """ The signatures, by name. """
+        return dict(self.__signatures)
+
+    @property
+    def pattern_set(self) -> PatternSet:
+        """ A PatternSet with every signature pattern, using the signature names as pattern IDs. """
+        if self.__pattern_set is None:
+            self.__pattern_set = PatternSet({name: signature.pattern for name, signature in self.__signatures.items()})
+
+        return self.__pattern_set
+
+    def __init__(self, signatures: List[Signature] = None, mapping: mmap.mmap = None):
+        self.__signatures = {}
+        self.__pattern_set = None
+        self.__mapping = mapping
+
+        for signature in signatures or []:
+            if signature.name in self.__signatures:
+                raise SignatureException(f"Duplicate signature \"{signature.name}\".")
+
+            self.__signatures[signature.name] = signature
+
+    @staticmethod
+    def parse(source: str) -> "SignatureDatabase":
+        """
+        Parse signatures from their text form.
+        Each line holds one signature, "name = pattern ; key=value ...", where the keys are module, section,
+        hits (the expected hit count) and endian (big or little). Empty lines and lines starting with # are skipped.
+        :param source: the signatures text
+        :return: the signature database
+        """
+        signatures = []
+        for line_number, line in enumerate(source.splitlines(), start=1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            name, separator, rest = line.partition('=')
+            text, _, metadata = rest.partition(';')
+            name, text = name.strip(), text.strip()
+            if not separator or not name or not text:
+                raise SignatureException(f"Line {line_number}: expected \"name = pattern ; key=value ...\".")
+
+            options = {}
+            for option in metadata.split():
+                key, separator, value = option.partition('=')
+                if not separator or key not in ('module', 'section', 'hits', 'endian'):
+                    raise SignatureException(f"Line {line_number}: invalid option \"{option}\".")
+
+                options[key] = value
+
+            if options.get('endian', 'big') not in ('big', 'little') or not options.get('hits', '0').isdigit():
+                raise SignatureException(f"Line {line_number}: invalid endian or hits option.")
+
+            signatures.append(Signature(name, text, options.get('endian') == 'little', options.get('module'),
+                                        options.get('section'),
+                                        int(options['hits']) if 'hits' in options else None))
+
+        return SignatureDatabase(signatures)
+
+    @staticmethod
+    def load(path: str) -> "SignatureDatabase":
+        """
+        Load signatures from a text file.
+        NOTE: For the file format, look at SignatureDatabase.parse documentation.
+        :param path: the text file path
+        :return: the signature database
+        """
+        with open(path, 'r', encoding='utf-8') as file:
+            return SignatureDatabase.parse(file.read())
+
+    def save_compiled(self, path: str, source_path: str = None):
+        """
+        Write the compiled (binary) form of the database.
+        The file is written to a temporary file first and then moved in place.
+        :param path: the compiled file path
+        :param source_path: the text file it was built from, recorded so that it can be rebuilt when it changes
+        """
+        strings = bytearray()
+        entries = bytearray()
+
+        def add_string(value: str) -> (int, int):
+            if value is None:
+                return 0xFFFFFFFF, 0
+
+            encoded = value.encode('utf-8')
+            offset = len(strings)
+            strings.extend(encoded)
+            return offset, len(encoded)
+
+        patterns = bytearray()
+        for signature in self.__signatures.values():
+            pattern = signature.pattern
+            flags = _FLAG_LITTLE_ENDIAN if signature.little_endian else 0
+            patterns_offset, size = len(patterns), 0
+
+            if isinstance(pattern, PatternExpression) or pattern.captures:
+                flags |= _FLAG_TEXT
+            else:
+                size = pattern.size
+                patterns.extend(pattern.pattern.to_bytes(size, 'big'))
+                patterns.extend(pattern.mask.to_bytes(size, 'big'))
+
+            entries.extend(_ENTRY.pack(*add_string(signature.name), *add_string(signature.text),
+                                       *add_string(signature.module), *add_string(signature.section),
+                                       size, patterns_offset,
+                                       -1 if signature.expected_hits is None else signature.expected_hits, flags))
+
+        payload = bytes(entries) + struct.pack('<I', len(strings)) + bytes(strings) + bytes(patterns)
+
+        source_size, source_mtime, source_crc = 0, 0, 0
+        if source_path is not None:
+            source_size, source_mtime, source_crc = _source_fingerprint(source_path)
+
+        header = _HEADER.pack(COMPILED_MAGIC, COMPILED_VERSION, len(self.__signatures), source_size, source_mtime,
+                              source_crc, zlib.crc32(payload))
+
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'wb') as file:
+            file.write(header)
+            file.write(payload)
+
+        os.replace(temporary_path, path)
+
+    @staticmethod
+    def read_compiled_header(path: str) -> tuple:
+        """
+        Read the header of a compiled database.
+        :param path: the compiled file path
+        :return: the (version, signature count, source size, source mtime, source CRC32) tuple
+        """
+        with open(path, 'rb') as file:
+            header = file.read(_HEADER.size)
+
+        if len(header) != _HEADER.size or header[:len(COMPILED_MAGIC)] != COMPILED_MAGIC:
+            raise SignatureException(f"\"{path}\" is not a compiled signature database.")
+
+        return _HEADER.unpack(header)[1:6]
+
+    @staticmethod
+    def load_compiled(path: str) -> "SignatureDatabase":
+        """
+        Load the compiled (binary) form of a database.
+        The file is memory mapped: patterns are only built when a signature is used.
+        :param path: the compiled file path
+        :return: the signature database
+        """
+        with open(path, 'rb') as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            if len(mapping) < _HEADER.size:
+                raise SignatureException(f"\"{path}\" is truncated.")
+
+            magic, version, count, _, _, _, payload_crc = _HEADER.unpack_from(mapping)
+            if magic != COMPILED_MAGIC or version != COMPILED_VERSION:
+                raise SignatureException(f"\"{path}\" is not a version {COMPILED_VERSION} compiled signature database.")
+
+            if zlib.crc32(memoryview(mapping)[_HEADER.size:]) != payload_crc:
+                raise SignatureException(f"\"{path}\" is corrupted (checksum mismatch).")
+
+            entries_offset = _HEADER.size
+            strings_size_offset = entries_offset + count * _ENTRY.size
+            strings_offset = strings_size_offset + 4
+            patterns_offset = strings_offset + struct.unpack_from('<I', mapping, strings_size_offset)[0]
+
+            def get_string(offset: int, size: int) -> str:
+                if offset == 0xFFFFFFFF:
+                    return None
+
+                return mapping[strings_offset + offset:strings_offset + offset + size].decode('utf-8')
+
+            signatures = []
+            for entry in struct.iter_unpack(_ENTRY.format, mapping[entries_offset:strings_size_offset]):
+                name_offset, name_size, text_offset, text_size, module_offset, module_size, section_offset, \
+                    section_size, size, pattern_offset, expected_hits, flags = entry
+
+                signatures.append(Signature(get_string(name_offset, name_size), get_string(text_offset, text_size),
+                                            bool(flags & _FLAG_LITTLE_ENDIAN), get_string(module_offset, module_size),
+                                            get_string(section_offset, section_size),
+                                            None if expected_hits < 0 else expected_hits,
+                                            raw=None if flags & _FLAG_TEXT else
+                                            (mapping, patterns_offset + pattern_offset, size)))
+
+            return SignatureDatabase(signatures, mapping)
+        except (SignatureException, struct.error, UnicodeDecodeError) as exception:
+            mapping.close()
+            if isinstance(exception, SignatureException):
+                raise
+
+            raise SignatureException(f"\"{path}\" is corrupted ({exception}).") from exception
+
+    @staticmethod
+    def open(source_path: str, compiled_path: str = None) -> "SignatureDatabase":
+        """
+        Load a signature text file through its compiled form.
+        The compiled form is rebuilt whenever it's missing, corrupted or out of date: the size and modification
+        time of the text file are checked first, then its CRC32 (a same size edit within the mtime resolution).
+        :param source_path: the text file path
+        :param compiled_path: the compiled file path (the text file path followed by ".compiled" if None)
+        :return: the signature database
+        """
+        if compiled_path is None:
+            compiled_path = source_path + COMPILED_SUFFIX
+
+        source_stat = os.stat(source_path)
+        try:
+            _, _, source_size, source_mtime, source_crc = SignatureDatabase.read_compiled_header(compiled_path)
+            if (source_size, source_mtime) == (source_stat.st_size, source_stat.st_mtime_ns) and \
+                    _source_fingerprint(source_path) == (source_size, source_mtime, source_crc):
+                return SignatureDatabase.load_compiled(compiled_path)
+        except (OSError, SignatureException):
+            pass
+
+        database = SignatureDatabase.load(source_path)
+        database.save_compiled(compiled_path, source_path)
+
+        return database
+
+    def scan(self, data) -> Dict[str, List[int]]:
+        """
+        Scan some data for every signature at once.
+        :param data: the data to check
+        :return: the sorted match offsets, by signature name
+        """
+        hits = {name: [] for name in self.__signatures}
+        for name, offset in self.pattern_set.scan(data):
+            hits[name].append(offset)
+
+        return hits
+
+    def close(self):
+        """ Close the compiled file mapping (the signatures can't build their patterns anymore). """
+        if self.__mapping is not None:
+            for signature in self.__signatures.values():
+                _ = signature.pattern
+
+            self.__mapping.close()
+            self.__mapping = None
+
+    def __enter__(self) -> "SignatureDatabase":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __getitem__(self, name: str) -> Signature:
+        return self.__signatures[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__signatures
+
+    def __iter__(self) -> Iterator[Signature]:
+        return iter(self.__signatures.values())
+
+    def __len__(self) -> int:
+        return len(self.__signatures)
+
+    def __str__(self) -> str:
+        return f"SignatureDatabase(signatures={len(self.__signatures)}, compiled={self.__mapping is not None})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+def _source_fingerprint(path: str) -> (int, int, int):
+    """
+    Get what identifies a version of a text file.
+    :param path: the text file path
+    :return: the file size, modification time (ns) and CRC32
+    """
+    with open(path, 'rb') as file:
+        content = file.read()
+
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns, zlib.crc32(content)
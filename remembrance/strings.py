@@ -0,0 +1,84 @@
+import codecs
+
+# Characters (not bytes) a remote string is read up to, when no terminator is found
+DEFAULT_MAX_STRING_LENGTH = 4096
+
+
+def unit_size(encoding: str) -> int:
+    """
+    Get the size of the code units of an encoding, which is also the size of its NUL terminator.
+    :param encoding: the encoding name
+    :return: 4 for UTF-32, 2 for UTF-16, 1 otherwise
+    """
+    name = codecs.lookup(encoding).name
+    if name.startswith('utf-32'):
+        return 4
+
+    if name.startswith('utf-16'):
+        return 2
+
+    return 1
+
+
+def find_terminator(data: bytes, start: int, end: int, unit: int, origin: int) -> int:
+    """
+    Find a NUL terminator, aligned on the code units of the string.
+    :param data: the data to search
+    :param start: the offset to search from
+    :param end: the offset to search up to (the terminator must end before it)
+    :param unit: the code unit size (see unit_size)
+    :param origin: the offset of the string start in the data (negative if it starts before)
+    :return: the terminator offset, -1 if there's none
+    """
+    terminator = bytes(unit)
+    index = data.find(terminator, start, end)
+    while index != -1 and (index - origin) % unit:
+        index = data.find(terminator, index + 1, end)
+
+    return index
+
+
+class RemoteString(bytes):
+    """
+    The raw bytes of a string read from a process (without its terminator), decoded on first use only:
+    comparing or hashing raw bytes never pays for the decoding.
+    """
+    __address: int
+    __encoding: str
+    __text: str
+
+    @property
+    def address(self) -> int:
+        """ The string address. """
+        return self.__address
+
+    @property
+    def encoding(self) -> str:
+        """ The string encoding. """
+        return self.__encoding
+
+    @property
+    def text(self) -> str:
+        """ The decoded string, undecodable bytes replaced. """
+        if self.__text is None:
+            self.__text = self.decode(self.__encoding, 'replace')
+
+        return self.__text
+
+    def __new__(cls, data, address: int = 0, encoding: str = 'utf-8'):
+        """
+        :param data: the raw bytes, without the terminator
+        :param address: the string address
+        :param encoding: the string encoding
+        """
+        string = super().__new__(cls, data)
+        string.__address = address
+        string.__encoding = encoding
+        string.__text = None
+        return string
+
+    def __str__(self) -> str:
+        return f"RemoteString(address={self.__address:#x}, text={self.text!r})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
@@ -0,0 +1,276 @@
+import importlib.util
+from typing import Iterator
+
+# Candidate starts matched per block: big enough to amortize the NumPy call overhead,
+# small enough to keep the temporaries in cache and to stop early on a first hit.
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+
+def numpy_available() -> bool:
+    """ If NumPy can be imported, without importing it. """
+    return importlib.util.find_spec('numpy') is not None
+
+
+def load_numpy():
+    """
+    Import NumPy on first use.
+    :return: the numpy module
+    """
+    try:
+        import numpy
+    except ImportError as exception:
+        raise ImportError("This feature requires NumPy (pip install numpy).") from exception
+
+    return numpy
+
+
+def as_array(data):
+    """
+    View a buffer as a flat uint8 NumPy array, without copying it.
+    Works with bytes, bytearray, mmap, memoryview and anything else exposing a contiguous buffer.
+    :param data: the buffer
+    :return: the uint8 array
+    """
+    numpy = load_numpy()
+    if isinstance(data, numpy.ndarray):
+        return data.reshape(-1).view(numpy.uint8)
+
+    return numpy.frombuffer(data, dtype=numpy.uint8)
+
+
+class MaskedMatcher:
+    __size: int
+    __columns: list
+
+    @property
+    def size(self) -> int:
+        """ The pattern size in bytes. """
+        return self.__size
+
+    def __init__(self, value_bytes: bytes, mask_bytes: bytes):
+        self.__size = len(value_bytes)
+
+        # Fully known bytes first: they discard the most candidates for the same cost
+        self.__columns = sorted(((index, mask, value_bytes[index] & mask)
+                                 for index, mask in enumerate(mask_bytes) if mask),
+                                key=lambda column: column[1] != 0xFF)
+
+    def find_block(self, array, start: int, stop: int):
+        """
+        Find all the match offsets starting in [start, stop).
+        The columns narrow a boolean candidate vector until it gets sparse, then an index vector.
+        :param array: the uint8 array to search
+        :param start: the first candidate offset
+        :param stop: the candidate offset to stop at
+        :return: the sorted match offsets, as an int64 array
+        """
+        numpy = load_numpy()
+
+        stop = min(stop, len(array) - self.__size + 1)
+        count = stop - start
+        if count <= 0:
+            return numpy.empty(0, dtype=numpy.int64)
+
+        candidates = None
+        for position, (index, mask, value) in enumerate(self.__columns):
+            column = array[start + index:start + index + count]
+            matches = (column == value) if mask == 0xFF else ((column & mask) == value)
+            candidates = matches if candidates is None else numpy.logical_and(candidates, matches, out=candidates)
+
+            if numpy.count_nonzero(candidates) * 16 < count:
+                return self.verify(array, numpy.flatnonzero(candidates) + start, position + 1)
+
+        if candidates is None:
+            return numpy.arange(start, stop, dtype=numpy.int64)
+
+        return numpy.flatnonzero(candidates) + start
+
+    def verify(self, array, offsets, first_column: int = 0):
+        """
+        Keep the candidate offsets the pattern matches at.
+        :param array: the uint8 array to search
+        :param offsets: the candidate offsets, the pattern must fit in the array at each of them
+        :param first_column: how many columns are already known to match
+        :return: the matching offsets, as an int64 array
+        """
+        numpy = load_numpy()
+
+        offsets = offsets.astype(numpy.int64, copy=False)
+        for index, mask, value in self.__columns[first_column:]:
+            if not len(offsets):
+                break
+
+            column = array[offsets + index]
+            offsets = offsets[(column if mask == 0xFF else column & mask) == value]
+
+        return offsets
+
+    def find_blocks(self, data, start: int = 0, stop: int = None,
+                    block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator:
+        """
+        Find all the match offsets, one block of candidates at a time.
+        :param data: the buffer to search
+        :param start: the first candidate offset
+        :param stop: the candidate offset to stop at (end of the buffer if None)
+        :param block_size: how many candidate offsets each block covers
+        :return: an iterator of sorted int64 offset arrays
+        """
+        array = as_array(data)
+        stop = len(array) if stop is None else min(stop, len(array))
+
+        for block_start in range(start, stop, block_size):
+            offsets = self.find_block(array, block_start, min(block_start + block_size, stop))
+            if len(offsets):
+                yield offsets
+
+    def find_first(self, data) -> int:
+        """
+        Find the first match offset.
+        :param data: the buffer to search
+        :return: the match offset or None
+        """
+        for offsets in self.find_blocks(data):
+            return int(offsets[0])
+
+        # noinspection PyTypeChecker
+        return None
+
+    def __str__(self) -> str:
+        return f"MaskedMatcher(size={self.__size}, columns={len(self.__columns)})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+class GramFilter:
+    __size: int
+    __grams: list
+    __bits: int
+    __table: object
+
+    @property
+    def size(self) -> int:
+        """ The q-gram size in bytes. """
+        return self.__size
+
+    def __init__(self, grams, bits: int = None):
+        """
+        :param grams: the q-grams to look for, all of the same size (at most 4 bytes)
+        :param bits: the hash table size as a power of two (picked from the number of q-grams if None)
+        """
+        self.__grams = sorted(set(grams))
+        self.__size = len(self.__grams[0])
+        if self.__size > 4 or any(len(gram) != self.__size for gram in self.__grams):
+            raise ValueError("The q-grams must all have the same size, at most 4 bytes.")
+
+        if bits is None:
+            bits = max(16, min(24, (len(self.__grams) * 256).bit_length()))
+
+        self.__bits = min(bits, self.__size * 8)
+        self.__table = None
+
+    def __hash(self, keys):
+        numpy = load_numpy()
+
+        if self.__bits == self.__size * 8:
+            return keys
+
+        # Fibonacci hashing: the top bits of key * 2^32 / phi
+        keys *= numpy.uint32(0x9E3779B1)
+        keys >>= numpy.uint32(32 - self.__bits)
+        return keys
+
+    def find_block(self, array, start: int, stop: int):
+        """
+        Find the offsets in [start, stop) where one of the q-grams may start.
+        The q-grams are hashed into a bitmap, so a few false positives are returned too.
+        :param array: the uint8 array to search
+        :param start: the first offset
+        :param stop: the offset to stop at
+        :return: the sorted candidate offsets, as an int64 array
+        """
+        numpy = load_numpy()
+
+        if self.__table is None:
+            keys = numpy.array([int.from_bytes(gram, 'little') for gram in self.__grams], dtype=numpy.uint32)
+            self.__table = numpy.zeros(1 << self.__bits, dtype=numpy.bool_)
+            self.__table[self.__hash(keys)] = True
+
+        stop = min(stop, len(array) - self.__size + 1)
+        if stop <= start:
+            return numpy.empty(0, dtype=numpy.int64)
+
+        keys = array[start:stop].astype(numpy.uint32)
+        for index in range(1, self.__size):
+            keys |= array[start + index:stop + index].astype(numpy.uint32) << numpy.uint32(8 * index)
+
+        return numpy.flatnonzero(self.__table[self.__hash(keys)]) + start
+
+    def keys_at(self, array, offsets):
+        """
+        Read the q-grams found at some offsets as integers (little endian, like int.from_bytes(gram, 'little')).
+        :param array: the uint8 array
+        :param offsets: the offsets, as returned by GramFilter.find_block
+        :return: the q-gram keys, as an uint32 array
+        """
+        numpy = load_numpy()
+
+        keys = array[offsets].astype(numpy.uint32)
+        for index in range(1, self.__size):
+            keys |= array[offsets + index].astype(numpy.uint32) << numpy.uint32(8 * index)
+
+        return keys
+
+    def __str__(self) -> str:
+        return f"GramFilter(size={self.__size}, grams={len(self.__grams)}, bits={self.__bits})"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+def as_offsets(offsets):
+    """
+    Convert match offsets (array('Q'), list, NumPy array...) to an int64 array, without copying when possible.
+    :param offsets: the offsets
+    :return: the int64 array
+    """
+    numpy = load_numpy()
+    return numpy.asarray(offsets).astype(numpy.int64, copy=False).reshape(-1)
+
+
+def gather_fields(data, offsets, field_offset: int, size: int, signed: bool = True, byteorder: str = 'little'):
+    """
+    Decode a fixed-size integer field at many offsets of a buffer at once.
+    :param data: the buffer
+    :param offsets: where each field is, relative to field_offset
+    :param field_offset: the field offset, added to every offset
+    :param size: the field size in bytes (1 to 8)
+    :param signed: if the field is signed
+    :param byteorder: the field byte order
+    :return: the decoded fields, as an int64 (signed) or uint64 (unsigned) array
+    """
+    numpy = load_numpy()
+
+    if not 1 <= size <= 8:
+        raise ValueError("Fields must be 1 to 8 bytes long.")
+
+    array = as_array(data)
+    indexes = as_offsets(offsets)[:, None] + (field_offset + numpy.arange(size))
+    fields = array[indexes]
+    if byteorder == 'little':
+        fields = fields[:, ::-1]
+
+    # Big endian accumulation, one byte column at a time
+    values = numpy.zeros(len(fields), dtype=numpy.uint64)
+    for column in range(size):
+        values = (values << numpy.uint64(8)) | fields[:, column].astype(numpy.uint64)
+
+    if not signed:
+        return values
+
+    values = values.view(numpy.int64)
+    if size < 8:
+        sign = numpy.int64(1 << (8 * size - 1))
+        values = (values ^ sign) - sign
+
+    return values
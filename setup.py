@@ -3,7 +3,7 @@ from distutils.core import setup
 setup(
         name='remembrance',
         version='0.0.1',
-        packages=['remembrance', 'remembrance.native', 'remembrance.injection'],
+        packages=['remembrance', 'remembrance.backend', 'remembrance.native', 'remembrance.injection'],
         url='https://github.com/Zeta314/remembrance',
         license='MIT',
         author='Zeta314',
@@ -0,0 +1,54 @@
+import mmap
+import random
+import sys
+
+import pytest
+
+PAGE_SIZE = mmap.PAGESIZE
+# Pages of the test area, and the one made unreadable in the middle of it
+AREA_PAGES = 16
+HOLE_PAGE = 7
+
+
+class Area:
+    """ Pages of random data allocated in the current process, one of them not accessible. """
+
+    def __init__(self, address: int, data: bytes):
+        self.address = address
+        self.data = data
+
+    @property
+    def hole(self) -> (int, int):
+        """ The (start, end) range of the unreadable page. """
+        start = self.address + HOLE_PAGE * PAGE_SIZE
+        return start, start + PAGE_SIZE
+
+    @property
+    def end(self) -> int:
+        return self.address + len(self.data)
+
+
+@pytest.fixture
+def memory():
+    if not sys.platform.startswith('linux'):
+        pytest.skip("Needs the current process memory (Linux backend)")
+
+    from remembrance.memory import Memory
+
+    memory = Memory()
+    yield memory
+    memory.close()
+
+
+@pytest.fixture
+def area(memory):
+    from remembrance.memory import MemoryFreeType, MemoryProtection
+
+    size = AREA_PAGES * PAGE_SIZE
+    address = memory.allocate(size, MemoryProtection.PAGE_READWRITE)
+    data = random.Random(address).randbytes(size)
+    memory.write(address, data)
+    memory.protect(address + HOLE_PAGE * PAGE_SIZE, PAGE_SIZE, MemoryProtection.PAGE_NOACCESS)
+
+    yield Area(address, data)
+    memory.free(address, size, MemoryFreeType.MEM_RELEASE)
@@ -0,0 +1,112 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import PAGE_SIZE
+from remembrance.async_memory import AsyncMemory
+from remembrance.memory import MemoryProtection
+from remembrance.pattern import Pattern
+
+
+class BlockingMemory:
+    """ A Memory stand-in whose reads block until they're let go, recording how many run at once. """
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+        self.running = self.most_running = 0
+        self.lock = threading.Lock()
+
+    def read(self, address: int, size: int) -> bytes:
+        with self.lock:
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+
+        self.started.release()
+        self.release.wait(5)
+        with self.lock:
+            self.running -= 1
+
+        return bytes(size)
+
+
+def test_scan_matches_memory_scan(memory, area):
+    pattern = Pattern.compile(area.data[100:104].hex(' '))
+    instance = area.data[100:104]
+    for page in (3, 6, 9, 12):
+        memory.write(area.address + page * PAGE_SIZE - 2, instance)
+    # Readable hits sharing their chunks with the page made unreadable below
+    for offset in (11 * PAGE_SIZE + 8, 13 * PAGE_SIZE + 50):
+        memory.write(area.address + offset, instance)
+
+    # A page that turns unreadable after the region map was cached: the chunk reading it is read partially
+    memory.regions(refresh=True)
+    memory.backend.protect(area.address + 12 * PAGE_SIZE, PAGE_SIZE, MemoryProtection.PAGE_NOACCESS)
+
+    async_memory = AsyncMemory(memory, max_concurrency=3)
+    for overlapped in (True, False):
+        expected = list(memory.scan(pattern, area.address, len(area.data), chunk_size=2 * PAGE_SIZE,
+                                    overlapped=overlapped, refresh=False))
+        hits = asyncio.run(async_memory.scan(pattern, area.address, len(area.data), chunk_size=2 * PAGE_SIZE,
+                                             overlapped=overlapped, refresh=False))
+
+        assert area.address + 100 in expected and area.address + 9 * PAGE_SIZE - 2 in expected
+        assert area.address + 12 * PAGE_SIZE - 2 not in expected
+        assert area.address + 11 * PAGE_SIZE + 8 in expected and area.address + 13 * PAGE_SIZE + 50 in expected
+        assert hits == expected
+
+
+def test_read(memory, area):
+    async_memory = AsyncMemory(memory)
+    assert asyncio.run(async_memory.read(area.address + 10, 20)) == area.data[10:30]
+
+    with pytest.raises(OSError):
+        asyncio.run(async_memory.read(area.hole[0], 16))
+
+
+def test_cancelled_call_keeps_its_slot():
+    memory = BlockingMemory()
+    executor = ThreadPoolExecutor(max_workers=4)
+    async_memory = AsyncMemory(memory, max_concurrency=1, executor=executor)
+
+    async def run():
+        first = asyncio.ensure_future(async_memory.read(0, 1))
+        await asyncio.get_running_loop().run_in_executor(None, memory.started.acquire)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        # The first read still runs in its thread: the second one must wait for it
+        second = asyncio.ensure_future(async_memory.read(0, 2))
+        await asyncio.sleep(0.1)
+        assert memory.running == 1 and not second.done()
+
+        memory.release.set()
+        assert await second == bytes(2)
+
+    asyncio.run(run())
+    executor.shutdown()
+    assert memory.most_running == 1
+
+
+def test_cancelled_waiting_call_never_runs():
+    memory = BlockingMemory()
+    executor = ThreadPoolExecutor(max_workers=4)
+    async_memory = AsyncMemory(memory, max_concurrency=1, executor=executor)
+
+    async def run():
+        first = asyncio.ensure_future(async_memory.read(0, 1))
+        second = asyncio.ensure_future(async_memory.read(0, 2))
+        await asyncio.get_running_loop().run_in_executor(None, memory.started.acquire)
+        second.cancel()
+        memory.release.set()
+        assert await first == bytes(1)
+
+        with pytest.raises(asyncio.CancelledError):
+            await second
+
+    asyncio.run(run())
+    executor.shutdown()
+    assert not memory.started.acquire(timeout=0.1)
@@ -0,0 +1,71 @@
+import threading
+
+from remembrance.buffer import MIN_BUFFER_SIZE, SIZE_CLASS_STEPS, BufferPool
+
+
+def test_size_classes():
+    pool = BufferPool()
+    for size in list(range(1, 70000, 251)) + [(4 << 20) + 31, (16 << 20) + 4095, 100 << 20]:
+        buffer = pool.acquire(size)
+        assert len(buffer) >= size and len(buffer) % MIN_BUFFER_SIZE == 0
+        # A buffer is never much larger than requested (a power of two class could double it)
+        assert len(buffer) - size < max(MIN_BUFFER_SIZE, len(buffer) // SIZE_CLASS_STEPS)
+
+
+def test_reuse():
+    pool = BufferPool()
+    with pool.borrow((4 << 20) + 31) as view:
+        assert view.nbytes == (4 << 20) + 31
+    assert pool.allocations == 1 and pool.pooled_bytes == (4 << 20) + (1 << 19)
+
+    # Any size of the same class reuses the buffer
+    with pool.borrow((4 << 20) + 100000) as view:
+        view[-1:] = b'\x01'
+    assert pool.allocations == 1 and pool.reuses == 1
+
+    with pool.borrow(1 << 20):
+        pass
+    assert pool.allocations == 2
+
+
+def test_large_buffers_are_exact():
+    pool = BufferPool(max_pooled_bytes=1 << 20)
+    buffer = pool.acquire((1 << 20) + 1)
+    assert len(buffer) == (1 << 20) + 1
+
+    pool.release(buffer)
+    assert pool.pooled_bytes == 0
+
+
+def test_max_pooled_bytes():
+    pool = BufferPool(max_pooled_bytes=3 * MIN_BUFFER_SIZE)
+    buffers = [pool.acquire(MIN_BUFFER_SIZE) for _ in range(5)]
+    for buffer in buffers:
+        pool.release(buffer)
+
+    assert pool.pooled_bytes == 3 * MIN_BUFFER_SIZE
+    pool.clear()
+    assert pool.pooled_bytes == 0
+
+
+def test_foreign_buffers_are_dropped():
+    pool = BufferPool()
+    pool.release(bytearray(MIN_BUFFER_SIZE + 1))
+    assert pool.pooled_bytes == 0
+
+
+def test_threads():
+    pool = BufferPool()
+
+    def borrow():
+        for size in range(1000, 200000, 7919):
+            with pool.borrow(size) as view:
+                view[:] = bytes(size)
+
+    threads = [threading.Thread(target=borrow) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert pool.allocations + pool.reuses == 4 * len(range(1000, 200000, 7919))
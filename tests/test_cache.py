@@ -0,0 +1,153 @@
+import threading
+
+import pytest
+
+from conftest import PAGE_SIZE
+from remembrance.cache import CachedMemory
+from remembrance.memory import MemoryArea, MemoryFreeType, MemoryProtection
+
+
+@pytest.fixture
+def cached(memory):
+    return CachedMemory(memory, max_size=8 * PAGE_SIZE, max_read_ahead=0)
+
+
+def test_hits(cached, area):
+    address = area.address + PAGE_SIZE + 100
+    assert cached.read(address, 200) == area.data[PAGE_SIZE + 100:PAGE_SIZE + 300]
+    assert (cached.hits, cached.misses, cached.size) == (0, 1, PAGE_SIZE)
+
+    # Across a page boundary: one page is cached already
+    assert cached.read(address + PAGE_SIZE - 200, 400) == area.data[2 * PAGE_SIZE - 100:2 * PAGE_SIZE + 300]
+    assert (cached.hits, cached.misses) == (1, 2)
+
+    buffer = bytearray(300)
+    assert cached.read_into(address, buffer, 100, 200) == 200
+    assert buffer == bytes(100) + area.data[PAGE_SIZE + 100:PAGE_SIZE + 300]
+    assert (cached.hits, cached.misses) == (2, 2)
+
+
+def test_eviction(cached, area):
+    for page in range(6):
+        cached.read(area.address + page * PAGE_SIZE, 1)
+    for page in range(8, 12):
+        cached.read(area.address + page * PAGE_SIZE, 1)
+
+    assert cached.size == cached.max_size and cached.evictions == 2
+    # The least recently used pages went first
+    cached.reset_statistics()
+    cached.read(area.address + 2 * PAGE_SIZE, 1)
+    cached.read(area.address, 1)
+    assert (cached.hits, cached.misses) == (1, 1)
+
+
+def test_generation_invalidation(memory, cached, area):
+    address = area.address + 3 * PAGE_SIZE
+    cached.read(address, 16)
+
+    # Written behind the cache's back: the cached data is stale until invalidated
+    memory.write(address, b'\x11' * 16)
+    assert cached.read(address, 16) == area.data[3 * PAGE_SIZE:3 * PAGE_SIZE + 16]
+
+    cached.invalidate()
+    assert cached.generation == 1 and cached.size == 0
+    assert cached.read(address, 16) == b'\x11' * 16
+
+
+def test_range_invalidation(memory, cached, area):
+    for page in range(4):
+        cached.read(area.address + page * PAGE_SIZE, 16)
+    memory.write(area.address + PAGE_SIZE, b'\x22' * 16)
+    memory.write(area.address + 2 * PAGE_SIZE, b'\x22' * 16)
+
+    # Only the pages overlapping the range are forgotten
+    cached.invalidate(area.address + PAGE_SIZE + 10, 1)
+    assert cached.generation == 0 and cached.size == 3 * PAGE_SIZE
+    assert cached.read(area.address + PAGE_SIZE, 16) == b'\x22' * 16
+    assert cached.read(area.address + 2 * PAGE_SIZE, 16) == area.data[2 * PAGE_SIZE:2 * PAGE_SIZE + 16]
+
+
+def test_write_through(memory, cached, area):
+    address = area.address + 2 * PAGE_SIZE - 8
+    cached.read(address - 100, 50)
+
+    # The write crosses from a cached page into an uncached one
+    cached.write(address, b'\x33' * 16)
+    assert memory.read(address, 16) == b'\x33' * 16
+    assert cached.read(address - 8, 32) == area.data[2 * PAGE_SIZE - 16:2 * PAGE_SIZE - 8] + b'\x33' * 16 + \
+        area.data[2 * PAGE_SIZE + 8:2 * PAGE_SIZE + 16]
+    assert cached.hits == 1
+
+
+def test_bypass(memory, cached, area):
+    volatile = area.address + 4 * PAGE_SIZE + 64
+    cached.add_volatile(volatile, 8)
+
+    memory.write(volatile, b'\x44' * 8)
+    assert cached.read(volatile - 4, 8) == area.data[4 * PAGE_SIZE + 60:4 * PAGE_SIZE + 64] + b'\x44' * 4
+    memory.write(volatile, b'\x55' * 8)
+    assert cached.read(volatile, 8) == b'\x55' * 8
+    # The rest of the page is cached as usual
+    assert cached.read(volatile + 8, 8) == area.data[4 * PAGE_SIZE + 72:4 * PAGE_SIZE + 80]
+    assert (cached.bypasses, cached.misses, cached.size) == (2, 1, PAGE_SIZE)
+
+    cached.remove_volatile(volatile, 8)
+    assert cached.read(volatile, 8) == b'\x55' * 8
+    assert cached.bypasses == 2 and cached.hits == 1
+
+    memory.write(volatile, b'\x66' * 8)
+    buffer = bytearray(8)
+    assert cached.read(volatile, 8, cache=False) == b'\x66' * 8
+    assert cached.read_into(volatile, buffer, cache=False) == 8 and buffer == b'\x66' * 8
+    assert cached.bypasses == 4
+
+
+def test_unreadable(cached, area):
+    hole_start, hole_end = area.hole
+    with pytest.raises(OSError):
+        cached.read(hole_start - 10, 20)
+
+    assert cached.read(hole_end, 10) == area.data[hole_end - area.address:hole_end - area.address + 10]
+
+
+def test_protect(cached, area):
+    address = area.address + 2 * PAGE_SIZE
+    cached.read(address, 16)
+
+    # The cached page isn't served once it can't be read anymore
+    assert cached.protect(address, PAGE_SIZE, MemoryProtection.PAGE_NOACCESS) == MemoryProtection.PAGE_READWRITE
+    assert cached.size == 0
+    with pytest.raises(OSError):
+        cached.read(address, 16)
+
+    cached.protect(address, PAGE_SIZE, MemoryProtection.PAGE_READWRITE)
+    assert cached.read(address, 16) == area.data[2 * PAGE_SIZE:2 * PAGE_SIZE + 16]
+
+
+def test_memory_area(memory, cached):
+    area = MemoryArea(cached, memory.allocate(2 * PAGE_SIZE, MemoryProtection.PAGE_READWRITE), 2 * PAGE_SIZE)
+    area.write(b'\x77' * 16, 100)
+    assert area.read(100, 16) == b'\x77' * 16 and cached.size == PAGE_SIZE
+
+    area.protect(MemoryProtection.PAGE_READONLY)
+    assert cached.size == 0 and area.read(100, 16) == b'\x77' * 16
+
+    cached.read(area.base_address + PAGE_SIZE, 16)
+    area.free(MemoryFreeType.MEM_RELEASE)
+    assert cached.size == 0
+    with pytest.raises(OSError):
+        cached.read(area.base_address, 16)
+
+
+def test_concurrent_bypasses(cached, area):
+    def read():
+        for _ in range(500):
+            cached.read(area.address, 8, cache=False)
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cached.bypasses == 2000
@@ -0,0 +1,95 @@
+import random
+import struct
+
+import pytest
+
+from remembrance.exception import PatternException
+from remembrance.pattern import Pattern
+
+numpy = pytest.importorskip('numpy')
+
+SEED = 2024
+BASE_ADDRESS = 0x140001000
+# Displacements planted in the data, the negative ones included
+DISPLACEMENTS = [0, 1, -1, 0x7FFFFFFF, -0x80000000, 0x1234, -0x1234, 1 << 20]
+
+
+def plant(instructions: list) -> (bytes, list):
+    """ Random padding (never holding the opcodes) with instructions planted in it. """
+    generator = random.Random(SEED)
+    data, offsets = bytearray(), []
+    for instruction in instructions:
+        data += bytes(generator.choice(b'\x00\x11\x22\x33\xcc') for _ in range(generator.randint(1, 40)))
+        offsets.append(len(data))
+        data += instruction
+
+    return bytes(data), offsets
+
+
+def test_rip_relative():
+    pattern = Pattern.compile("48 8B 05 <disp:4> 48 85 C0")
+    assert pattern.captures == {'disp': (3, 4)}
+
+    data, offsets = plant([b'\x48\x8b\x05' + struct.pack('<i', displacement) + b'\x48\x85\xc0'
+                           for displacement in DISPLACEMENTS])
+    hits = pattern.match_all(data)
+    assert list(hits) == offsets
+
+    assert pattern.extract(data, hits, 'disp').tolist() == DISPLACEMENTS
+    assert pattern.extract(data, hits, 'disp', signed=False).tolist() == [displacement & 0xFFFFFFFF
+                                                                          for displacement in DISPLACEMENTS]
+
+    # The displacement is relative to the end of the instruction, right after the capture here
+    targets = pattern.resolve_relative(data, hits, 'disp', BASE_ADDRESS)
+    assert targets.dtype == numpy.uint64
+    assert targets.tolist() == [BASE_ADDRESS + offset + 7 + displacement
+                                for offset, displacement in zip(offsets, DISPLACEMENTS)]
+
+
+def test_relative_call_instruction_end():
+    # lea rcx, [rip + disp32] followed by call rel32: both are resolved from the end of their own instruction
+    pattern = Pattern.compile("48 8D 0D <string:4> E8 <function:4>")
+    assert pattern.captures == {'string': (3, 4), 'function': (8, 4)}
+
+    displacements = [displacement // 2 for displacement in DISPLACEMENTS]
+    data, offsets = plant([b'\x48\x8d\x0d' + struct.pack('<i', displacement) + b'\xe8' +
+                           struct.pack('<i', -displacement - 5) for displacement in displacements])
+    hits = pattern.match_all(data)
+    assert list(hits) == offsets
+
+    strings = pattern.resolve_relative(data, hits, 'string', BASE_ADDRESS, instruction_end=7)
+    functions = pattern.resolve_relative(data, hits, 'function', BASE_ADDRESS)
+    assert strings.tolist() == [BASE_ADDRESS + offset + 7 + displacement
+                                for offset, displacement in zip(offsets, displacements)]
+    assert functions.tolist() == [BASE_ADDRESS + offset + 12 - displacement - 5
+                                  for offset, displacement in zip(offsets, displacements)]
+
+
+def test_expression_captures():
+    pattern = Pattern.compile("E8 <target:4> [0-2] (C3|CC)")
+    assert pattern.captures == {'target': (1, 4)}
+
+    data, offsets = plant([b'\xe8' + struct.pack('<i', displacement) + b'\x00' * (index % 3) + b'\xc3'
+                           for index, displacement in enumerate(DISPLACEMENTS)])
+    hits = list(pattern.finditer(data, overlapped=False))
+    assert hits == offsets
+    assert pattern.extract(data, hits, 'target').tolist() == DISPLACEMENTS
+    assert pattern.resolve_relative(data, hits, 'target', BASE_ADDRESS).tolist() == \
+        [BASE_ADDRESS + offset + 5 + displacement for offset, displacement in zip(offsets, DISPLACEMENTS)]
+
+
+def test_little_endian_captures():
+    # The slot order is reversed along with the bytes
+    pattern = Pattern.compile("C3 <value:2> E8", little_endian=True)
+    assert pattern.captures == {'value': (1, 2)}
+
+    data, offsets = plant([b'\xe8' + struct.pack('<h', -2) + b'\xc3'])
+    assert pattern.extract(data, pattern.match_all(data), 'value').tolist() == [-2]
+    assert pattern.extract(data, pattern.match_all(data), 'value', byteorder='big').tolist() == [-257]
+
+
+@pytest.mark.parametrize("text", ["4 <value:4>", "E8 <value:4> <value:2>", "E8 <value:0>", "E8 <value:4",
+                                  "E8 [0-2] <value:4>", "(E8 <value:4>|E9)"])
+def test_invalid_captures(text):
+    with pytest.raises(PatternException):
+        Pattern.compile(text)
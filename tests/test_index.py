@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from remembrance import index as index_module
+from remembrance.index import SuffixIndex
+from remembrance.pattern import Pattern
+
+SEED = 1357
+
+
+def corpus(seed: int, size: int = 20000) -> bytes:
+    """ Random data from a small alphabet, with long repeats. """
+    generator = random.Random(seed)
+    data = bytearray(generator.choice(b'\x00\x48\x8b\x05\xc3') for _ in range(size))
+    data[size // 2:size // 2 + 500] = data[1000:1500]
+    return bytes(data)
+
+
+def naive_suffixes(data: bytes) -> list:
+    return sorted(range(len(data)), key=lambda offset: data[offset:])
+
+
+@pytest.mark.parametrize("data", [b'', b'a', b'banana', b'\x00' * 100, corpus(SEED, 3000)])
+def test_suffix_array(data):
+    assert SuffixIndex.build(data).suffixes.tolist() == naive_suffixes(data)
+
+
+def test_suffix_array_two_keys(monkeypatch):
+    # Buffers too large for a single int64 sort key are sorted on both ranks
+    data = corpus(SEED + 1, 3000)
+    monkeypatch.setattr(index_module, '_MAX_PACKED_SIZE', 0)
+    assert SuffixIndex.build(data).suffixes.tolist() == naive_suffixes(data)
+
+
+def test_locate_and_count():
+    data = corpus(SEED)
+    index = SuffixIndex.build(data, base_address=0x1000)
+
+    for text in ["48 8B 05", "48 ?? 05 C3", "4? 8B", "?? ?? C3 [0-2] 00"]:
+        pattern = Pattern.compile(text)
+        expected = pattern.match_all(data).tolist()
+        assert index.locate(pattern).tolist() == expected
+        assert index.count(pattern) == len(expected)
+
+    assert index.count(b'\x48\x8b') == data.count(b'\x48\x8b')
+    assert index.count(b'\xff') == 0
+
+
+def test_unique_signature():
+    data = corpus(SEED)
+    index = SuffixIndex.build(data, base_address=0x1000)
+
+    address = 0x1000 + 3000
+    signature = index.unique_signature(address)
+    assert index.count(Pattern.compile(signature)) == 1
+    assert Pattern.compile(signature).match(data) == 3000
+
+    # Inside the repeated block, no signature is short enough
+    assert index.unique_signature(0x1000 + 1100, max_size=64) is None
+
+    with pytest.raises(ValueError):
+        index.unique_signature(0)
+
+
+def test_save_load(tmp_path):
+    data = corpus(SEED)
+    index = SuffixIndex.build(data)
+    path = str(tmp_path / 'index.bin')
+    index.save(path)
+
+    loaded = SuffixIndex.load(path, data)
+    assert loaded.suffixes.tolist() == index.suffixes.tolist()
+    assert loaded.lcp.tolist() == index.lcp.tolist()
+
+    with pytest.raises(ValueError):
+        SuffixIndex.load(path, data[:-1] + b'\x01')
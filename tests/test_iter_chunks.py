@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+from conftest import PAGE_SIZE
+
+
+def chunks(memory, area, **kwargs) -> list:
+    return [(position, bytes(view)) for position, view in
+            memory.iter_chunks(address=area.address, size=len(area.data), **kwargs)]
+
+
+def expected_chunks(area, chunk_size: int, overlap: int) -> list:
+    """ The chunks of the readable runs of the area, around its hole. """
+    hole_start, hole_end = area.hole
+    expected = []
+    for start, end in ((area.address, hole_start), (hole_end, area.end)):
+        for position in range(start, end, chunk_size):
+            stop = min(position + chunk_size + overlap, end)
+            expected.append((position, area.data[position - area.address:stop - area.address]))
+
+    return expected
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+@pytest.mark.parametrize("chunk_size, overlap", [(PAGE_SIZE, 0), (3 * PAGE_SIZE, 100), (1000, 7), (1 << 20, 0)])
+def test_chunk_boundaries(memory, area, prefetch, chunk_size, overlap):
+    # The overlap is clipped at the hole, the first chunk after it starts right at its end
+    assert chunks(memory, area, chunk_size=chunk_size, overlap=overlap, prefetch=prefetch) == \
+        expected_chunks(area, chunk_size, overlap)
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_unaligned_range(memory, area, prefetch):
+    address = area.address + 100
+    hole_start, _ = area.hole
+    found = [(position, bytes(view)) for position, view in
+             memory.iter_chunks(address=address, size=hole_start - address - 50, chunk_size=PAGE_SIZE, overlap=10,
+                                prefetch=prefetch)]
+
+    assert [position for position, _ in found] == list(range(address, hole_start - 50, PAGE_SIZE))
+    assert b''.join(data[:PAGE_SIZE] for _, data in found) == area.data[100:hole_start - area.address - 50]
+    assert len(found[-1][1]) == hole_start - 50 - found[-1][0]
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_filter(memory, area, prefetch):
+    hole_start, _ = area.hole
+    found = [position for position, _ in memory.iter_chunks(lambda region: region[0] < hole_start, area.address,
+                                                            len(area.data), PAGE_SIZE, prefetch=prefetch)]
+    assert found == list(range(area.address, hole_start, PAGE_SIZE))
+
+
+def test_unexpected_hole(memory, area):
+    from remembrance.memory import MemoryProtection
+
+    # Unreadable since the regions were walked: the chunk is skipped
+    address = area.address + 2 * PAGE_SIZE
+    iterator = memory.iter_chunks(address=area.address, size=len(area.data), chunk_size=PAGE_SIZE)
+    assert next(iterator)[0] == area.address
+    memory.backend.protect(address, PAGE_SIZE, MemoryProtection.PAGE_NOACCESS)
+    try:
+        found = [position for position, _ in iterator]
+    finally:
+        memory.backend.protect(address, PAGE_SIZE, MemoryProtection.PAGE_READWRITE)
+
+    assert address not in found and address + PAGE_SIZE in found
+
+
+def test_early_exit(memory, area):
+    threads = threading.active_count()
+    iterator = memory.iter_chunks(address=area.address, size=len(area.data), chunk_size=256)
+    for index, _ in enumerate(iterator):
+        if index == 3:
+            break
+
+    # The prefetch thread is waiting for a free buffer until the generator is closed
+    assert threading.active_count() == threads + 1
+    iterator.close()
+    assert threading.active_count() == threads
+
+    # The buffers went back to the pool and can be used again
+    assert chunks(memory, area, chunk_size=PAGE_SIZE) == expected_chunks(area, PAGE_SIZE, 0)
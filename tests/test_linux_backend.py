@@ -0,0 +1,103 @@
+import errno
+import os
+import subprocess
+import sys
+
+import pytest
+
+if not sys.platform.startswith('linux'):
+    pytest.skip("Linux backend only", allow_module_level=True)
+
+from remembrance.backend import linux  # noqa: E402
+from remembrance.backend.linux import LinuxMemoryBackend  # noqa: E402
+from remembrance.memory import MemoryAllocationType, MemoryFreeType, MemoryProtection, MemoryState  # noqa: E402
+
+
+@pytest.fixture
+def parse_count(monkeypatch):
+    counter = [0]
+    parse_maps = linux._parse_maps
+
+    def counting_parse_maps(content):
+        counter[0] += 1
+        return parse_maps(content)
+
+    monkeypatch.setattr(linux, '_parse_maps', counting_parse_maps)
+    return counter
+
+
+def test_remote_process_unsupported():
+    child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+    try:
+        backend = LinuxMemoryBackend(child.pid)
+        with pytest.raises(OSError) as raised:
+            backend.allocate(4096, MemoryProtection.PAGE_READWRITE, MemoryAllocationType.MEM_COMMIT)
+        assert raised.value.errno == errno.EOPNOTSUPP
+
+        with pytest.raises(OSError):
+            backend.protect(0x10000, 4096, MemoryProtection.PAGE_READONLY)
+
+        with pytest.raises(OSError):
+            backend.free(0x10000, 4096, MemoryFreeType.MEM_RELEASE)
+
+        backend.close()
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_query_reuses_maps(parse_count):
+    backend = LinuxMemoryBackend(os.getpid(), maps_ttl=60)
+    address = id(backend)
+
+    region = backend.query(address)
+    assert region[0] <= address < region[0] + region[1]
+    assert backend.query(address) == region
+    assert parse_count[0] == 1
+
+    # Region walks always parse the maps again, and the queries reuse them
+    assert any(start <= address < start + size for start, size, *_ in backend.regions())
+    backend.query(address)
+    assert parse_count[0] == 2
+
+
+def test_maps_ttl(parse_count):
+    backend = LinuxMemoryBackend(os.getpid(), maps_ttl=0)
+    backend.query(id(backend))
+    backend.query(id(backend))
+    assert parse_count[0] == 2
+
+
+def test_own_changes_drop_maps():
+    backend = LinuxMemoryBackend(os.getpid(), maps_ttl=60)
+    backend.query(id(backend))
+
+    address = backend.allocate(3 * 4096, MemoryProtection.PAGE_READWRITE, MemoryAllocationType.MEM_COMMIT)
+    try:
+        region = backend.query(address)
+        assert region[0] <= address and region[2] == MemoryState.MEM_COMMIT
+        assert region[3] == MemoryProtection.PAGE_READWRITE
+
+        assert backend.protect(address, 4096, MemoryProtection.PAGE_READONLY) == MemoryProtection.PAGE_READWRITE
+        assert backend.query(address)[3] == MemoryProtection.PAGE_READONLY
+    finally:
+        backend.free(address, 3 * 4096, MemoryFreeType.MEM_RELEASE)
+
+    region = backend.query(address)
+    assert region is None or region[2] == MemoryState.MEM_FREE
+
+
+@pytest.mark.parametrize("protection", [0, 0x3, MemoryProtection.PAGE_GUARD, 0x1000])
+def test_unsupported_protection(protection):
+    backend = LinuxMemoryBackend(os.getpid())
+    with pytest.raises(ValueError, match=f"{protection:#x}"):
+        backend.allocate(4096, protection, MemoryAllocationType.MEM_COMMIT)
+
+    address = backend.allocate(4096, MemoryProtection.PAGE_READWRITE, MemoryAllocationType.MEM_COMMIT)
+    try:
+        with pytest.raises(ValueError, match=f"{protection:#x}"):
+            backend.protect(address, 4096, protection)
+
+        assert backend.query(address)[3] == MemoryProtection.PAGE_READWRITE
+    finally:
+        backend.free(address, 4096, MemoryFreeType.MEM_RELEASE)
@@ -0,0 +1,52 @@
+import random
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+
+from remembrance.parallel import match_all_parallel
+from remembrance.pattern import Pattern
+
+SEED = 2468
+CHUNK_SIZE = 4096
+
+TEXTS = [
+    "AA ?? BB",
+    "A? BB ?B",
+    # Variable size expressions, so that a non-overlapped search depends on where each match ends
+    "AA [0-8] BB",
+    "AA (BB | 00 00 00) [1-3] AA",
+]
+
+
+def corpus(seed: int) -> bytes:
+    generator = random.Random(seed)
+    return bytes(generator.choice(b'\xaa\xbb\x00\x1b') for _ in range(10 * CHUNK_SIZE + 123))
+
+
+@pytest.mark.parametrize("overlapped", [True, False])
+@pytest.mark.parametrize("text", TEXTS)
+def test_matches_single_process(text, overlapped):
+    pattern = Pattern.compile(text)
+    data = corpus(SEED)
+    expected = pattern.match_all(data, overlapped)
+
+    assert expected
+    assert match_all_parallel(pattern, data, workers=2, chunk_size=CHUNK_SIZE, overlapped=overlapped) == expected
+    assert match_all_parallel(pattern, data, workers=1, overlapped=overlapped) == expected
+    assert match_all_parallel(pattern, data, workers=2, chunk_size=CHUNK_SIZE, overlapped=overlapped,
+                              max_hits=5) == expected[:5]
+
+
+def test_spawn_shared_memory():
+    pattern = Pattern.compile(TEXTS[2])
+    data = corpus(SEED + 1)
+    expected = pattern.match_all(data, False)
+
+    shared_memory = SharedMemory(create=True, size=len(data))
+    try:
+        shared_memory.buf[:len(data)] = data
+        assert match_all_parallel(pattern, shared_memory, workers=2, chunk_size=CHUNK_SIZE, overlapped=False,
+                                  start_method='spawn') == expected
+    finally:
+        shared_memory.close()
+        shared_memory.unlink()
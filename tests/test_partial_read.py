@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from conftest import PAGE_SIZE
+from remembrance.memory import Memory, MemoryProtection
+
+
+def expected_data(area, start: int, end: int, holes: list) -> bytes:
+    """ The area data of a range, the holes zeroed. """
+    data = bytearray(area.data[start - area.address:end - area.address])
+    for hole_start, hole_end in holes:
+        data[hole_start - start:hole_end - start] = bytes(hole_end - hole_start)
+
+    return bytes(data)
+
+
+def test_full_read_fails(memory, area):
+    with pytest.raises(OSError):
+        memory.read(area.address, len(area.data))
+
+    assert memory.try_read(area.address, len(area.data)) is None
+    assert memory.read(area.address, 100) == area.data[:100]
+
+
+@pytest.mark.parametrize("start_offset, end_offset", [(0, 0), (-100, 100), (10, -10), (PAGE_SIZE // 2, 0)])
+def test_partial_read(memory, area, start_offset, end_offset):
+    hole_start, hole_end = area.hole
+    start, end = hole_start - 2 * PAGE_SIZE + start_offset, hole_end + 2 * PAGE_SIZE + end_offset
+    if start_offset == PAGE_SIZE // 2:
+        start = hole_start + start_offset
+
+    data, holes = memory.read(start, end - start, partial=True)
+    assert holes == [(max(start, hole_start), hole_end)]
+    assert data == expected_data(area, start, end, holes)
+
+
+def test_partial_read_inside_hole(memory, area):
+    hole_start, _ = area.hole
+    assert memory.read(hole_start + 10, 100, partial=True) == (bytes(100), [(hole_start + 10, hole_start + 110)])
+
+
+def test_partial_read_several_holes(memory, area):
+    # A second hole the region map doesn't know about yet
+    memory.regions(refresh=True)
+    second = area.address + 11 * PAGE_SIZE
+    memory.backend.protect(second, 2 * PAGE_SIZE, MemoryProtection.PAGE_NOACCESS)
+
+    data, holes = memory.read(area.address, len(area.data), partial=True)
+    assert holes == [area.hole, (second, second + 2 * PAGE_SIZE)]
+    assert data == expected_data(area, area.address, area.end, holes)
+
+
+def test_unreadable_cache(memory, area):
+    memory.read(area.address, len(area.data), partial=True)
+    assert memory.unreadable == [area.hole]
+
+    # Known holes are skipped without trying them again, until they're forgotten
+    hole_start, hole_end = area.hole
+    memory.backend.protect(hole_start, PAGE_SIZE, MemoryProtection.PAGE_READWRITE)
+    data, holes = memory.read(hole_start - 10, 20, partial=True)
+    assert holes == [(hole_start, hole_start + 10)]
+
+    memory.forget_unreadable()
+    assert memory.unreadable == []
+    data, holes = memory.read(hole_start - 10, 20, partial=True)
+    assert holes == [] and data == area.data[hole_start - 10 - area.address:hole_start + 10 - area.address]
+
+
+def test_unreadable_ttl(area):
+    with_cache, without_cache = Memory(unreadable_ttl=0.05), Memory(unreadable_ttl=0)
+    try:
+        without_cache.read(area.address, len(area.data), partial=True)
+        assert without_cache.unreadable == []
+
+        with_cache.read(area.address, len(area.data), partial=True)
+        assert with_cache.unreadable == [area.hole]
+        time.sleep(0.1)
+        assert with_cache.unreadable == []
+    finally:
+        with_cache.close()
+        without_cache.close()
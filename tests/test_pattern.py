@@ -0,0 +1,239 @@
+import random
+import time
+
+import pytest
+
+from remembrance import pattern as pattern_module
+from remembrance.pattern import Pattern, PatternStrategy
+
+SEED = 1234
+
+# Pattern text, strategy selected with NumPy available
+PATTERNS = [
+    ("48 8B 05 11 22 33 44", PatternStrategy.LITERAL),
+    ("AB", PatternStrategy.LITERAL),
+    ("48 8B ?? ?? 5A 3C", PatternStrategy.REGEX),
+    ("?? ?? 48 8B 05", PatternStrategy.REGEX),
+    ("48 8B 05 ?? ??", PatternStrategy.REGEX),
+    ("AA ?? AA", PatternStrategy.REGEX),
+    ("?? 5A 3C 7E 1? 48", PatternStrategy.ANCHOR),
+    ("4? 8B 05 11 ?2 ??", PatternStrategy.ANCHOR),
+    ("4? 8B ?5 ?? 1?", PatternStrategy.VECTOR),
+    ("?A ?A", PatternStrategy.VECTOR),
+    ("?? ?B 3? ??", PatternStrategy.VECTOR),
+]
+
+
+def reference_offsets(pattern: Pattern, data: bytes, overlapped: bool) -> list:
+    """ Every hit, found with Pattern.match_reference only. """
+    offsets, position = [], 0
+    while True:
+        offset = pattern.match_reference(data[position:])
+        if offset is None:
+            return offsets
+
+        offsets.append(position + offset)
+        position += offset + (1 if overlapped else max(pattern.size, 1))
+
+
+def instance(pattern: Pattern, generator: random.Random) -> bytes:
+    """ Random bytes matching a pattern, the wildcard bits drawn at random. """
+    noise = generator.getrandbits(8 * pattern.size) & ~pattern.mask
+    return (pattern.pattern | noise).to_bytes(pattern.size, byteorder=pattern.byteorder)
+
+
+def corpus(pattern: Pattern, seed: int) -> bytes:
+    """ Random data (from a small alphabet, so that partial matches are frequent) with pattern instances. """
+    generator = random.Random(seed)
+    data = bytearray(generator.choice(b'\x00\x05\x11\x48\x8b\xaa\x5a\x3c\x4b') for _ in range(4096))
+    for _ in range(24):
+        position = generator.randrange(len(data) - pattern.size)
+        data[position:position + pattern.size] = instance(pattern, generator)
+
+    # Back to back instances, to check the overlapped and non-overlapped steps
+    position = generator.randrange(len(data) - 3 * pattern.size)
+    for index in range(3):
+        data[position + index * pattern.size:position + (index + 1) * pattern.size] = instance(pattern, generator)
+
+    return bytes(data)
+
+
+@pytest.mark.parametrize("text, strategy", PATTERNS)
+def test_strategy_selection(text, strategy):
+    assert Pattern.compile(text).strategy is strategy
+
+
+@pytest.mark.parametrize("overlapped", [True, False])
+@pytest.mark.parametrize("little_endian", [False, True])
+@pytest.mark.parametrize("text, strategy", PATTERNS)
+def test_finditer_matches_reference(text, strategy, little_endian, overlapped):
+    pattern = Pattern.compile(text, little_endian)
+    for seed in range(3):
+        data = corpus(pattern, SEED + seed)
+        expected = reference_offsets(pattern, data, overlapped)
+
+        assert expected
+        assert list(pattern.finditer(data, overlapped)) == expected
+        assert list(pattern.finditer(memoryview(data), overlapped)) == expected
+        assert list(pattern.match_all(data, overlapped)) == expected
+        assert pattern.match(data) == expected[0]
+
+
+@pytest.mark.parametrize("text, strategy", PATTERNS)
+def test_max_hits(text, strategy):
+    pattern = Pattern.compile(text)
+    data = corpus(pattern, SEED)
+    expected = reference_offsets(pattern, data, True)
+
+    assert list(pattern.finditer(data, max_hits=3)) == expected[:3]
+    assert list(pattern.match_all(data, max_hits=3)) == expected[:3]
+    assert list(pattern.finditer(data, max_hits=0)) == []
+
+
+@pytest.mark.parametrize("text, strategy", PATTERNS)
+def test_no_match(text, strategy):
+    pattern = Pattern.compile(text)
+    assert pattern.match(b'') is None
+    assert list(pattern.finditer(bytes(pattern.size - 1))) == []
+
+
+@pytest.mark.parametrize("overlapped", [True, False])
+@pytest.mark.parametrize("text", ["?? 5A 3? 7E 1? 48", "4? 8B ?5 ?? 1?", "?A ?A"])
+def test_without_numpy(monkeypatch, text, overlapped):
+    monkeypatch.setattr(pattern_module, 'numpy_available', lambda: False)
+    pattern = Pattern.compile(text)
+    assert pattern.strategy in (PatternStrategy.ANCHOR, PatternStrategy.REFERENCE)
+
+    data = corpus(pattern, SEED)
+    assert list(pattern.finditer(data, overlapped)) == reference_offsets(pattern, data, overlapped)
+
+
+def test_reference_strategy():
+    # Known bits outside of the mask can never match
+    pattern = Pattern(0x1FF, 0x0FF, False, 2)
+    assert pattern.strategy is PatternStrategy.REFERENCE
+    assert list(pattern.finditer(b'\x01\xff\x00\xff')) == []
+
+
+def approximate_offsets(pattern: Pattern, data: bytes, max_mismatches: int, overlapped: bool) -> list:
+    """ Every approximate hit, found by counting the mismatching bytes at each offset. """
+    values = pattern.pattern.to_bytes(pattern.size, byteorder=pattern.byteorder)
+    masks = pattern.mask.to_bytes(pattern.size, byteorder=pattern.byteorder)
+
+    hits, offset = [], 0
+    while offset <= len(data) - pattern.size:
+        mismatches = sum(1 for index in range(pattern.size)
+                         if data[offset + index] & masks[index] != values[index] & masks[index])
+        if mismatches <= max_mismatches:
+            hits.append((offset, mismatches))
+            offset += 1 if overlapped else max(pattern.size, 1)
+        else:
+            offset += 1
+
+    return hits
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+@pytest.mark.parametrize("overlapped", [True, False])
+@pytest.mark.parametrize("max_mismatches", [0, 1, 3])
+@pytest.mark.parametrize("text", ["48 8B 05 11 22 33 44", "4? 8B ?5 ?? 1?", "?? 5A 3C 7E 1? 48"])
+def test_finditer_approximate(monkeypatch, text, max_mismatches, overlapped, numpy):
+    if not numpy:
+        monkeypatch.setattr(pattern_module, 'numpy_available', lambda: False)
+
+    pattern = Pattern.compile(text)
+    data = corpus(pattern, SEED)
+    expected = approximate_offsets(pattern, data, max_mismatches, overlapped)
+
+    assert expected
+    assert list(pattern.finditer_approximate(data, max_mismatches, overlapped)) == expected
+    assert list(pattern.finditer_approximate(data, max_mismatches, overlapped, max_hits=2)) == expected[:2]
+
+
+def test_finditer_approximate_long_pattern():
+    # More columns than an 8-bit counter can hold
+    generator = random.Random(SEED)
+    value = bytes(generator.randrange(256) for _ in range(300))
+    pattern = Pattern.compile(value.hex(' '))
+    data = bytearray(generator.randrange(256) for _ in range(2000))
+    data[500:800] = value
+    data[510] ^= 0xFF
+    data[700] ^= 0xFF
+
+    assert list(pattern.finditer_approximate(bytes(data), 2)) == [(500, 2)]
+    assert list(pattern.finditer_approximate(bytes(data), 1)) == []
+    with pytest.raises(ValueError):
+        list(pattern.finditer_approximate(bytes(data), 254))
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+@pytest.mark.parametrize("max_mismatches", [1, 200, 253])
+def test_finditer_approximate_many_mismatches(monkeypatch, max_mismatches, numpy):
+    # Long pattern, most columns mismatching: the counters go way past what 8 bits can hold between two clamps
+    if not numpy:
+        monkeypatch.setattr(pattern_module, 'numpy_available', lambda: False)
+
+    pattern = Pattern.compile('00 ' * 510)
+    data = bytes(4000) + b'\xff' * 1000
+
+    assert list(pattern.finditer_approximate(data, max_mismatches)) == approximate_offsets(pattern, data,
+                                                                                          max_mismatches, True)
+
+
+def random_expression(generator: random.Random, depth: int = 0) -> str:
+    """ A random extended pattern, over a small alphabet so that it matches often. """
+    elements = []
+    for _ in range(generator.randint(1, 4)):
+        kind = generator.choice(['byte', 'byte', 'wildcard', 'jump', 'range'] + (['alternation'] if depth < 2 else []))
+        if kind == 'byte':
+            elements.append(generator.choice(['AA', 'BB', 'CC', 'A?']))
+        elif kind == 'wildcard':
+            elements.append('??')
+        elif kind == 'jump':
+            minimum = generator.randint(0, 3)
+            elements.append(f"[{minimum}-{minimum + generator.randint(0, 6)}]")
+        elif kind == 'range':
+            elements.append('{AA-BB}')
+        else:
+            elements.append('(' + '|'.join(random_expression(generator, depth + 1)
+                                           for _ in range(generator.randint(2, 3))) + ')')
+
+    return ' '.join(elements)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_linear_expression_matches_regex(monkeypatch, seed):
+    generator = random.Random(SEED + seed)
+    text = f"{random_expression(generator)} [0-1] {random_expression(generator)}"
+    data = bytes(generator.choice(b'\xaa\xab\xbb\xcc\x00') for _ in range(600))
+
+    monkeypatch.setattr(pattern_module, 'MAX_EXPRESSION_COMPLEXITY', 1 << 32)
+    regex_expression = Pattern.compile(text)
+    monkeypatch.setattr(pattern_module, 'MAX_EXPRESSION_COMPLEXITY', 0)
+    expression = Pattern.compile(text)
+    assert expression.linear and not regex_expression.linear
+
+    for overlapped in (True, False):
+        assert list(expression.finditer(data, overlapped)) == list(regex_expression.finditer(data, overlapped))
+
+    for offset in expression.finditer(data):
+        assert expression.match_end(data, offset) == regex_expression.match_end(data, offset)
+
+    for size in range(expression.min_size, expression.size + 1):
+        sample = data[size:2 * size]
+        assert expression.match_full(sample) == regex_expression.match_full(sample)
+
+
+def test_linear_expression_time():
+    # The regex engine backtracks through 256 * 256 ways at every "AA": a linear scan takes milliseconds
+    expression = Pattern.compile("AA [0-255] BB [0-255] CC")
+    assert expression.linear
+    data = b'\xaa\xbb' * (1 << 15)
+
+    start = time.perf_counter()
+    assert list(expression.finditer(data)) == []
+    assert list(expression.finditer(data, overlapped=False)) == []
+    assert time.perf_counter() - start < 0.5
+
+    data = data[:1000] + b'\xcc' + data[1000:]
+    assert list(expression.finditer(data, max_hits=2)) == [490, 492]
@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from remembrance import pattern as pattern_module
+from remembrance.pattern import Pattern, PatternSet
+
+SEED = 4321
+
+TEXTS = [
+    "48 8B 05 ?? ?? ?? ?? 48 85 C0",
+    "48 89 05 ?? ?? ?? ?? C3",
+    "8B 05 ?? ?? 48 85",
+    "48 8B 05 ?? 48",
+    "E8 ?? ?? ?? ?? 48 8B 4? 24",
+    "C3",
+    "?? 8? 05",
+]
+
+
+def expected_hits(patterns: dict, data: bytes) -> list:
+    """ Every hit of every pattern, each pattern scanned on its own. """
+    order = {pattern_id: index for index, pattern_id in enumerate(patterns)}
+    hits = [(pattern_id, offset) for pattern_id, pattern in patterns.items() for offset in pattern.finditer(data)]
+    return sorted(hits, key=lambda hit: (hit[1], order[hit[0]]))
+
+
+def corpus(seed: int) -> bytes:
+    """ Random data full of partial matches (the anchors show up all the time). """
+    generator = random.Random(seed)
+    return bytes(generator.choice(b'\x48\x8b\x89\x05\x85\xc0\xc3\xe8\x24\x4c') for _ in range(1 << 16))
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_scan_matches_separate_scans(monkeypatch, numpy):
+    if not numpy:
+        monkeypatch.setattr(pattern_module, 'numpy_available', lambda: False)
+
+    patterns = {f"pattern{index}": Pattern.compile(text) for index, text in enumerate(TEXTS)}
+    pattern_set = PatternSet(patterns)
+    for seed in range(3):
+        data = corpus(SEED + seed)
+        expected = expected_hits(patterns, data)
+
+        assert expected
+        assert pattern_set.scan(data) == expected
+        assert pattern_set.scan(memoryview(data)) == expected
+        assert sorted(pattern_set.finditer(data)) == sorted(expected)
+
+
+def test_pattern_ids():
+    pattern_set = PatternSet(Pattern.compile(text) for text in TEXTS[:2])
+    assert len(pattern_set) == 2 and 0 in pattern_set and 1 in pattern_set
+
+    assert pattern_set.add(Pattern.compile(TEXTS[2])) == 2
+    assert pattern_set.add(Pattern.compile(TEXTS[3]), 'custom') == 'custom'
+    assert pattern_set['custom'].size == 5
+
+    with pytest.raises(ValueError):
+        pattern_set.add(Pattern.compile(TEXTS[4]), 'custom')
+
+
+def test_empty_set():
+    assert PatternSet().scan(corpus(SEED)) == []
+
+
+def repetitive_corpus(seed: int) -> bytes:
+    """
+    Zero pages, pages repeating a short record and random pages, with a repeated record filling most of the first
+    128KB only (where the data isn't sampled when the q-grams are picked).
+    """
+    generator = random.Random(seed)
+    pages = []
+    for _ in range(640):
+        kind = generator.random()
+        if kind < 0.4:
+            pages.append(bytes(4096))
+        elif kind < 0.8:
+            pages.append(generator.randbytes(generator.choice((4, 8))) * (4096 // 8))
+        else:
+            pages.append(generator.randbytes(4096))
+
+    data = bytearray(b''.join(pages))
+    data[10000:120000] = b'\x11\x22\x33\x44' * (110000 // 4)
+    for offset in generator.sample(range(len(data) - 16), 200):
+        data[offset:offset + 8] = generator.choice((b'\x00\x00\x07\x00\x00\x00\x00\x5a',
+                                                    b'\x11\x22\x33\x44\x99\x00\x01\x02'))
+
+    return bytes(data)
+
+
+def test_scan_repetitive():
+    texts = ["00 00 ?? 00 00 00 00 5A", "11 22 33 44 11 ?? 33 44", "11 22 33 44 99 ?? 01", "?? 22 33 44 11",
+             "44 99 00", "00 00 00 00 ?? 5A"]
+    data = repetitive_corpus(SEED)
+    patterns = dict(enumerate(Pattern.compile(text) for text in texts))
+
+    # Patterns taken from the data itself, like the benchmark ones (but not the ones matching all over it)
+    generator = random.Random(SEED)
+    while len(patterns) < len(texts) + 20:
+        offset = generator.randrange(len(data) - 16)
+        pattern = Pattern.compile(' '.join('??' if generator.random() < 0.25 else f"{byte:02X}"
+                                           for byte in data[offset:offset + 16]))
+        if len(pattern.match_all(data, max_hits=1000)) < 1000:
+            patterns[len(patterns)] = pattern
+
+    assert PatternSet(patterns).scan(data) == expected_hits(patterns, data)
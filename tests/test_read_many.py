@@ -0,0 +1,49 @@
+from conftest import AREA_PAGES, HOLE_PAGE, PAGE_SIZE
+
+
+def test_read_many(memory, area):
+    ranges = [(area.address + offset, size) for offset, size in
+              [(0, 16), (20, 8), (100, 1), (PAGE_SIZE - 4, 8), (3 * PAGE_SIZE, 2 * PAGE_SIZE), (50, 10)]]
+
+    for gap in (0, 64, 1 << 20):
+        results = memory.read_many(ranges, gap=gap)
+        assert [bytes(result) for result in results] == \
+            [area.data[address - area.address:address - area.address + size] for address, size in ranges]
+
+
+def test_read_many_unreadable(memory, area):
+    hole_start, hole_end = area.hole
+    ranges = [(hole_start - 64, 32), (hole_start - 8, 16), (hole_start + 100, 4), (hole_end + 8, 8),
+              (area.address, 8), (area.end - 8, 8)]
+
+    # Merged reads crossing the unreadable page are split back: only the ranges inside it fail
+    for gap in (0, 256, 1 << 20):
+        results = memory.read_many(ranges, gap=gap)
+        assert results[1] is None and results[2] is None
+        for index in (0, 3, 4, 5):
+            address, size = ranges[index]
+            assert bytes(results[index]) == area.data[address - area.address:address - area.address + size]
+
+
+def test_read_many_max_size(memory, area):
+    ranges = [(area.address + page * PAGE_SIZE, 16) for page in range(AREA_PAGES) if page != HOLE_PAGE]
+    results = memory.read_many(ranges, gap=PAGE_SIZE, max_size=3 * PAGE_SIZE)
+    assert [bytes(result) for result in results] == \
+        [area.data[address - area.address:address - area.address + 16] for address, _ in ranges]
+
+
+def test_read_many_empty(memory):
+    assert memory.read_many([]) == []
+
+
+def test_read_many_vectored_batches(memory, area):
+    # More ranges than a single process_vm_readv call takes, some of them unreadable
+    ranges = [(area.address + offset, 3) for offset in range(0, len(area.data) - 3, 29)]
+    hole_start, hole_end = area.hole
+    results = memory.read_many(ranges, gap=0)
+
+    for (address, size), result in zip(ranges, results):
+        if address + size > hole_start and address < hole_end:
+            assert result is None
+        else:
+            assert bytes(result) == area.data[address - area.address:address - area.address + size]
@@ -0,0 +1,106 @@
+import pytest
+
+from conftest import HOLE_PAGE, PAGE_SIZE
+from remembrance.memory import MemoryProtection, MemoryState, MemoryType
+from remembrance.region import RegionTable
+
+COMMIT, RESERVE, FREE = MemoryState.MEM_COMMIT, MemoryState.MEM_RESERVE, MemoryState.MEM_FREE
+PRIVATE, IMAGE = MemoryType.MEM_PRIVATE, MemoryType.MEM_IMAGE
+READWRITE, READONLY = MemoryProtection.PAGE_READWRITE, MemoryProtection.PAGE_READONLY
+NOACCESS, GUARD = MemoryProtection.PAGE_NOACCESS, MemoryProtection.PAGE_GUARD
+
+# Adjacent regions, gaps between some of them, and unreadable ones
+REGIONS = [
+    (0x10000, 0x1000, COMMIT, READWRITE, PRIVATE),
+    (0x11000, 0x2000, COMMIT, READONLY, IMAGE),
+    (0x13000, 0x1000, COMMIT, NOACCESS, PRIVATE),
+    (0x14000, 0x1000, COMMIT, READWRITE | GUARD, PRIVATE),
+    (0x15000, 0x1000, RESERVE, 0, PRIVATE),
+    (0x20000, 0x3000, COMMIT, READWRITE | MemoryProtection.PAGE_NOCACHE, PRIVATE),
+    (0x23000, 0x1000, COMMIT, READWRITE, IMAGE),
+    (0x30000, 0x1000, COMMIT, MemoryProtection.PAGE_EXECUTE_READ, IMAGE),
+]
+
+
+@pytest.fixture
+def table():
+    return RegionTable.build(REGIONS)
+
+
+def test_build(table):
+    assert len(table) == len(REGIONS)
+    assert list(table) == REGIONS
+    assert [table[index] for index in range(len(table))] == REGIONS
+    assert table.total_size == sum(region[1] for region in REGIONS)
+    assert len(RegionTable.build([])) == 0
+
+
+@pytest.mark.parametrize("address, index", [
+    (0x0, -1), (0xFFFF, -1), (0x10000, 0), (0x10FFF, 0), (0x11000, 1), (0x12FFF, 1), (0x15FFF, 4), (0x16000, -1),
+    (0x1FFFF, -1), (0x20000, 5), (0x23FFF, 6), (0x24000, -1), (0x30FFF, 7), (0x31000, -1), (1 << 63, -1),
+])
+def test_find(table, address, index):
+    assert table.find(address) == index
+    assert table.region(address) == (None if index < 0 else REGIONS[index])
+
+
+def test_filter(table):
+    assert list(table.filter(state=RESERVE)) == [REGIONS[4]]
+    assert list(table.filter(region_type=IMAGE)) == [REGIONS[1], REGIONS[6], REGIONS[7]]
+    # Compared without the protection flags
+    assert list(table.filter(protection=READWRITE)) == [REGIONS[0], REGIONS[3], REGIONS[5], REGIONS[6]]
+    assert list(table.filter(COMMIT, [READONLY, NOACCESS])) == REGIONS[1:3]
+
+
+@pytest.mark.parametrize("start, stop, expected", [
+    (None, None, slice(0, 8)), (0x11000, None, slice(1, 8)), (0x10FFF, None, slice(0, 8)),
+    (0x11FFF, 0x13001, slice(1, 3)), (0x16000, 0x20000, slice(0, 0)), (0x15800, 0x20001, slice(4, 6)),
+    (None, 0x10000, slice(0, 0)), (0x31000, None, slice(0, 0)),
+])
+def test_filter_range(table, start, stop, expected):
+    # The regions ending after start and starting before stop
+    assert list(table.filter(start=start, stop=stop)) == REGIONS[expected]
+
+
+def test_readable(table):
+    # No access, guard pages and reserved regions are left out, NOCACHE regions are kept
+    assert list(table.readable()) == [REGIONS[index] for index in (0, 1, 5, 6, 7)]
+    assert list(table.readable(0x10800, 0x20001)) == [REGIONS[index] for index in (0, 1, 5)]
+    assert list(table.readable(0x12000, 0x1F000)) == [REGIONS[1]]
+
+
+@pytest.mark.parametrize("start, stop, expected", [
+    (None, None, [(0x10000, 0x16000), (0x20000, 0x24000), (0x30000, 0x31000)]),
+    (0x10800, 0x22000, [(0x10800, 0x16000), (0x20000, 0x22000)]),
+    (0x16000, 0x20000, []), (0x23FFF, 0x30001, [(0x23FFF, 0x24000), (0x30000, 0x30001)]),
+])
+def test_runs(table, start, stop, expected):
+    # Adjacent regions are merged, gaps split the runs
+    assert table.runs(start, stop) == expected
+
+
+def test_readable_runs(table):
+    assert table.readable().runs() == [(0x10000, 0x13000), (0x20000, 0x24000), (0x30000, 0x31000)]
+    assert table.readable(0x12000, 0x20800).runs(0x12000, 0x20800) == [(0x12000, 0x13000), (0x20000, 0x20800)]
+
+
+def test_memory_regions(memory, area):
+    table = memory.regions()
+    assert memory.regions() is table
+
+    index = table.find(area.address)
+    assert index >= 0 and table.bases[index] <= area.address
+    hole_start, hole_end = area.hole
+    assert table.region(hole_start)[3] == NOACCESS
+    assert table.region(hole_end)[3] == READWRITE
+
+    readable = table.readable(area.address, area.end)
+    assert all(readable.find(address) >= 0 for address in range(area.address, hole_start, PAGE_SIZE))
+    assert readable.find(hole_start) == -1 and readable.find(hole_end) >= 0
+
+    # Protecting through the Memory object drops the cached table
+    address = area.address + (HOLE_PAGE + 2) * PAGE_SIZE
+    memory.protect(address, PAGE_SIZE, READONLY)
+    assert memory.regions() is not table
+    assert memory.regions().region(address)[3] == READONLY
+    assert memory.regions(refresh=True).region(address)[3] == READONLY
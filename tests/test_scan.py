@@ -0,0 +1,108 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import PAGE_SIZE
+from remembrance.pattern import Pattern
+
+SEED = 9753
+CHUNK_SIZE = 3 * PAGE_SIZE + 100
+
+TEXTS = [
+    "AA BB CC DD",
+    "A? ?? CC ?D EE",
+    "AA [0-6] DD",
+]
+
+
+def plant(memory, area, pattern: Pattern, seed: int) -> bytes:
+    """ Write pattern instances all over the area, around the chunk seams and the unreadable page too. """
+    generator = random.Random(seed)
+    data = bytearray(area.data)
+    hole_start, hole_end = area.hole
+
+    offsets = [generator.randrange(len(data) - 16) for _ in range(30)]
+    offsets += [seam + delta for seam in range(CHUNK_SIZE, len(data) - 16, CHUNK_SIZE) for delta in (-5, -2, 0)]
+    offsets += [hole_start - area.address + delta for delta in (-20, -3)] + [hole_end - area.address + 1]
+
+    # Back to back instances
+    instance = bytes.fromhex(pattern_text(pattern))
+    offsets += [2000 + index * len(instance) for index in range(4)]
+    for offset in offsets:
+        if not (offset + len(instance) > hole_start - area.address and offset < hole_end - area.address):
+            data[offset:offset + len(instance)] = instance
+
+    # A short expression match, followed by another one starting before the longest match would end
+    data[1000:1009] = bytes.fromhex('AA DD AA 00 00 00 00 00 DD')
+
+    for page in range(0, len(data), PAGE_SIZE):
+        if area.address + page != hole_start:
+            memory.write(area.address + page, bytes(data[page:page + PAGE_SIZE]))
+
+    return bytes(data)
+
+
+def pattern_text(pattern) -> str:
+    """ Bytes matching a pattern of TEXTS (the wildcards filled in with zeros, the jumps at their shortest). """
+    text = getattr(pattern, 'text', None)
+    if text is not None:
+        return text.replace('[0-6]', '')
+
+    return pattern.pattern.to_bytes(pattern.size, 'big').hex(' ')
+
+
+def expected_hits(pattern, area, data: bytes, overlapped: bool) -> list:
+    """ The hits of each readable run of the area (on both sides of the unreadable page). """
+    hole_start, hole_end = area.hole
+    hits, next_address = [], 0
+    for start, end in ((area.address, hole_start), (hole_end, area.end)):
+        run = data[start - area.address:end - area.address]
+        for offset in pattern.match_all(run):
+            if start + offset < next_address:
+                continue
+
+            hits.append(start + offset)
+            if not overlapped:
+                next_address = start + pattern.match_end(run, offset)
+
+    return hits
+
+
+@pytest.mark.parametrize("overlapped", [True, False])
+@pytest.mark.parametrize("text", TEXTS)
+def test_scan(memory, area, text, overlapped):
+    pattern = Pattern.compile(text)
+    data = plant(memory, area, pattern, SEED)
+    expected = expected_hits(pattern, area, data, overlapped)
+
+    hits = list(memory.scan(pattern, area.address, len(data), chunk_size=CHUNK_SIZE, overlapped=overlapped))
+    assert len(expected) > 30
+    assert hits == expected
+
+    hits = list(memory.scan_parallel(pattern, area.address, len(data), workers=3, chunk_size=CHUNK_SIZE,
+                                     overlapped=overlapped))
+    assert hits == expected
+
+    with ThreadPoolExecutor(max_workers=2) as match_executor:
+        hits = list(memory.scan_parallel(pattern, area.address, len(data), workers=3, chunk_size=CHUNK_SIZE,
+                                         overlapped=overlapped, match_executor=match_executor))
+    assert hits == expected
+
+
+def test_scan_bounds(memory, area):
+    pattern = Pattern.compile(TEXTS[0])
+    data = plant(memory, area, pattern, SEED + 1)
+    expected = expected_hits(pattern, area, data, True)
+
+    assert list(memory.scan(pattern, area.address, len(data), first_only=True)) == expected[:1]
+
+    # Hits must fit in the scanned range
+    start, stop = expected[2], expected[-3] + pattern.size
+    assert list(memory.scan(pattern, start, stop - start, chunk_size=CHUNK_SIZE)) == expected[2:-2]
+    assert list(memory.scan(pattern, start, stop - start - 1, chunk_size=CHUNK_SIZE)) == expected[2:-3]
+
+
+def test_scan_without_hits(memory, area):
+    pattern = Pattern.compile("00 11 22 33 44 55 66 77 88 99 AA BB CC DD EE FF")
+    assert list(memory.scan(pattern, area.address, len(area.data), chunk_size=CHUNK_SIZE)) == []
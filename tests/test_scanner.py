@@ -0,0 +1,119 @@
+import struct
+
+import pytest
+
+from conftest import PAGE_SIZE
+from remembrance.memory import MemoryProtection
+from remembrance.scanner import ScanCondition, ValueScanner
+
+numpy = pytest.importorskip('numpy')
+
+VALUE = 0x5EED5EED
+
+
+def plant(memory, area, pages: range, per_page: int, step: int = 100) -> list:
+    """ Write the value at a few places of some area pages. """
+    addresses = [area.address + page * PAGE_SIZE + 8 + index * step for page in pages for index in range(per_page)]
+    for address in addresses:
+        memory.write(address, struct.pack('<i', VALUE))
+
+    return addresses
+
+
+def scan(memory, area, chunk_size: int, alignment: int = None) -> ValueScanner:
+    scanner = ValueScanner(memory, numpy.int32, alignment, chunk_size)
+    scanner.first_scan(ScanCondition.EXACT, VALUE, address=area.address, size=len(area.data))
+    return scanner
+
+
+@pytest.mark.parametrize("chunk_size", [64, PAGE_SIZE, 1 << 20])
+def test_next_scan(memory, area, chunk_size):
+    addresses = plant(memory, area, range(1, 6), 10) + plant(memory, area, range(9, 11), 10)
+    scanner = scan(memory, area, chunk_size)
+    assert scanner.addresses.tolist() == addresses
+
+    changed = addresses[::3]
+    for address in changed:
+        memory.write(address, struct.pack('<i', VALUE + 5))
+
+    assert scanner.next_scan(ScanCondition.INCREASED_BY, 5) == len(changed)
+    assert list(scanner.results()) == [(address, VALUE + 5) for address in changed]
+    assert scanner.next_scan(ScanCondition.UNCHANGED) == len(changed)
+
+
+@pytest.mark.parametrize("chunk_size", [64, 1 << 20])
+def test_next_scan_unaligned(memory, area, chunk_size):
+    # Values straddling the piece (and page) boundaries
+    base = area.address + PAGE_SIZE
+    addresses = [base + offset for offset in (62, 127, 190, PAGE_SIZE - 2, PAGE_SIZE + 61)]
+    for address in addresses:
+        memory.write(address, struct.pack('<i', VALUE))
+
+    scanner = scan(memory, area, chunk_size, alignment=1)
+    assert scanner.addresses.tolist() == addresses
+
+    memory.write(addresses[1], struct.pack('<i', VALUE - 1))
+    memory.write(addresses[3], struct.pack('<i', VALUE - 1))
+    assert scanner.next_scan(ScanCondition.DECREASED) == 2
+    assert scanner.addresses.tolist() == [addresses[1], addresses[3]]
+
+
+def test_next_scan_piece_size(memory, area, monkeypatch):
+    addresses = plant(memory, area, range(0, 6), 20, step=200)
+    scanner = scan(memory, area, PAGE_SIZE)
+
+    sizes = []
+    read_many = memory.read_many
+
+    def spy(ranges, *args, **kwargs):
+        results = read_many(ranges, *args, **kwargs)
+        sizes.extend(len(data) for data in results)
+        return results
+
+    monkeypatch.setattr(memory, 'read_many', spy)
+    assert scanner.next_scan(ScanCondition.UNCHANGED) == len(addresses)
+    assert max(sizes) <= PAGE_SIZE + 3
+
+
+@pytest.mark.parametrize("chunk_size", [PAGE_SIZE, 1 << 20])
+def test_next_scan_partially_unreadable(memory, area, chunk_size):
+    addresses = plant(memory, area, range(1, 4), 10)
+    hole_start = area.address + 2 * PAGE_SIZE
+    # Values ending right before the page made unreadable, and crossing into it
+    memory.write(hole_start - 4, struct.pack('<ih', VALUE, VALUE & 0xFFFF))
+    addresses = sorted(addresses + [hole_start - 4, hole_start - 2])
+
+    scanner = scan(memory, area, chunk_size, alignment=2)
+    assert scanner.addresses.tolist() == addresses
+
+    # Unexpected hole (Memory.protect would refresh the regions)
+    memory.backend.protect(hole_start, PAGE_SIZE, MemoryProtection.PAGE_NOACCESS)
+    try:
+        expected = [address for address in addresses if address + 4 <= hole_start or address >= hole_start + PAGE_SIZE]
+        assert scanner.next_scan(ScanCondition.UNCHANGED) == len(expected) == 21
+        assert scanner.addresses.tolist() == expected
+    finally:
+        memory.backend.protect(hole_start, PAGE_SIZE, MemoryProtection.PAGE_READWRITE)
+
+
+@pytest.mark.parametrize("condition, value, maximum", [(ScanCondition.EXACT, None, None),
+                                                       (ScanCondition.RANGE, None, VALUE),
+                                                       (ScanCondition.RANGE, VALUE, None)])
+def test_first_scan_missing_operand(memory, area, condition, value, maximum):
+    scanner = ValueScanner(memory, numpy.int32)
+    with pytest.raises(ValueError):
+        scanner.first_scan(condition, value, maximum, address=area.address, size=len(area.data))
+
+
+@pytest.mark.parametrize("condition, value, maximum", [(ScanCondition.EXACT, None, None),
+                                                       (ScanCondition.RANGE, VALUE, None),
+                                                       (ScanCondition.INCREASED_BY, None, None),
+                                                       (ScanCondition.DECREASED_BY, None, None)])
+def test_next_scan_missing_operand(memory, area, condition, value, maximum):
+    addresses = plant(memory, area, range(1, 3), 5)
+    scanner = scan(memory, area, PAGE_SIZE)
+    with pytest.raises(ValueError):
+        scanner.next_scan(condition, value, maximum)
+
+    # The candidates are kept
+    assert scanner.addresses.tolist() == addresses
@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from remembrance.exception import SignatureException
+from remembrance.signature import COMPILED_SUFFIX, SignatureDatabase
+
+SOURCE = """
+# Test signatures
+get_player = 48 8B 05 ?? ?? ?? ?? 48 85 C0 ; module=game.exe section=.text hits=1
+call_update = E8 ?? ?? ?? ?? 48 8B 4? 24 ; endian=little
+jump = 48 [2-4] C3
+"""
+
+
+def test_parse():
+    database = SignatureDatabase.parse(SOURCE)
+    assert len(database) == 3
+    assert database['get_player'].module == 'game.exe'
+    assert database['get_player'].expected_hits == 1
+    assert database['call_update'].little_endian
+    assert database['jump'].section is None
+
+    with pytest.raises(SignatureException):
+        SignatureDatabase.parse("broken line")
+
+
+def test_compiled_round_trip(tmp_path):
+    path = str(tmp_path / 'signatures.compiled')
+    database = SignatureDatabase.parse(SOURCE)
+    database.save_compiled(path)
+
+    data = bytes(8) + bytes.fromhex('48 8B 05 11 22 33 44 48 85 C0 C3 48 00 00 C3')
+    with SignatureDatabase.load_compiled(path) as compiled:
+        assert [signature.name for signature in compiled] == [signature.name for signature in database]
+        assert compiled.scan(data) == database.scan(data) == {'get_player': [8], 'call_update': [],
+                                                              'jump': [15, 19]}
+
+
+def test_long_strings(tmp_path):
+    # Longer than 65535 bytes, so the string lengths don't fit in 16 bits
+    path = str(tmp_path / 'signatures.compiled')
+    text = ' '.join(['48 8B'] * 12000)
+    SignatureDatabase.parse(f"long = {text} ; module={'m' * 70000}").save_compiled(path)
+
+    with SignatureDatabase.load_compiled(path) as compiled:
+        assert compiled['long'].text == text
+        assert compiled['long'].module == 'm' * 70000
+        assert compiled['long'].pattern.size == 24000
+
+
+def test_open_rebuilds_changed_source(tmp_path):
+    source_path = str(tmp_path / 'signatures.txt')
+    with open(source_path, 'w') as file:
+        file.write("first = 48 8B 05\n")
+
+    assert SignatureDatabase.open(source_path)['first'].text == '48 8B 05'
+    assert os.path.exists(source_path + COMPILED_SUFFIX)
+    with SignatureDatabase.open(source_path) as database:
+        assert database['first'].text == '48 8B 05'
+
+    # Same size and modification time, only the CRC32 tells the content changed
+    stat = os.stat(source_path)
+    with open(source_path, 'w') as file:
+        file.write("first = 48 8B 06\n")
+    os.utime(source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    with SignatureDatabase.open(source_path) as database:
+        assert database['first'].text == '48 8B 06'
+
+
+def test_corrupted(tmp_path):
+    path = str(tmp_path / 'signatures.compiled')
+    SignatureDatabase.parse(SOURCE).save_compiled(path)
+    with open(path, 'r+b') as file:
+        file.seek(-1, os.SEEK_END)
+        last = file.read(1)[0]
+        file.seek(-1, os.SEEK_END)
+        file.write(bytes([last ^ 0xFF]))
+
+    with pytest.raises(SignatureException):
+        SignatureDatabase.load_compiled(path)
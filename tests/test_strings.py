@@ -0,0 +1,70 @@
+import pytest
+
+from conftest import PAGE_SIZE
+from remembrance.strings import unit_size
+
+
+def plant(memory, address: int, text: str, encoding: str) -> bytes:
+    """ Write a NUL terminated string, followed by another one (so that a missed terminator shows). """
+    data = text.encode(encoding)
+    memory.write(address, data + bytes(unit_size(encoding)) + 'next'.encode(encoding) + bytes(unit_size(encoding)))
+    return data
+
+
+@pytest.mark.parametrize("encoding", ['utf-8', 'utf-16-le', 'utf-32-le'])
+def test_read_strings(memory, area, encoding):
+    texts = ["first", "", "héllo wörld", "x" * 300]
+    pointers, expected = [], []
+    for index, text in enumerate(texts):
+        address = area.address + 100 + index * 2000
+        expected.append(plant(memory, address, text, encoding))
+        pointers.append(address)
+
+    strings = memory.read_strings(pointers[:2] + [0] + pointers[2:], encoding)
+    assert strings[2] is None
+    assert strings[:2] + strings[3:] == expected
+    assert [string.text for string in strings if string is not None] == texts
+    assert strings[0].address == pointers[0] and strings[0].encoding == encoding
+
+
+@pytest.mark.parametrize("encoding, before", [('utf-16-le', 1), ('utf-32-le', 1), ('utf-32-le', 2),
+                                              ('utf-32-le', 3)])
+def test_terminator_across_pages(memory, area, encoding, before):
+    # A misaligned string, its terminator starting 'before' bytes before a page boundary
+    text = "ab" * 50
+    boundary = area.address + 2 * PAGE_SIZE
+    address = boundary - before - len(text.encode(encoding))
+    expected = plant(memory, address, text, encoding)
+
+    assert memory.read_strings([address], encoding) == [expected]
+    assert memory.read_cstring(address, encoding=encoding).text == text
+
+
+@pytest.mark.parametrize("encoding", ['utf-16-le', 'utf-32-le'])
+def test_code_unit_across_pages(memory, area, encoding):
+    text = "ab" * 50
+    boundary = area.address + 2 * PAGE_SIZE
+    for offset in range(1, unit_size(encoding)):
+        address = boundary - offset - len(text[:10].encode(encoding))
+        expected = plant(memory, address, text, encoding)
+        assert memory.read_strings([address], encoding) == [expected]
+
+
+def test_max_len(memory, area):
+    address = area.address + 2 * PAGE_SIZE - 5
+    plant(memory, address, "z" * 100, 'utf-16-le')
+
+    assert memory.read_wstring(address, max_len=40).text == "z" * 40
+    assert memory.read_strings([address], 'utf-16-le', max_len=0) == [b'']
+
+
+@pytest.mark.parametrize("encoding, misalignment", [('utf-8', 0), ('utf-16-le', 0), ('utf-16-le', 1)])
+def test_string_ending_at_hole(memory, area, encoding, misalignment):
+    hole_start, hole_end = area.hole
+    address = hole_start - 2 * PAGE_SIZE - 100 - misalignment
+    memory.write(address, b'A' * (hole_start - address))
+
+    strings = memory.read_strings([address, hole_start, hole_end], encoding, max_len=len(area.data))
+    assert strings[:2] == [b'A' * (hole_start - address), None]
+    with pytest.raises(OSError):
+        memory.read_cstring(hole_start, encoding=encoding)
@@ -0,0 +1,60 @@
+import errno
+
+import pytest
+
+from conftest import PAGE_SIZE
+from remembrance.memory import MemoryState
+
+
+def unreadable(area) -> list:
+    """ (address, size) ranges that can't be read: the hole, ranges crossing into it, unmapped addresses. """
+    hole_start, hole_end = area.hole
+    return [(hole_start, 16), (hole_start - 8, 16), (hole_end - 1, 2), (area.address, len(area.data)), (0, 8),
+            (1 << 62, PAGE_SIZE)]
+
+
+def test_try_read(memory, area):
+    assert memory.try_read(area.address + 10, 100) == area.data[10:110]
+    hole_start, hole_end = area.hole
+    assert memory.try_read(hole_start - 8, 8) == area.data[hole_start - area.address - 8:hole_start - area.address]
+    assert memory.try_read(hole_end, 8) == area.data[hole_end - area.address:hole_end - area.address + 8]
+
+    for address, size in unreadable(area):
+        assert memory.try_read(address, size) is None
+
+
+def test_try_read_into(memory, area):
+    buffer = bytearray(b'\xaa' * 64)
+    assert memory.try_read_into(area.address + 5, buffer, 8, 16) == 0
+    assert buffer == b'\xaa' * 8 + area.data[5:21] + b'\xaa' * 40
+
+    for address, size in unreadable(area):
+        buffer = bytearray(size)
+        code = memory.try_read_into(address, buffer)
+        assert code
+        # The exception is only built on demand, and matches what a raising read would have raised
+        exception = memory.backend.exception(code)
+        assert isinstance(exception, OSError) and exception.errno == code
+        with pytest.raises(OSError) as raised:
+            memory.read_into(address, buffer)
+        assert raised.value.errno == code
+
+
+def test_try_query(memory, area):
+    region = memory.try_query(area.address + 10)
+    assert region == memory.query(area.address + 10)
+    assert region[0] <= area.address and region[2] == MemoryState.MEM_COMMIT
+
+    # Unmapped addresses are free regions, not errors
+    region = memory.try_query(0)
+    assert isinstance(region, tuple) and region[2] == MemoryState.MEM_FREE
+
+
+def test_try_query_failure(memory, monkeypatch):
+    def query(address: int):
+        raise PermissionError(errno.EACCES, "Permission denied")
+
+    monkeypatch.setattr(memory.backend, 'query', query)
+    assert memory.try_query(0x10000) == errno.EACCES
+    with pytest.raises(PermissionError):
+        memory.query(0x10000)
@@ -0,0 +1,122 @@
+import struct
+
+import pytest
+
+from conftest import PAGE_SIZE
+
+numpy = pytest.importorskip('numpy')
+
+POINT = numpy.dtype([('x', '<f4'), ('y', '<f4'), ('id', '<u2')], align=True)
+
+
+@pytest.mark.parametrize("dtype", [numpy.uint8, numpy.int16, '<u8', numpy.float32, numpy.float64, POINT])
+def test_read_array(memory, area, dtype):
+    dtype = numpy.dtype(dtype)
+    address = area.address + 24
+    expected = numpy.frombuffer(area.data[24:24 + 100 * dtype.itemsize], dtype=dtype)
+    # Compared as bytes, random data holds NaN values
+    assert memory.read_array(address, dtype, 100).tobytes() == expected.tobytes()
+    assert memory.read_array(address, dtype, (10, 10)).shape == (10, 10)
+    assert memory.read_array(address, dtype, 0).size == 0
+
+
+def test_write_array(memory, area):
+    address = area.address + 3 * PAGE_SIZE - 10
+    values = numpy.arange(-50, 50, dtype=numpy.int32)
+    memory.write_array(address, values)
+    assert memory.read(address, values.nbytes) == values.tobytes()
+    assert numpy.array_equal(memory.read_array(address, numpy.int32, 100), values)
+
+    # Non contiguous arrays and plain lists
+    memory.write_array(address, values[::2])
+    assert numpy.array_equal(memory.read_array(address, numpy.int32, 50), values[::2])
+    memory.write_array(address, [1.5, -2.5])
+    assert memory.read_array(address, numpy.float64, 2).tolist() == [1.5, -2.5]
+
+    points = numpy.array([(1.0, 2.0, 3), (-4.0, 5.5, 65535)], dtype=POINT)
+    memory.write_array(address, points)
+    assert memory.read_array(address, POINT, 2).tolist() == points.tolist()
+
+
+def test_read_array_unreadable(memory, area):
+    hole_start, _ = area.hole
+    with pytest.raises(OSError):
+        memory.read_array(hole_start - 8, numpy.uint32, 4)
+
+
+@pytest.mark.parametrize("fmt", ['<IhB', '>Qd', '=4s2H', struct.Struct('<iif')])
+def test_read_struct(memory, area, fmt):
+    address = area.address + 2 * PAGE_SIZE - 3
+    compiled = fmt if isinstance(fmt, struct.Struct) else struct.Struct(fmt)
+    offset = address - area.address
+    assert memory.read_struct(address, fmt) == compiled.unpack(area.data[offset:offset + compiled.size])
+
+    values = memory.read_struct(address, fmt)
+    memory.write(address, compiled.pack(*values))
+    assert memory.read_struct(address, fmt) == values
+
+
+def test_read_struct_unreadable(memory, area):
+    hole_start, _ = area.hole
+    with pytest.raises(OSError):
+        memory.read_struct(hole_start - 2, '<I')
+
+
+@pytest.mark.parametrize("dtype", [numpy.uint8, numpy.int32, '<f8'])
+def test_scalars(memory, area, dtype):
+    dtype = numpy.dtype(dtype)
+    # Consecutive, scattered, repeated and unordered addresses, on both sides of the hole
+    hole_start, hole_end = area.hole
+    addresses = [area.address + 8, area.address + 8 + dtype.itemsize, area.address + 8 + 2 * dtype.itemsize,
+                 hole_end + 1000, area.address + 3 * PAGE_SIZE, area.address + 8, hole_start - dtype.itemsize]
+    values = numpy.arange(1, len(addresses) + 1, dtype=dtype)
+    values[-2] = values[0]
+
+    memory.write_scalars(addresses, values, dtype)
+    assert memory.read_scalars(addresses, dtype).tolist() == values.tolist()
+    assert memory.read_scalars(numpy.array(addresses, dtype=numpy.uint64), dtype, gap=0).tolist() == \
+        values.tolist()
+    assert memory.read_scalars([], dtype).size == 0
+
+    # A single value is written everywhere
+    memory.write_scalars(addresses, 7, dtype)
+    assert memory.read_scalars(addresses, dtype).tolist() == [7] * len(addresses)
+
+
+def test_write_scalars_runs(memory, area, monkeypatch):
+    writes = []
+    write = memory.write
+
+    def spy(address: int, data: bytes):
+        writes.append((address, len(data)))
+        write(address, data)
+
+    monkeypatch.setattr(memory, 'write', spy)
+    addresses = [area.address + 16, area.address + 8, area.address + 12, area.address + 100]
+    memory.write_scalars(addresses, [3, 1, 2, 4], numpy.uint32)
+    # The consecutive addresses are written at once
+    assert writes == [(area.address + 8, 12), (area.address + 100, 4)]
+    assert memory.read_array(area.address + 8, numpy.uint32, 3).tolist() == [1, 2, 3]
+
+
+def test_read_scalars_unreadable(memory, area):
+    hole_start, hole_end = area.hole
+    addresses = [area.address, hole_start, hole_start - 2, hole_end, hole_start + 100]
+    expected = [int.from_bytes(area.data[address - area.address:address - area.address + 4], 'little')
+                for address in (area.address, hole_end)]
+
+    values = memory.read_scalars(addresses, numpy.uint32, default=0xDEADBEEF)
+    assert values.tolist() == [expected[0], 0xDEADBEEF, 0xDEADBEEF, expected[1], 0xDEADBEEF]
+    # The two bytes right before the hole can be read
+    offset = hole_start - area.address - 2
+    before = numpy.frombuffer(area.data[offset:offset + 2], dtype=numpy.int16)[0]
+    after = numpy.frombuffer(area.data[hole_end - area.address:], dtype=numpy.int16)[0]
+    assert memory.read_scalars(addresses, numpy.int16, default=-1).tolist() == \
+        [numpy.frombuffer(area.data[:2], dtype=numpy.int16)[0], -1, before, after, -1]
+    assert memory.read_scalars(addresses, numpy.uint32, default=0)[1] == 0
+
+    # Without a default value, the error of the first unreadable address is raised
+    with pytest.raises(OSError):
+        memory.read_scalars(addresses, numpy.uint32)
+    with pytest.raises(OSError):
+        memory.read_scalars([hole_start - 2], numpy.uint32, gap=0)